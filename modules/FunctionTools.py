@@ -1,8 +1,12 @@
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
 import inspect
 import textwrap
 
+from modules.cache import SQLiteCache, hash_key
+from modules.metrics import timer
+
 
 PY_TYPE_TO_JSON = {
     str: "string",
@@ -13,9 +17,59 @@ PY_TYPE_TO_JSON = {
     list: "array",
 }
 
+# 工具结果缓存：所有 FunctionTools / agent 共享，持久化在磁盘上
+TOOL_CACHE_PATH = "data/cache/tools.sqlite"
+TOOL_CACHE_MAX_BYTES = 512 * 1024 ** 2
+_tool_cache = None
+_MISSING = object()
+
+
+def get_tool_cache() -> SQLiteCache:
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = SQLiteCache(TOOL_CACHE_PATH, max_bytes=TOOL_CACHE_MAX_BYTES)
+    return _tool_cache
+
+
+def cached_tool(ttl: Optional[float] = None) -> Callable[[Any], Any]:
+    """把工具标记为可缓存：相同参数（规范化 JSON）的调用直接返回缓存结果。
+
+    Args:
+        ttl: 缓存有效期（秒），``None`` 表示不过期（仍受 LRU 容量限制）
+    """
+    def decorator(fn: Any) -> Any:
+        fn._tool_cache_ttl = ttl
+        return fn
+    return decorator
+
+
 class FunctionTools:
-    def __init__(self, functions: List[Any] = []) -> None:
-        self.functions = functions
+    """OpenAI tools 的注册表：从函数签名和 docstring 生成 tool 定义，并按名字调用。
+
+    Parameters
+    ----------
+    functions:
+        工具函数列表。
+    cache_ttls:
+        可选的 ``{工具名: ttl}``，在注册时为工具开启结果缓存（等价于 ``cached_tool``
+        装饰器，且优先于装饰器的设置）。
+    cache:
+        结果缓存，默认使用共享的 ``data/cache/tools.sqlite``。
+    """
+
+    def __init__(
+        self,
+        functions: Optional[List[Any]] = None,
+        cache_ttls: Optional[Dict[str, Optional[float]]] = None,
+        cache: Optional[SQLiteCache] = None,
+    ) -> None:
+        self.functions = list(functions or [])
+        self._registry: Dict[str, Any] = {fn.__name__: fn for fn in self.functions}
+        self._cache_ttls: Dict[str, Optional[float]] = {
+            fn.__name__: fn._tool_cache_ttl for fn in self.functions if hasattr(fn, "_tool_cache_ttl")
+        }
+        self._cache_ttls.update(cache_ttls or {})
+        self._cache = cache
         # 预先解析并缓存结果，避免重复 inspect
         self._tools: List[Dict[str, Any]] = [
             self.build_tool_from_function(fn) for fn in self.functions
@@ -148,12 +202,52 @@ class FunctionTools:
 
         return "\n".join(lines).rstrip()
 
+    def _find_function(self, function_name: str) -> Any:
+        fn = self._registry.get(function_name)
+        if fn is None:
+            raise ValueError(f"Function '{function_name}' not found in registered tools.")
+        return fn
+
+    def _cache_key(self, function_name: str, function_args: dict) -> Optional[str]:
+        """可缓存的工具返回缓存键，否则返回 ``None``。"""
+        if function_name not in self._cache_ttls:
+            return None
+        if self._cache is None:
+            self._cache = get_tool_cache()
+        return hash_key("tool", function_name, function_args)
+
     def call(self, function_name: str, function_args: dict) -> Any:
-        """调用已注册的函数工具。"""
-        for fn in self.functions:
-            if fn.__name__ == function_name:
-                return fn(**function_args)
-        raise ValueError(f"Function '{function_name}' not found in registered tools.")
+        """调用已注册的函数工具；可缓存的工具优先返回缓存结果。"""
+        fn = self._find_function(function_name)
+        key = self._cache_key(function_name, function_args)
+        with timer("tool", tool=function_name, tool_calls=1) as m:
+            if key is not None:
+                result = self._cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    m["cache_hits"] = 1
+                    return result
+            result = fn(**function_args)
+            if key is not None:
+                self._cache.set(key, result, ttl=self._cache_ttls[function_name])
+            return result
+
+    async def acall(self, function_name: str, function_args: dict) -> Any:
+        """异步调用已注册的函数工具：协程函数直接 await，同步函数放到线程中执行。"""
+        fn = self._find_function(function_name)
+        key = self._cache_key(function_name, function_args)
+        with timer("tool", tool=function_name, tool_calls=1) as m:
+            if key is not None:
+                result = self._cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    m["cache_hits"] = 1
+                    return result
+            if inspect.iscoroutinefunction(fn):
+                result = await fn(**function_args)
+            else:
+                result = await asyncio.to_thread(fn, **function_args)
+            if key is not None:
+                self._cache.set(key, result, ttl=self._cache_ttls[function_name])
+            return result
     
     def __str__(self) -> str:
         return self.__repr__()
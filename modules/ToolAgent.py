@@ -1,10 +1,20 @@
 from __future__ import annotations
+import asyncio
 import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 from modules.FunctionTools import FunctionTools
+from modules.cache import SQLiteCache, hash_key, to_jsonable, to_namespace
+from modules.prompts import get_prompts
+from modules.metrics import timer
 
-with open("prompts/system_default.txt", 'r', encoding='utf-8') as f:
-    _SYSTEM_PROMPT= f.read().strip()
+_SYSTEM_PROMPT = get_prompts().get("system_default").text.strip()
+
+# (tool_call, error, function_name, function_args)，见 ToolAgent._plan_tool_calls
+_PlannedCall = Tuple[Any, Optional[str], Optional[str], Optional[Dict[str, Any]]]
 
 
 def strip_think_tags(response: str) -> str:
@@ -44,6 +54,201 @@ def strip_think_tags(response: str) -> str:
 
 
 
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+# JSON 之前只有空白或代码块开头（```json）时视为回复本身
+_JSON_PREFIX = re.compile(r"\s*(?:```[\w-]*\s*)?")
+# 流式请求的额外参数；include_usage 让服务端在最后一个 chunk 中返回 token 用量
+_STREAM_KWARGS = {"stream": True, "stream_options": {"include_usage": True}}
+
+
+def _is_json_answer(value: Any, prefix: str) -> bool:
+    """判断扫描到的 JSON 候选是否是回复本身，而不是正文中的引用标记等。
+
+    候选位于回复开头（前面只有空白或代码块开头）时总是接受；出现在正文之后时
+    只接受对象或包含非数字元素的数组，``[1]``、``[2, 3]`` 这类引用编号会被跳过。
+    """
+    if _JSON_PREFIX.fullmatch(prefix):
+        return True
+    if isinstance(value, dict):
+        return True
+    return isinstance(value, list) and not all(
+        isinstance(item, (int, float)) and not isinstance(item, bool) for item in value
+    )
+
+
+def _partial_tag_len(text: str, tag: str) -> int:
+    """``text`` 末尾与 ``tag`` 前缀重合的长度（标签可能被切在两个 chunk 之间）。"""
+    for n in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:n]):
+            return n
+    return 0
+
+
+class _StreamAssembler:
+    """把流式 chunk 逐个拼装为与非流式接口相同结构的响应。
+
+    - ``<think>...</think>`` 中的内容在到达时直接丢弃，不进入缓冲区；
+      服务端单独返回的 ``reasoning_content`` 同样忽略。没有开始标签却出现
+      ``</think>`` 时（开始标签在提示词模板中），与 ``strip_think_tags`` 一致，
+      丢弃此前的所有内容；这种情况下思考过程中出现的完整 JSON 会被误认为
+      回复而提前停止。
+    - ``stop_on_json=True`` 时，可见内容中出现第一个完整的 JSON 回复（见
+      ``_is_json_answer``）后 ``feed`` 返回 ``True``，调用方应停止读取；内容
+      截断到 JSON 结束位置。
+    - 工具调用的增量按 ``index`` 合并。
+    """
+
+    def __init__(self, stop_on_json: bool = False) -> None:
+        self.stop_on_json = stop_on_json
+        self.content = ""
+        self.finish_reason: Optional[str] = None
+        self.usage: Any = None
+        self.stopped_early = False
+        self.received_tokens = False
+        self._tool_calls: Dict[int, Dict[str, Any]] = {}
+        self._pending = ""
+        self._in_think = False
+        self._had_think = False
+        self._reset_json_scan()
+
+    def feed(self, chunk: Any) -> bool:
+        """处理一个 chunk；返回 ``True`` 表示已经得到完整的 JSON，可以停止生成。"""
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = usage
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = getattr(choice, "delta", None)
+            if delta is not None:
+                if getattr(delta, "content", None) or getattr(delta, "reasoning_content", None) or getattr(delta, "tool_calls", None):
+                    self.received_tokens = True
+                if getattr(delta, "content", None):
+                    self._feed_text(delta.content)
+                for tc in getattr(delta, "tool_calls", None) or []:
+                    self._feed_tool_call(tc)
+            if getattr(choice, "finish_reason", None):
+                self.finish_reason = choice.finish_reason
+        if self.stop_on_json and not self._tool_calls and self._find_json_end():
+            self.stopped_early = True
+            return True
+        return False
+
+    def _feed_text(self, text: str) -> None:
+        text = self._pending + text
+        self._pending = ""
+        while text:
+            tag = _THINK_CLOSE if self._in_think else _THINK_OPEN
+            index = text.find(tag)
+            close = text.find(_THINK_CLOSE) if not self._in_think else -1
+            if close != -1 and (index == -1 or close < index):
+                # 开始标签不在输出中（在提示词模板里）：之前的内容都是思考过程
+                self._had_think = True
+                self.content = ""
+                self._reset_json_scan()
+                text = text[close + len(_THINK_CLOSE):]
+                continue
+            if index == -1:
+                keep = _partial_tag_len(text, tag)
+                if not self._in_think:
+                    keep = max(keep, _partial_tag_len(text, _THINK_CLOSE))
+                    self.content += text[:len(text) - keep]
+                self._pending = text[len(text) - keep:]
+                return
+            if not self._in_think:
+                self.content += text[:index]
+            self._had_think = True
+            self._in_think = not self._in_think
+            text = text[index + len(tag):]
+
+    def _feed_tool_call(self, tc: Any) -> None:
+        index = getattr(tc, "index", None)
+        if index is None:
+            index = len(self._tool_calls)
+        call = self._tool_calls.setdefault(index, {"id": None, "type": "function", "name": "", "arguments": ""})
+        if getattr(tc, "id", None):
+            call["id"] = tc.id
+        if getattr(tc, "type", None):
+            call["type"] = tc.type
+        function = getattr(tc, "function", None)
+        if function is not None:
+            call["name"] += getattr(function, "name", None) or ""
+            call["arguments"] += getattr(function, "arguments", None) or ""
+
+    def _reset_json_scan(self) -> None:
+        self._json_start = -1
+        self._json_pos = 0
+        self._json_depth = 0
+        self._json_in_string = False
+        self._json_escape = False
+
+    def _find_json_end(self) -> bool:
+        """增量扫描可见内容，找到以 ``[``/``{`` 开头、括号配平且可以解析的 JSON 值。
+
+        扫描状态在 chunk 之间保留，每个字符只扫描一次；配平但解析失败的候选
+        （例如正文中的 ``[注]``）以及不像回复的候选（例如正文中的引用编号
+        ``[1]``，见 ``_is_json_answer``）会被跳过，从下一个字符继续寻找。
+        """
+        content = self.content
+        pos = self._json_pos
+        while pos < len(content):
+            ch = content[pos]
+            pos += 1
+            if self._json_start == -1:
+                if ch in "[{":
+                    self._json_start, self._json_depth = pos - 1, 1
+                continue
+            if self._json_in_string:
+                if self._json_escape:
+                    self._json_escape = False
+                elif ch == "\\":
+                    self._json_escape = True
+                elif ch == '"':
+                    self._json_in_string = False
+            elif ch == '"':
+                self._json_in_string = True
+            elif ch in "[{":
+                self._json_depth += 1
+            elif ch in "]}":
+                self._json_depth -= 1
+                if self._json_depth == 0:
+                    start = self._json_start
+                    try:
+                        value = json.loads(content[start:pos])
+                    except ValueError:
+                        value = None
+                    if value is None or not _is_json_answer(value, content[:start]):
+                        self._reset_json_scan()
+                        pos = start + 1
+                        continue
+                    self.content = content[:pos]
+                    return True
+        self._json_pos = pos
+        return False
+
+    def response(self) -> Any:
+        """与 ``chat.completions.create`` 非流式返回值结构相同的响应。"""
+        if self._pending and not self._in_think and not self.stopped_early:
+            self.content += self._pending
+            self._pending = ""
+        content = self.content.strip() if self._had_think else self.content
+        tool_calls = [
+            SimpleNamespace(
+                id=call["id"],
+                type=call["type"],
+                function=SimpleNamespace(name=call["name"], arguments=call["arguments"]),
+            )
+            for _, call in sorted(self._tool_calls.items())
+        ] or None
+        finish_reason = "stop" if self.stopped_early else self.finish_reason
+        if finish_reason is None:
+            finish_reason = "tool_calls" if tool_calls else "stop"
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=0, finish_reason=finish_reason, message=message)],
+            usage=self.usage,
+        )
+
+
 class ToolAgent:
     """LLM agent wrapper that supports tools and optional batch chat.
 
@@ -56,6 +261,25 @@ class ToolAgent:
     function_tools:
         Optional ``FunctionTools`` instance (or plain tools list). If ``None``,
         no tools will be passed to the model.
+    max_concurrency:
+        Maximum number of conversations ``batch_chat`` runs at the same time.
+        ``1`` falls back to sequential calls.
+    max_tool_workers:
+        Maximum number of tool calls from one model turn executed at the same
+        time. ``1`` runs them sequentially.
+    cache:
+        Optional ``SQLiteCache`` for completions, keyed by model, messages,
+        tools and temperature. Pass ``use_cache=False`` to ``chat`` or
+        ``batch_chat`` to bypass it for a call.
+    stream:
+        Request completions with ``stream=True`` and assemble them chunk by
+        chunk. ``<think>`` content is dropped as it arrives and the
+        time to first token is recorded as ``ttft_s`` in the ``llm`` metrics.
+    stop_on_json:
+        Stop reading the stream (and close the connection so the server stops
+        generating) as soon as the visible reply contains a complete JSON
+        array or object. Implies ``stream``. Can be overridden per call in
+        ``chat`` and ``batch_chat``.
     """
 
     def __init__(
@@ -66,6 +290,11 @@ class ToolAgent:
         system_prompt: str = _SYSTEM_PROMPT,
         temperature: float = 0.7,
         max_repeat_tool_calls: int = 3,
+        max_concurrency: int = 4,
+        cache: Optional[SQLiteCache] = None,
+        max_tool_workers: int = 8,
+        stream: bool = False,
+        stop_on_json: bool = False,
     ) -> None:
         self._client = client
         self._model_name = model_name
@@ -78,6 +307,22 @@ class ToolAgent:
         self._system_prompt = system_prompt
         self._temperature = temperature
         self._max_repeat_tool_calls = max_repeat_tool_calls
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._max_tool_workers = max(1, int(max_tool_workers))
+        self._cache = cache
+        self._stream = stream
+        self._stop_on_json = stop_on_json
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @staticmethod
+    def _record_usage(m: Dict[str, Any], response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            m["prompt_tokens"] = getattr(usage, "prompt_tokens", None) or 0
+            m["completion_tokens"] = getattr(usage, "completion_tokens", None) or 0
     
     
     def _build_initial_messages(self, user_message: str, history: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
@@ -90,25 +335,208 @@ class ToolAgent:
         messages.append({"role": "user", "content": user_message})
         return messages
 
-    def _complete_chat(self, messages: List[Dict[str, Any]], use_tools: bool = True) -> Any:
-        response = self._client.chat.completions.create(
+    def _completion_kwargs(self, messages: List[Dict[str, Any]], use_tools: bool = True) -> Dict[str, Any]:
+        return dict(
             model=self._model_name,
             messages=messages,  # type: ignore[arg-type]
             tools=self._function_tools.tools if use_tools else None,
             tool_choice="auto" if use_tools and self._function_tools.tools else None,
             temperature=self._temperature,
         )
-        
-        return response
+
+    def _cache_key(self, kwargs: Dict[str, Any], use_cache: bool, stop_on_json: bool = False) -> Optional[str]:
+        if self._cache is None or not use_cache:
+            return None
+        parts = [kwargs["model"], kwargs["messages"], kwargs["tools"], kwargs["temperature"]]
+        if stop_on_json:
+            # 提前停止的回复被截断在 JSON 结束处，不能返回给需要完整回复的调用
+            parts.append("stop_on_json")
+        return hash_key(*parts)
+
+    def _cache_lookup(self, key: Optional[str]) -> Any:
+        if key is None:
+            return None
+        cached = self._cache.get(key)  # type: ignore[union-attr]
+        return to_namespace(cached) if cached is not None else None
+
+    def _cache_store(self, key: Optional[str], response: Any) -> None:
+        if key is not None:
+            self._cache.set(key, to_jsonable(response))  # type: ignore[union-attr]
+
+    def _streaming(self, stop_on_json: Optional[bool]) -> Tuple[bool, bool]:
+        """返回本次调用的 ``(stream, stop_on_json)``；``None`` 使用构造函数中的设置。"""
+        if stop_on_json is None:
+            stop_on_json = self._stop_on_json
+        return self._stream or stop_on_json, stop_on_json
+
+    @staticmethod
+    def _finish_stream(assembler: _StreamAssembler, m: Dict[str, Any]) -> Any:
+        if assembler.stopped_early:
+            m["early_stops"] = 1
+        return assembler.response()
+
+    def _stream_chat(self, kwargs: Dict[str, Any], m: Dict[str, Any], stop_on_json: bool) -> Any:
+        """以流式请求补全，逐个 chunk 拼装响应；得到完整 JSON 时提前关闭连接。"""
+        assembler = _StreamAssembler(stop_on_json)
+        start = time.perf_counter()
+        stream = self._client.chat.completions.create(**kwargs, **_STREAM_KWARGS)
+        try:
+            for chunk in stream:
+                stop = assembler.feed(chunk)
+                if assembler.received_tokens and "ttft_s" not in m:
+                    m["ttft_s"] = time.perf_counter() - start
+                if stop:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return self._finish_stream(assembler, m)
+
+    def _complete_chat(
+        self,
+        messages: List[Dict[str, Any]],
+        use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
+    ) -> Any:
+        kwargs = self._completion_kwargs(messages, use_tools=use_tools)
+        stream, stop_on_json = self._streaming(stop_on_json)
+        key = self._cache_key(kwargs, use_cache, stop_on_json)
+        with timer("llm", model=self._model_name, stream=stream) as m:
+            response = self._cache_lookup(key)
+            if response is not None:
+                m["cache_hits"] = 1
+                return response
+            if stream:
+                response = self._stream_chat(kwargs, m, stop_on_json)
+            else:
+                response = self._client.chat.completions.create(**kwargs)
+            self._record_usage(m, response)
+            self._cache_store(key, response)
+            return response
+
+    @staticmethod
+    def _build_assistant_message(response: Any) -> Dict[str, Any]:
+        tool_calls = response.choices[0].message.tool_calls
+        assistant_message: Dict[str, Any] = {
+            "role": "assistant",
+            "content": strip_think_tags(response.choices[0].message.content or ""),
+        }
+        assistant_message["tool_calls"] = [
+            {
+                "id": tc.id,
+                "type": tc.type,
+                "function": {
+                    "name": tc.function.name,  # type: ignore[attr-defined]
+                    "arguments": tc.function.arguments,  # type: ignore[attr-defined]
+                },
+            }
+            for tc in tool_calls
+        ]
+        return assistant_message
+
+    def _check_repeated_call(
+        self,
+        tc: Any,
+        call_name_history: List[str],
+        current_repeat_count: int,
+    ) -> Tuple[Optional[str], int, bool]:
+        """检测重复的函数调用。
+
+        Returns:
+            (error, current_repeat_count, use_tools)。``error`` 为 ``None``
+            表示该调用可以执行（并已记入 ``call_name_history``）。
+        """
+        call_name = tc.function.name + ":" +str(tc.function.arguments)  # type: ignore[attr-defined]
+        repeat_count = call_name_history.count(call_name)
+        if repeat_count > current_repeat_count:
+            current_repeat_count = repeat_count
+            if current_repeat_count < self._max_repeat_tool_calls:
+                return "Error: Detected repeated function call. Function calls aborted to prevent infinite loop.", current_repeat_count, True
+            return "Error: Maximum repeated function call limit reached. You cannot call any function anymore. Please provide your final answer.", current_repeat_count, False
+        call_name_history.append(call_name)
+        return None, current_repeat_count, True
+
+    def _plan_tool_calls(
+        self,
+        tool_calls: Sequence[Any],
+        call_name_history: List[str],
+        current_repeat_count: int,
+        use_tools: bool,
+        verbose: bool = False,
+    ) -> Tuple[List[_PlannedCall], int, bool]:
+        """按顺序做重复调用检测，确定本轮哪些工具调用需要执行。
+
+        Returns:
+            (plan, current_repeat_count, use_tools)。``plan`` 与 ``tool_calls`` 顺序一致，
+            每项为 ``(tc, error, function_name, function_args)``，``error`` 不为 ``None``
+            的调用不执行，直接把 ``error`` 作为结果。
+        """
+        plan = []
+        for tc in tool_calls:
+            error, current_repeat_count, allow_tools = self._check_repeated_call(
+                tc, call_name_history, current_repeat_count
+            )
+            use_tools = use_tools and allow_tools
+            if error is not None:
+                plan.append((tc, error, None, None))
+                continue
+            function_name = tc.function.name  # type: ignore[attr-defined]
+            function_args = json.loads(tc.function.arguments)  # type: ignore[attr-defined]
+            if verbose:
+                print(f"  - Calling {function_name}({function_args})")
+            plan.append((tc, None, function_name, function_args))
+        return plan, current_repeat_count, use_tools
+
+    @staticmethod
+    def _append_tool_results(
+        messages: List[Dict[str, Any]],
+        plan: Sequence[_PlannedCall],
+        results: Sequence[Any],
+        verbose: bool = False,
+    ) -> None:
+        """按原始 tool_call 顺序追加工具结果消息。"""
+        for (tc, error, _, _), result in zip(plan, results):
+            if error is None and verbose:
+                short = result[:100] + "..." if len(result) > 100 else result
+                print(f"    Result: {short}")
+            messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tc.id,
+                    "content": result,
+                }
+            )
+
+    def _execute_tool_calls(self, plan: Sequence[_PlannedCall]) -> List[Any]:
+        """执行一轮中的工具调用：多个调用时在线程池中并发执行，结果顺序与 ``plan`` 一致。"""
+        pending = [(name, args) for _, error, name, args in plan if error is None]
+        if len(pending) > 1 and self._max_tool_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(len(pending), self._max_tool_workers)) as executor:
+                outputs = list(executor.map(lambda call: self._function_tools.call(*call), pending))
+        else:
+            outputs = [self._function_tools.call(name, args) for name, args in pending]
+        outputs_iter = iter(outputs)
+        return [error if error is not None else next(outputs_iter) for _, error, _, _ in plan]
+
+    @staticmethod
+    def _finish(response: Any, messages: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+        final_response = response.choices[0].message.content or "No response generated."
+        final_response = strip_think_tags(final_response)
+        messages.append({"role": "assistant", "content": final_response})
+        return final_response, messages
 
     def _run_chat_loop(
         self,
         messages: List[Dict[str, Any]],
         verbose: bool = False,
         use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
     ) -> Tuple[str, List[Dict[str, Any]]]:
-        response = self._complete_chat(messages, use_tools=use_tools)
-        call_name_history = []
+        response = self._complete_chat(messages, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json)
+        call_name_history: List[str] = []
         current_repeat_count = 0
         while response.choices[0].finish_reason == "tool_calls":
             tool_calls = response.choices[0].message.tool_calls
@@ -118,59 +546,18 @@ class ToolAgent:
             if verbose:
                 print(f"\nAgent decided to call {len(tool_calls)} function(s):")
 
-            assistant_message: Dict[str, Any] = {
-                "role": "assistant",
-                "content": strip_think_tags(response.choices[0].message.content or ""),
-            }
-            assistant_message["tool_calls"] = [
-                {
-                    "id": tc.id,
-                    "type": tc.type,
-                    "function": {
-                        "name": tc.function.name,  # type: ignore[attr-defined]
-                        "arguments": tc.function.arguments,  # type: ignore[attr-defined]
-                    },
-                }
-                for tc in tool_calls
-            ]
-            messages.append(assistant_message)
-
-            for tc in tool_calls:
-                call_name = tc.function.name + ":" +str(tc.function.arguments)  # type: ignore[attr-defined]
-                repeat_count = call_name_history.count(call_name)
-                if repeat_count > current_repeat_count:
-                    current_repeat_count = repeat_count
-                    if current_repeat_count < self._max_repeat_tool_calls:
-                        result = "Error: Detected repeated function call. Function calls aborted to prevent infinite loop."
-                    else:
-                        result = "Error: Maximum repeated function call limit reached. You cannot call any function anymore. Please provide your final answer."
-                        use_tools = False
-                else:
-                    call_name_history.append(call_name)
-                    
-                    
-                    function_name = tc.function.name  # type: ignore[attr-defined]
-                    function_args = json.loads(tc.function.arguments)  # type: ignore[attr-defined]
-                    if verbose:
-                        print(f"  - Calling {function_name}({function_args})")
-                    result = self._function_tools.call(function_name, function_args)
-                    if verbose:
-                        short = result[:100] + "..." if len(result) > 100 else result
-                        print(f"    Result: {short}")
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tc.id,
-                        "content": result,
-                    }
-                )
+            messages.append(self._build_assistant_message(response))
 
-            response = self._complete_chat(messages, use_tools=use_tools)
+            # 重复检测按顺序进行，通过检测的调用并发执行
+            plan, current_repeat_count, use_tools = self._plan_tool_calls(
+                tool_calls, call_name_history, current_repeat_count, use_tools, verbose
+            )
+            results = self._execute_tool_calls(plan)
+            self._append_tool_results(messages, plan, results, verbose)
+
+            response = self._complete_chat(messages, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json)
             
-        final_response = response.choices[0].message.content or "No response generated."
-        final_response = strip_think_tags(final_response)
-        messages.append({"role": "assistant", "content": final_response})
-        return final_response, messages
+        return self._finish(response, messages)
 
     def chat(
         self,
@@ -178,6 +565,8 @@ class ToolAgent:
         verbose: bool = False,
         history: Optional[List[Dict[str, Any]]] = None,
         use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
     ) -> Tuple[str, List[Dict[str, Any]]]:
         """Single-turn chat with optional history and automatic tool handling."""
         messages = self._build_initial_messages(message, history)
@@ -185,7 +574,9 @@ class ToolAgent:
             print(f"\n{'='*60}")
             print(f"User Message: {message}")
             print(f"{'='*60}")
-        reply, updated = self._run_chat_loop(messages, verbose=verbose, use_tools=use_tools)
+        reply, updated = self._run_chat_loop(
+            messages, verbose=verbose, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json
+        )
         if verbose:
             print(f"\n{'='*60}")
             print(f"Agent Response:\n{reply}")
@@ -195,22 +586,202 @@ class ToolAgent:
     def batch_chat(
         self,
         messages_list: Sequence[str],
-         histories: Optional[Sequence[Optional[List[Dict[str, Any]]]]] = None,
+        histories: Optional[Sequence[Optional[List[Dict[str, Any]]]]] = None,
         verbose: bool = False,
         use_tools: bool = True,
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
     ) -> Tuple[List[str], List[List[Dict[str, Any]]]]:
-        """Batch chat API using OpenAI batch endpoint semantics.
+        """Run several independent conversations concurrently.
 
-        当前实现为顺序调用逐条 ``chat``，保留接口形式以便后续
-        替换为真正的批量 API。
+        每条消息在线程池中独立调用 ``chat``，并发数由 ``max_concurrency``
+        控制（默认使用构造函数中的设置）。结果按输入顺序返回；单条对话
+        出错时只打印错误并返回空回复，不影响其它对话。
         """
         if histories is None:
             histories = [None] * len(messages_list)
-        results: List[str] = []
-        all_histories: List[List[Dict[str, Any]]] = []
-        for msg, hist in zip(messages_list, histories):
-            reply, updated = self.chat(msg, verbose=verbose, history=hist, use_tools=use_tools)
-            results.append(reply)
-            all_histories.append(updated)
+        if max_concurrency is None:
+            max_concurrency = self._max_concurrency
+        max_concurrency = max(1, min(int(max_concurrency), len(messages_list) or 1))
+
+        def _safe_chat(msg: str, hist: Optional[List[Dict[str, Any]]]) -> Tuple[str, List[Dict[str, Any]]]:
+            try:
+                return self.chat(
+                    msg, verbose=verbose, history=hist, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json
+                )
+            except Exception as e:
+                print(f"Error in batch chat: {e}")
+                return "", self._build_initial_messages(msg, hist)
+
+        if max_concurrency == 1:
+            outputs = [_safe_chat(msg, hist) for msg, hist in zip(messages_list, histories)]
+        else:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                # executor.map 保证结果顺序与输入一致
+                outputs = list(executor.map(_safe_chat, messages_list, histories))
+
+        results: List[str] = [reply for reply, _ in outputs]
+        all_histories: List[List[Dict[str, Any]]] = [updated for _, updated in outputs]
         return results, all_histories
 
+
+class AsyncToolAgent(ToolAgent):
+    """``ToolAgent`` 的异步版本，基于 ``openai.AsyncOpenAI``。
+
+    工具循环、重复调用检测与 ``strip_think_tags`` 的行为与 ``ToolAgent``
+    完全一致，但 ``chat``/``batch_chat`` 均为协程，可以与 aiohttp 抓取、
+    OCR 等任务在同一个事件循环中交错执行。同步工具函数会放到线程中执行，
+    ``async def`` 工具则直接 await。
+
+    Parameters
+    ----------
+    client:
+        An async OpenAI-compatible client (e.g. ``AsyncOpenAI``) whose
+        ``chat.completions.create`` is awaitable.
+    """
+
+    async def _stream_chat(self, kwargs: Dict[str, Any], m: Dict[str, Any], stop_on_json: bool) -> Any:  # type: ignore[override]
+        assembler = _StreamAssembler(stop_on_json)
+        start = time.perf_counter()
+        stream = await self._client.chat.completions.create(**kwargs, **_STREAM_KWARGS)
+        try:
+            async for chunk in stream:
+                stop = assembler.feed(chunk)
+                if assembler.received_tokens and "ttft_s" not in m:
+                    m["ttft_s"] = time.perf_counter() - start
+                if stop:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+        return self._finish_stream(assembler, m)
+
+    async def _complete_chat(  # type: ignore[override]
+        self,
+        messages: List[Dict[str, Any]],
+        use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
+    ) -> Any:
+        kwargs = self._completion_kwargs(messages, use_tools=use_tools)
+        stream, stop_on_json = self._streaming(stop_on_json)
+        key = self._cache_key(kwargs, use_cache, stop_on_json)
+        with timer("llm", model=self._model_name, stream=stream) as m:
+            response = self._cache_lookup(key)
+            if response is not None:
+                m["cache_hits"] = 1
+                return response
+            if stream:
+                response = await self._stream_chat(kwargs, m, stop_on_json)
+            else:
+                response = await self._client.chat.completions.create(**kwargs)
+            self._record_usage(m, response)
+            self._cache_store(key, response)
+            return response
+
+    async def _execute_tool_calls(self, plan: Sequence[_PlannedCall]) -> List[Any]:  # type: ignore[override]
+        semaphore = asyncio.Semaphore(self._max_tool_workers)
+
+        async def _call(error: Optional[str], name: Optional[str], args: Optional[Dict[str, Any]]) -> Any:
+            if error is not None:
+                return error
+            async with semaphore:
+                return await self._function_tools.acall(name, args)
+
+        return list(await asyncio.gather(*[_call(error, name, args) for _, error, name, args in plan]))
+
+    async def _run_chat_loop(  # type: ignore[override]
+        self,
+        messages: List[Dict[str, Any]],
+        verbose: bool = False,
+        use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        response = await self._complete_chat(messages, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json)
+        call_name_history: List[str] = []
+        current_repeat_count = 0
+        while response.choices[0].finish_reason == "tool_calls":
+            tool_calls = response.choices[0].message.tool_calls
+            if not tool_calls:
+                break
+
+            if verbose:
+                print(f"\nAgent decided to call {len(tool_calls)} function(s):")
+
+            messages.append(self._build_assistant_message(response))
+
+            # 重复检测按顺序进行，通过检测的调用作为并发任务执行
+            plan, current_repeat_count, use_tools = self._plan_tool_calls(
+                tool_calls, call_name_history, current_repeat_count, use_tools, verbose
+            )
+            results = await self._execute_tool_calls(plan)
+            self._append_tool_results(messages, plan, results, verbose)
+
+            response = await self._complete_chat(messages, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json)
+
+        return self._finish(response, messages)
+
+    async def chat(  # type: ignore[override]
+        self,
+        message: str,
+        verbose: bool = False,
+        history: Optional[List[Dict[str, Any]]] = None,
+        use_tools: bool = True,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Single-turn chat with optional history and automatic tool handling."""
+        messages = self._build_initial_messages(message, history)
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"User Message: {message}")
+            print(f"{'='*60}")
+        reply, updated = await self._run_chat_loop(
+            messages, verbose=verbose, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json
+        )
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"Agent Response:\n{reply}")
+            print(f"{'='*60}\n")
+        return reply, updated
+
+    async def batch_chat(  # type: ignore[override]
+        self,
+        messages_list: Sequence[str],
+        histories: Optional[Sequence[Optional[List[Dict[str, Any]]]]] = None,
+        verbose: bool = False,
+        use_tools: bool = True,
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        stop_on_json: Optional[bool] = None,
+    ) -> Tuple[List[str], List[List[Dict[str, Any]]]]:
+        """Run several independent conversations concurrently.
+
+        使用 ``asyncio.Semaphore`` 限制同时进行的对话数量，结果按输入顺序
+        返回；单条对话出错时只打印错误并返回空回复。
+        """
+        if histories is None:
+            histories = [None] * len(messages_list)
+        if max_concurrency is None:
+            max_concurrency = self._max_concurrency
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+        async def _safe_chat(msg: str, hist: Optional[List[Dict[str, Any]]]) -> Tuple[str, List[Dict[str, Any]]]:
+            async with semaphore:
+                try:
+                    return await self.chat(
+                        msg, verbose=verbose, history=hist, use_tools=use_tools, use_cache=use_cache, stop_on_json=stop_on_json
+                    )
+                except Exception as e:
+                    print(f"Error in batch chat: {e}")
+                    return "", self._build_initial_messages(msg, hist)
+
+        outputs = await asyncio.gather(
+            *[_safe_chat(msg, hist) for msg, hist in zip(messages_list, histories)]
+        )
+        results: List[str] = [reply for reply, _ in outputs]
+        all_histories: List[List[Dict[str, Any]]] = [updated for _, updated in outputs]
+        return results, all_histories
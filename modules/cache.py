@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+
+def hash_key(*parts: Any) -> str:
+    """将任意可 JSON 序列化的参数组合成稳定的 SHA-256 缓存键。"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def to_jsonable(obj: Any) -> Any:
+    """把 OpenAI 响应对象（pydantic 模型或 SimpleNamespace）递归转换为普通 dict/list。"""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    if isinstance(obj, dict):
+        return {k: to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if hasattr(obj, '__dict__'):
+        return {k: to_jsonable(v) for k, v in vars(obj).items() if not k.startswith('_')}
+    return obj
+
+
+def to_namespace(data: Any) -> Any:
+    """``to_jsonable`` 的逆操作：dict 转为可以用属性访问的 SimpleNamespace。"""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [to_namespace(v) for v in data]
+    return data
+
+
+# 读取时的 accessed_at 更新先在内存中累积，达到该数量或下一次写入时批量写回
+ACCESS_FLUSH_EVERY = 64
+# 每写入这么多次才扫描一次过期条目，并重新统计条目数与总大小
+PURGE_EVERY = 256
+
+
+class SQLiteCache:
+    """基于 SQLite 的持久化键值缓存，支持 TTL 和 LRU 淘汰。
+
+    条目数和总大小在内存中维护，写入时不需要全表统计；读取不会立即写库，
+    访问时间批量写回（LRU 顺序因此略有延迟）。多个进程共享同一个文件时，
+    计数只在每 ``PURGE_EVERY`` 次写入时与数据库重新同步。
+
+    Parameters
+    ----------
+    path:
+        SQLite 数据库文件路径，所在目录不存在时自动创建。
+    max_entries:
+        最多保留的条目数，超过后按最近访问时间淘汰最旧的条目。``None`` 不限制。
+    max_bytes:
+        所有值序列化后的总大小上限（字节），超过后按 LRU 淘汰。``None`` 不限制。
+    ttl:
+        默认过期时间（秒），``None`` 表示永不过期。``set`` 时可以单独指定。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        # 同一个缓存对象会被线程池中的多个线程共享，用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+        self._conn.commit()
+        # key -> 最近一次读取的时间，尚未写回数据库
+        self._pending_access: Dict[str, float] = {}
+        self._writes = 0
+        self._count, self._total_bytes = self._stats()
+
+    def _stats(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存值；不存在或已过期时返回 ``default``。"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, size, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._delete_row(key, size)
+                self._conn.commit()
+                return default
+            self._pending_access[key] = now
+            if len(self._pending_access) >= ACCESS_FLUSH_EVERY:
+                self._flush_access()
+                self._conn.commit()
+        return pickle.loads(value)
+
+    def __contains__(self, key: str) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值，``ttl`` 为 ``None`` 时使用默认过期时间。"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), len(blob), now, now, expires_at),
+            )
+            self._pending_access.pop(key, None)
+            if old is None:
+                self._count += 1
+                self._total_bytes += len(blob)
+            else:
+                self._total_bytes += len(blob) - old[0]
+            self._flush_access()
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._purge_expired(now)
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._delete_row(key, row[0])
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self._pending_access.clear()
+            self._count, self._total_bytes = 0, 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def _delete_row(self, key: str, size: int) -> None:
+        """删除一个条目并更新计数（调用方持有锁，负责提交）。"""
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._pending_access.pop(key, None)
+        self._count -= 1
+        self._total_bytes -= size
+
+    def _flush_access(self) -> None:
+        """把累积的访问时间写回数据库（调用方持有锁，负责提交）。"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+
+    def _purge_expired(self, now: float) -> None:
+        """删除过期条目，并与数据库重新同步计数（调用方持有锁）。"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._count, self._total_bytes = self._stats()
+
+    def _over_limit(self) -> bool:
+        return ((self.max_entries is not None and self._count > self.max_entries)
+                or (self.max_bytes is not None and self._total_bytes > self.max_bytes))
+
+    def _evict(self, now: float) -> None:
+        """超出数量/大小限制时先删除过期条目，再按 LRU 顺序淘汰（调用方持有锁，访问时间已写回）。"""
+        if not self._over_limit():
+            return
+        self._purge_expired(now)
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC"):
+            if not self._over_limit():
+                break
+            victims.append((key,))
+            self._count -= 1
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pending_access:
+                self._flush_access()
+                self._conn.commit()
+            self._conn.close()
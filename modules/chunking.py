@@ -0,0 +1,152 @@
+import re
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+# 每个分块的默认 token 预算与相邻分块的重叠 token 数
+DEFAULT_CHUNK_TOKENS = 8000
+DEFAULT_OVERLAP_TOKENS = 200
+# 没有 tiktoken 时的近似：CJK 字符按 1 个 token 计，其余字符约 4 个一个 token
+_CJK = re.compile('[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_HEADING = re.compile(r'^#{1,6} ')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+
+_encoders: Dict[Optional[str], Any] = {}
+
+
+def _get_encoder(model: Optional[str]) -> Any:
+    if model not in _encoders:
+        try:
+            import tiktoken
+            try:
+                _encoders[model] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding('cl100k_base')
+            except KeyError:
+                # 非 OpenAI 模型（例如本地 Qwen）没有对应的编码，使用通用编码近似
+                _encoders[model] = tiktoken.get_encoding('cl100k_base')
+        except ImportError:
+            _encoders[model] = None
+    return _encoders[model]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """统计 token 数：安装了 tiktoken 时使用模型的编码，否则按字符类别近似。"""
+    if not text:
+        return 0
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_blocks(text: str) -> List[str]:
+    """按空行切分段落，标题行单独成块。"""
+    blocks = []
+    for paragraph in _BLANK_LINES.split(text):
+        current: List[str] = []
+        for line in paragraph.split('\n'):
+            if _HEADING.match(line) and current:
+                blocks.append('\n'.join(current))
+                current = []
+            current.append(line)
+        if current and '\n'.join(current).strip():
+            blocks.append('\n'.join(current).strip('\n'))
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int, model: Optional[str]) -> List[str]:
+    """超过预算的单个块先按行切分，单行仍然过长时按字符数切分。"""
+    pieces: List[str] = []
+    for line in block.split('\n'):
+        tokens = count_tokens(line, model)
+        if tokens <= max_tokens:
+            pieces.append(line)
+            continue
+        step = max(1, len(line) * max_tokens // tokens)
+        pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+    return pieces
+
+
+def split_markdown(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    model: Optional[str] = None,
+) -> List[str]:
+    """把 markdown 按标题和段落边界切分为不超过 ``max_tokens`` 的分块。
+
+    分块尽量在标题处断开（当前分块已用掉一半预算时遇到标题即换块），
+    相邻分块之间重复前一块末尾不超过 ``overlap_tokens`` 的段落，避免条目
+    被切断在两个分块之间。只有单个段落超过预算时才会在段落内部切分。
+
+    Args:
+        text: markdown 文本
+        max_tokens: 每个分块的 token 上限
+        overlap_tokens: 相邻分块的重叠 token 数，0 表示不重叠
+        model: 用于统计 token 的模型名
+
+    Returns:
+        list: 分块列表；文本为空时返回空列表。
+    """
+    if not text or not text.strip():
+        return []
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+
+    blocks: List[str] = []
+    for block in _split_blocks(text):
+        if count_tokens(block, model) > max_tokens:
+            blocks.extend(_split_oversized(block, max_tokens, model))
+        else:
+            blocks.append(block)
+    sizes = [count_tokens(block, model) + 1 for block in blocks]
+
+    chunks: List[str] = []
+    current: List[int] = []
+    used = 0
+    for i, size in enumerate(sizes):
+        at_heading = bool(_HEADING.match(blocks[i])) and used >= max_tokens // 2
+        if current and (used + size > max_tokens or at_heading):
+            chunks.append('\n\n'.join(blocks[j] for j in current))
+            # 从上一块末尾取重叠段落（不包含整块，保证每次都有进展）
+            overlap: List[int] = []
+            overlap_used = 0
+            for j in reversed(current[1:]):
+                if overlap_used + sizes[j] > overlap_tokens or overlap_used + sizes[j] + size > max_tokens:
+                    break
+                overlap.insert(0, j)
+                overlap_used += sizes[j]
+            current, used = overlap, overlap_used
+        current.append(i)
+        used += size
+    if current:
+        chunks.append('\n\n'.join(blocks[j] for j in current))
+    return chunks
+
+
+def _default_key(item: Any) -> Any:
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, ensure_ascii=False, sort_keys=True)
+    return item
+
+
+def merge_json_results(results: Iterable[Any], key: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+    """合并多个分块的 JSON 解析结果（列表或单个值），按 ``key`` 去重并保持首次出现的顺序。
+
+    Args:
+        results: 每个分块的解析结果，``None`` 会被忽略
+        key: 去重键函数，默认使用条目的规范化 JSON
+    """
+    key = key or _default_key
+    merged: List[Any] = []
+    seen = set()
+    for result in results:
+        if result is None:
+            continue
+        for item in result if isinstance(result, list) else [result]:
+            k = key(item)
+            if k in seen:
+                continue
+            seen.add(k)
+            merged.append(item)
+    return merged
@@ -0,0 +1,173 @@
+import re
+import zlib
+import random
+import unicodedata
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+
+# MinHash/LSH 参数：32 个哈希函数分成 16 个 band，每个 band 2 行
+# （Jaccard 0.5 的条目对约 99% 概率成为候选对）
+NUM_PERM = 32
+BANDS = 16
+_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_title(text: Any) -> str:
+    """标题归一化：全角转半角、小写、去掉标点和空白。"""
+    text = unicodedata.normalize('NFKC', str(text or '')).lower()
+    return _NON_WORD.sub('', text)
+
+
+def char_ngrams(text: str, n: int = 3) -> Set[str]:
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(grams: Set[str]) -> List[int]:
+    hashes = [zlib.crc32(g.encode('utf-8')) for g in grams]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def groups(self) -> List[List[int]]:
+        result: Dict[int, List[int]] = {}
+        for i in range(len(self.parent)):
+            result.setdefault(self.find(i), []).append(i)
+        return list(result.values())
+
+
+def _candidate_pairs(signatures: Sequence[List[int]]) -> Set[Tuple[int, int]]:
+    """LSH：任一 band 完全相同的两条记录成为候选对。"""
+    rows = NUM_PERM // BANDS
+    pairs: Set[Tuple[int, int]] = set()
+    for band in range(BANDS):
+        buckets: Dict[Tuple[int, ...], List[int]] = {}
+        for i, sig in enumerate(signatures):
+            buckets.setdefault(tuple(sig[band * rows:(band + 1) * rows]), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+
+def _representative_key(item: Dict[str, Any]) -> Tuple[int, int, int]:
+    # 优先 paper_body 为 yes，其次 value 更完整，最后 index 更小
+    return (
+        0 if item.get('paper_body') == 'yes' else 1,
+        -len(str(item.get('value') or '')),
+        item['index'],
+    )
+
+
+def cluster_papers(
+    items: Sequence[Dict[str, Any]],
+    high_threshold: float = 0.85,
+    low_threshold: float = 0.5,
+    ngram: int = 3,
+) -> Tuple[List[int], List[List[Dict[str, Any]]]]:
+    """在本地对论文条目聚类去重，只把无法确定的簇留给 LLM。
+
+    只在相同 ``type`` 的条目之间比较。归一化后标题完全相同，或字符 n-gram
+    Jaccard 相似度不低于 ``high_threshold`` 的条目直接合并，保留一个代表条目；
+    相似度介于 ``low_threshold`` 和 ``high_threshold`` 之间的条目组成待定簇。
+    候选对通过 MinHash/LSH 生成，整体耗时近似线性。
+
+    Args:
+        items: 包含 type、value、paper_body、index 字段的字典列表
+        high_threshold: 直接判定为重复的相似度阈值
+        low_threshold: 进入待定簇的最低相似度
+
+    Returns:
+        (kept_indices, ambiguous_groups)：确定保留的条目 index 列表，以及需要
+        LLM 判断的待定簇（每个簇为条目列表）。
+    """
+    kept: List[int] = []
+    ambiguous: List[List[Dict[str, Any]]] = []
+    by_type: Dict[Any, List[Dict[str, Any]]] = {}
+    for item in items:
+        by_type.setdefault(item.get('type'), []).append(item)
+
+    for group in by_type.values():
+        normalized = [normalize_title(item.get('value')) for item in group]
+        grams = [char_ngrams(text, ngram) for text in normalized]
+        sure = _UnionFind(len(group))
+        loose = _UnionFind(len(group))
+
+        # 归一化后完全相同的条目
+        first_seen: Dict[str, int] = {}
+        for i, text in enumerate(normalized):
+            if not text:
+                continue
+            if text in first_seen:
+                sure.union(first_seen[text], i)
+                loose.union(first_seen[text], i)
+            else:
+                first_seen[text] = i
+
+        signatures = [minhash_signature(g) if g else [i] * NUM_PERM for i, g in enumerate(grams)]
+        for a, b in _candidate_pairs(signatures):
+            score = jaccard(grams[a], grams[b])
+            if score >= high_threshold:
+                sure.union(a, b)
+                loose.union(a, b)
+            elif score >= low_threshold:
+                loose.union(a, b)
+
+        for component in loose.groups():
+            # 先在确定重复的子簇内选出代表条目
+            subclusters: Dict[int, List[int]] = {}
+            for i in component:
+                subclusters.setdefault(sure.find(i), []).append(i)
+            representatives = [
+                min((group[i] for i in members), key=_representative_key)
+                for members in subclusters.values()
+            ]
+            # 多个代表条目说明它们之间只有“待定”级别的相似度
+            if len(representatives) > 1:
+                ambiguous.append(sorted(representatives, key=lambda item: item['index']))
+            else:
+                kept.extend(item['index'] for item in representatives)
+
+    return sorted(kept), ambiguous
+
+
+def batch_groups(groups: Sequence[List[Dict[str, Any]]], batch_size: int = 20) -> List[List[Dict[str, Any]]]:
+    """把待定簇打包成不超过 ``batch_size`` 条的批次；超大的簇会被拆开。"""
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    for group in groups:
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            if current and len(current) + len(chunk) > batch_size:
+                batches.append(current)
+                current = []
+            current.extend(chunk)
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,338 @@
+import re
+import codecs
+import random
+import asyncio
+import threading
+import aiohttp
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+DEFAULT_HEADERS = {"User-Agent": "saodiseng (saodiseng@gmail.com)"}
+# 遇到这些状态码时按退避策略重试
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 单个响应体的最大字节数，超出部分丢弃（FetchResult.truncated 为 True）
+MAX_BODY_BYTES = 20 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+# 整个进程内对同一 host 的最大并发请求数。每次 asyncio.run 都会创建新的 Fetcher，
+# 各线程的事件循环之间也无法共享 Fetcher，这个上限在所有 Fetcher 之间共享
+MAX_PER_HOST = 8
+# Retry-After 的最大等待时间（秒），避免服务器返回很大的值时长时间挂起
+MAX_RETRY_AFTER = 60
+
+# 只在文档开头查找 <meta charset> / <?xml encoding>
+_SNIFF_BYTES = 4096
+_META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([A-Za-z0-9_:.-]+)', re.I)
+_XML_ENCODING = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([A-Za-z0-9_:.-]+)', re.I)
+_BOMS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+# GB2312/GBK 都是 GB18030 的子集，页面声明前者却使用扩展字符的情况很常见
+_ENCODING_ALIASES = {"gb2312": "gb18030", "gb_2312-80": "gb18030", "gbk": "gb18030", "x-gbk": "gb18030", "cp936": "gb18030"}
+# 服务器默认值常见的单字节编码：任何字节都能解码成功，优先级排在 <meta> 声明之后
+_WEAK_ENCODINGS = {"iso8859-1", "ascii", "cp1252"}
+
+
+def _normalize_encoding(name) -> Optional[str]:
+    if not name:
+        return None
+    if isinstance(name, bytes):
+        name = name.decode("ascii", errors="ignore")
+    name = name.strip().strip("\"'").lower()
+    name = _ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def _detect_encoding(body: bytes) -> Optional[str]:
+    """用字节级检测器猜测编码：优先 cchardet，其次 charset-normalizer，都未安装时返回 None。"""
+    try:
+        import cchardet
+        return _normalize_encoding(cchardet.detect(body).get("encoding"))
+    except ImportError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(body).best()
+        return _normalize_encoding(best.encoding) if best else None
+    except ImportError:
+        return None
+
+
+def decode_body(body: bytes, declared: Optional[str] = None):
+    """把响应体解码为文本，返回 ``(text, encoding)``。
+
+    依次尝试 BOM、响应头声明的编码、``<meta>``/``<?xml>`` 声明的编码和 UTF-8，
+    取第一个能无错解码的；都失败时使用字节检测器的结果，最后按 UTF-8
+    替换非法字节。响应头声明 ISO-8859-1 等单字节编码时（多为服务器默认值）
+    只在检测器不可用时才采用。正常情况下响应体只被完整解码一次。
+    """
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return body.decode(encoding, errors="replace"), encoding
+
+    head = body[:_SNIFF_BYTES]
+    match = _XML_ENCODING.search(head) or _META_CHARSET.search(head)
+    declared = _normalize_encoding(declared)
+    meta = _normalize_encoding(match.group(1) if match else None)
+    weak = declared if declared in _WEAK_ENCODINGS else None
+    candidates = [meta, "utf-8"] if weak else [declared, meta, "utf-8"]
+    tried = []
+    for encoding in candidates:
+        if not encoding or encoding in tried:
+            continue
+        tried.append(encoding)
+        try:
+            return body.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+
+    encoding = _detect_encoding(body) or weak or tried[0]
+    return body.decode(encoding, errors="replace"), encoding
+
+
+class _HostSlots:
+    """进程内共享的按 host 并发计数，可在不同线程的事件循环中使用。
+
+    ``asyncio.Semaphore`` 绑定单个事件循环，这里用线程锁保护计数，
+    名额已满时以 ``poll_interval`` 为间隔异步等待。
+    """
+
+    def __init__(self, limit: int, poll_interval: float = 0.05) -> None:
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+
+    def try_acquire(self, host: str) -> bool:
+        with self._lock:
+            if self._active.get(host, 0) >= self.limit:
+                return False
+            self._active[host] = self._active.get(host, 0) + 1
+            return True
+
+    async def acquire(self, host: str) -> None:
+        while not self.try_acquire(host):
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self, host: str) -> None:
+        with self._lock:
+            count = self._active.get(host, 0) - 1
+            if count > 0:
+                self._active[host] = count
+            else:
+                self._active.pop(host, None)
+
+
+_host_slots = _HostSlots(MAX_PER_HOST)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    charset: Optional[str] = None
+    # 流式下载到临时文件时，body 为空，内容位于 path，sha256 为下载时计算的摘要
+    path: Optional[str] = None
+    sha256: Optional[str] = None
+    # 响应体超过 max_body_bytes 被截断
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self) -> str:
+        """解码响应体（见 ``decode_body``），并把实际使用的编码记录到 ``charset``。"""
+        text, self.charset = decode_body(self.body, self.charset)
+        return text
+
+
+class Fetcher:
+    """共享的异步 HTTP 抓取器。
+
+    一个 ``Fetcher`` 持有一个长连接池（``aiohttp.ClientSession``），并对每个
+    host 使用独立的信号量限制并发，避免同时向同一个学校网站发出大量请求。
+    连接池和 ``per_host`` 只作用于当前 ``Fetcher``；此外所有 ``Fetcher`` 共享
+    进程级的 ``MAX_PER_HOST`` 上限，多个线程各自 ``asyncio.run`` 时也不会超出。
+    请求带有连接/读取超时，遇到 5xx、429 或网络错误时按指数退避重试。
+
+    使用方式::
+
+        async with Fetcher() as fetcher:
+            result = await fetcher.get(url)
+
+    Parameters
+    ----------
+    max_connections:
+        全局最大连接数。
+    per_host:
+        当前 ``Fetcher`` 对每个 host 同时进行的最大请求数。
+    connect_timeout, read_timeout, total_timeout:
+        连接超时、两次读取之间的超时以及单次请求总超时（秒）。
+    max_retries:
+        失败后的最大重试次数。
+    backoff:
+        退避基数（秒），第 n 次重试等待 ``backoff * 2**n`` 秒加少量抖动。
+    max_body_bytes:
+        ``request``/``get`` 读取的响应体上限（解压后），超出部分丢弃。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        per_host: int = 4,
+        connect_timeout: float = 10,
+        read_timeout: float = 30,
+        total_timeout: float = 120,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        headers: Optional[Dict[str, str]] = None,
+        max_body_bytes: int = MAX_BODY_BYTES,
+    ) -> None:
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, connect=connect_timeout, sock_read=read_timeout
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.max_body_bytes = max_body_bytes
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "Fetcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, headers=self.headers
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _acquire_host(self, url: str) -> str:
+        """占用该 host 的一个名额（当前 Fetcher 的信号量和进程级上限），返回 host。"""
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host)
+        semaphore = self._host_semaphores[host]
+        await semaphore.acquire()
+        try:
+            await _host_slots.acquire(host)
+        except BaseException:
+            semaphore.release()
+            raise
+        return host
+
+    def _release_host(self, host: str) -> None:
+        _host_slots.release(host)
+        self._host_semaphores[host].release()
+
+    async def _read_body(self, response: aiohttp.ClientResponse):
+        """分块读取响应体，最多 ``max_body_bytes`` 字节；返回 ``(body, truncated)``。"""
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            if size + len(chunk) > self.max_body_bytes:
+                chunks.append(chunk[:self.max_body_bytes - size])
+                print(f"Response body of {response.url} exceeds {self.max_body_bytes} bytes, truncated")
+                return b"".join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks), False
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> FetchResult:
+        """发送请求并读取完整响应体，按需重试。
+
+        HTTP 错误以 ``FetchResult.status`` 返回；重试耗尽后的网络错误会抛出异常。
+        """
+        await self.open()
+        attempt = 0
+        while True:
+            try:
+                host = await self._acquire_host(url)
+                try:
+                    async with self._session.request(method, url, headers=headers, **kwargs) as response:  # type: ignore[union-attr]
+                        body, truncated = await self._read_body(response) if method != "HEAD" else (b"", False)
+                        result = FetchResult(
+                            url=str(response.url),
+                            status=response.status,
+                            headers={k.lower(): v for k, v in response.headers.items()},
+                            body=body,
+                            charset=response.charset,
+                            truncated=truncated,
+                        )
+                finally:
+                    self._release_host(host)
+                if result.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return result
+                delay = self._retry_delay(attempt, result.headers.get("retry-after"))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> FetchResult:
+        return await self.request("GET", url, headers=headers, **kwargs)
+
+    async def head(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> FetchResult:
+        return await self.request("HEAD", url, headers=headers, allow_redirects=True, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        """发送 GET 请求并返回尚未读取响应体的 response，用于分块读取大文件。
+
+        重试只发生在开始读取响应体之前；在 ``async with`` 块内读取期间
+        一直占用该 host 的一个并发名额。
+        """
+        await self.open()
+        attempt = 0
+        while True:
+            host = await self._acquire_host(url)
+            try:
+                response = await self._session.get(url, headers=headers, **kwargs)  # type: ignore[union-attr]
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._release_host(host)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+            except BaseException:
+                # 取消等其他异常：归还名额，进程级计数不能泄漏
+                self._release_host(host)
+                raise
+            else:
+                if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                    response.release()
+                    self._release_host(host)
+                else:
+                    try:
+                        yield response
+                    finally:
+                        response.release()
+                        self._release_host(host)
+                    return
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -1,10 +1,57 @@
 
+import os
 import re
 import html
 
 import asyncio
-import aiohttp
-from .pdf_coversion import process_pdf_url, async_process_pdf_url
+import hashlib
+from .cache import SQLiteCache, hash_key
+from .fetcher import Fetcher
+from .metrics import timer
+from .pdf_coversion import process_pdf_url, async_process_pdf_url, async_download_pdf, async_pdf_to_text
+
+
+# 网页缓存：保存原始内容、ETag/Last-Modified 以及转换后的 markdown
+PAGE_CACHE_PATH = "data/cache/pages.sqlite"
+PAGE_CACHE_MAX_BYTES = 1024 ** 3
+# 网页/PDF 转换逻辑的版本，写入缓存键；修改 html_to_markdown 或 PDF 文本抽取后加一，
+# 旧版本转换的 markdown 不再命中（旧条目由 LRU 淘汰）
+CONVERTER_VERSION = 2
+_page_cache = None
+
+
+def get_page_cache():
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = SQLiteCache(PAGE_CACHE_PATH, max_bytes=PAGE_CACHE_MAX_BYTES)
+    return _page_cache
+
+
+def _page_key(url):
+    return hash_key('page', url, CONVERTER_VERSION)
+
+
+def _conditional_headers(entry):
+    """根据缓存条目构造条件请求头。"""
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def _store_page(url, result, markdown, keep_body=True):
+    get_page_cache().set(_page_key(url), {
+        'etag': result.headers.get('etag'),
+        'last_modified': result.headers.get('last-modified'),
+        'charset': result.charset,
+        'body_sha256': result.sha256 or hashlib.sha256(result.body).hexdigest(),
+        # PDF 原文体积大，只保存校验信息和抽取出的文本
+        'body': result.body if keep_body else None,
+        'markdown': markdown,
+    })
 
 
 
@@ -20,37 +67,104 @@ async def _fetch_single_url(url):
     """
     获取单个URL的异步实现
     """
-    async with aiohttp.ClientSession() as session:
-        return await async_fetch_url(session, url)
+    async with Fetcher() as fetcher:
+        return await async_fetch_url(fetcher, url)
 
 
-async def async_fetch_url(session, url):
+async def async_fetch_url(fetcher, url, use_cache=True):
+    """
+    获取单个URL并转换为 markdown。
+
+    启用缓存时会发送 If-None-Match/If-Modified-Since 条件请求：服务器返回
+    304 或内容与缓存一致时，直接使用缓存的 markdown，跳过下载和转换。
+    """
+    entry = get_page_cache().get(_page_key(url)) if use_cache else None
+    headers = _conditional_headers(entry)
     if url.endswith('.pdf'):
         print(f"Processing PDF URL: {url}")
-        # 使用异步PDF处理函数
-        return await async_process_pdf_url(url)
+        with timer('fetch_pdf', url=url) as m:
+            return await _async_fetch_pdf(fetcher, url, entry, headers, use_cache, m)
+    with timer('fetch', url=url) as m:
+        try:
+            result = await fetcher.get(url, headers=headers or None)
+            m['bytes'] = len(result.body)
+            if result.status == 304 and entry:
+                m['cache_hits'] = 1
+                return entry['markdown']
+            if not result.ok:
+                print(f"Error fetching {url}: status {result.status}")
+                m['errors'] = 1
+                return ""
+            if entry and entry.get('body_sha256') == hashlib.sha256(result.body).hexdigest():
+                m['cache_hits'] = 1
+                markdown = entry['markdown']
+            else:
+                markdown = html_to_markdown(result.text())
+            if use_cache:
+                _store_page(url, result, markdown)
+            return markdown
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            m['errors'] = 1
+            return ""
+
+
+async def _async_fetch_pdf(fetcher, url, entry, headers, use_cache, m):
+    if not use_cache:
+        # 使用异步PDF处理函数，复用同一个 fetcher 的连接池与限流
+        return await async_process_pdf_url(url, fetcher=fetcher)
     try:
-        async with session.get(url, headers={"User-Agent": "saodiseng (saodiseng@gmail.com)"}) as response:
-            html_content = await response.text()
-            return html_to_markdown(html_content)
+        result = await async_download_pdf(fetcher, url, headers=headers or None)
+        if result is None:
+            return ""
+        if result.status == 304:
+            m['cache_hits'] = 1
+            return entry['markdown'] if entry else ""
+        m['bytes'] = os.path.getsize(result.path)
+        try:
+            if entry and entry.get('body_sha256') == result.sha256:
+                m['cache_hits'] = 1
+                text = entry['markdown']
+            else:
+                text = await async_pdf_to_text(result.path, url, pdf_digest=result.sha256)
+        finally:
+            os.remove(result.path)
+        if text:
+            _store_page(url, result, text, keep_body=False)
+        return text
     except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        print(f"处理PDF时出错 {url}: {e}")
+        m['errors'] = 1
         return ""
 
-async def async_get_web_contents(urls): 
-    async with aiohttp.ClientSession() as session:
-        tasks = [async_fetch_url(session, url) for url in urls]
+async def async_get_web_contents(urls, fetcher=None, use_cache=True): 
+    """
+    并发获取多个URL的内容，并发度由 ``Fetcher`` 的全局连接池和按 host 的信号量控制。
+
+    Args:
+        urls: URL 列表
+        fetcher: 可选的共享 ``Fetcher``，为 ``None`` 时临时创建一个
+        use_cache: 是否使用网页缓存
+    """
+    if fetcher is None:
+        async with Fetcher() as fetcher:
+            return await async_get_web_contents(urls, fetcher, use_cache)
+    with timer('get_web_contents', urls=len(urls)):
+        tasks = [async_fetch_url(fetcher, url, use_cache) for url in urls]
         responses = await asyncio.gather(*tasks, return_exceptions=True)
-        return responses
+    return responses
 
 
-def get_web_contents(urls):
-    return asyncio.run(async_get_web_contents(urls))
+def get_web_contents(urls, use_cache=True):
+    return asyncio.run(async_get_web_contents(urls, use_cache=use_cache))
 
 
 def html_to_markdown(html_content):
     """
     Convert HTML to clean markdown text, removing images and preserving structure.
+
+    Uses lxml when available (fast path with boilerplate removal), then
+    BeautifulSoup, then a regex fallback.
     
     Args:
         html_content (str): Raw HTML content
@@ -58,6 +172,11 @@ def html_to_markdown(html_content):
     Returns:
         str: Cleaned markdown text
     """
+    try:
+        import lxml.html
+        return _html_to_markdown_lxml(html_content)
+    except ImportError:
+        pass
     try:
         from bs4 import BeautifulSoup
         return _html_to_markdown_bs4(html_content)
@@ -65,6 +184,176 @@ def html_to_markdown(html_content):
         return _html_to_markdown_regex(html_content)
 
 
+# 直接删除的标签
+_REMOVE_TAGS = ['script', 'style', 'img', 'figure', 'sup', 'noscript', 'iframe', 'svg',
+                'button', 'select', 'input', 'textarea']
+# 页面结构中的模板标签；包含正文区域时保留
+_BOILERPLATE_TAGS = ['nav', 'footer', 'aside']
+# class/id 命中这些关键词的区域一定是模板（页脚、面包屑、分享等）
+_BOILERPLATE_ALWAYS = re.compile(
+    r'(?:^|[\s_-])(?:footer|foot|copyright|breadcrumbs?|crumbs?|share|login|weizhi|dqwz)(?:$|[\s_-])', re.I)
+# class/id 命中这些关键词且链接密度较高时视为导航区域（高校 CMS 常见命名）。
+# 师资名单几乎全是链接，不能使用 column、links、side、top 这类泛用词
+_BOILERPLATE_LINKY = re.compile(
+    r'(?:^|[\s_-])(?:nav|navbar|menu|submenu|sidebar|banner|search|topbar|toolbar|header|'
+    r'friendlink|yqlj|daohang)(?:$|[\s_-])', re.I)
+# 正文区域常见的 class/id（含博达 wp_articlecontent、v_news_content 及 TRS_Editor）
+_CONTENT_HINT = re.compile(
+    r'content|article|detail|main|news|text|editor|zhengwen|(?:^|[\s_-])con(?:$|[\s_-])', re.I)
+_LINK_DENSITY_THRESHOLD = 0.3
+_MIN_CONTENT_CHARS = 200
+_BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'table', 'thead', 'tbody', 'tfoot', 'dl', 'dt', 'dd',
+    'blockquote', 'pre', 'center', 'address', 'li', 'td', 'th', 'caption', 'hr',
+}
+_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+_HEADING_SKIP = ['编辑', '[编辑]', '坐标']
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _attr_hint(el):
+    return f"{el.get('class') or ''} {el.get('id') or ''}".strip()
+
+
+def _text_length(el):
+    return len(_WHITESPACE.sub('', el.text_content()))
+
+
+def _link_density(el, length=None):
+    length = _text_length(el) if length is None else length
+    if not length:
+        return 1.0
+    return sum(_text_length(a) for a in el.iter('a')) / length
+
+
+def _remove_boilerplate(root, keep=None):
+    """删除导航、页脚等模板区域；``keep`` 及包含它的元素不会被删除。"""
+    protected = set(keep.iterancestors()) | {keep} if keep is not None else set()
+    for el in list(root.iter(*_BOILERPLATE_TAGS)):
+        if el not in protected and el.getparent() is not None:
+            el.drop_tree()
+    for el in list(root.iter('header', 'div', 'ul', 'ol', 'table', 'section', 'span', 'p', 'dl')):
+        if el in protected or el.getparent() is None:
+            continue
+        hint = _attr_hint(el)
+        if el.tag == 'header':
+            # <header> 既可能是站点导航，也可能包含文章标题，只删除以链接为主的
+            hint = hint or 'header'
+        if not hint:
+            continue
+        if _BOILERPLATE_ALWAYS.search(hint) or (
+                _BOILERPLATE_LINKY.search(hint) and _link_density(el) >= _LINK_DENSITY_THRESHOLD):
+            el.drop_tree()
+
+
+def _find_main_content(root):
+    """选择正文区域：Wikipedia 的 mw-content-text，其次是文字最多的“正文类” class/id 区域。"""
+    wiki = root.get_element_by_id('mw-content-text', None)
+    if wiki is not None:
+        return wiki
+    body = root.find('body')
+    body = body if body is not None else root
+    best, best_length = None, _MIN_CONTENT_CHARS - 1
+    for el in body.iter('div', 'section', 'article', 'main', 'td'):
+        hint = _attr_hint(el)
+        if not hint or not _CONTENT_HINT.search(hint):
+            continue
+        length = _text_length(el)
+        # 要求正文区域覆盖页面大部分文字，避免只选中摘要或侧栏里的小块
+        if length > best_length and _link_density(el, length) < 0.5:
+            best, best_length = el, length
+    if best is not None and best_length >= 0.5 * _text_length(body):
+        return best
+    return body
+
+
+def _inline(text):
+    return _WHITESPACE.sub(' ', text or '')
+
+
+def _emit_list(el, out, depth):
+    for li in el:
+        if li.tag != 'li':
+            continue
+        parts, nested = [li.text or ''], []
+        for child in li:
+            if child.tag in ('ul', 'ol'):
+                nested.append(child)
+            elif isinstance(child.tag, str):
+                parts.append(child.text_content())
+            parts.append(child.tail or '')
+        text = _inline(''.join(parts)).strip()
+        if text:
+            out.append(f"{'  ' * depth}- {text}\n")
+        for child in nested:
+            _emit_list(child, out, depth + 1)
+
+
+def _emit(el, out):
+    """单遍递归输出 markdown 片段；每个节点只访问一次。"""
+    tag = el.tag if isinstance(el.tag, str) else ''
+    if tag in _HEADING_TAGS:
+        text = _inline(el.text_content()).strip()
+        if text and not any(skip in text for skip in _HEADING_SKIP):
+            out.append(f"\n\n{'#' * int(tag[1])} {text}\n\n")
+    elif tag in ('ul', 'ol'):
+        out.append('\n\n')
+        _emit_list(el, out, 0)
+        out.append('\n')
+    elif tag == 'tr' and el.find('.//table') is None:
+        # 数据表格按行输出，单元格之间用 | 分隔；包含嵌套表格的多为布局表格，按块处理
+        cells = [_inline(cell.text_content()).strip() for cell in el if cell.tag in ('td', 'th')]
+        cells = [cell for cell in cells if cell]
+        if cells:
+            out.append(' | '.join(cells) + '\n')
+    elif tag == 'br':
+        out.append('\n')
+    elif tag:
+        block = tag in _BLOCK_TAGS
+        if block:
+            out.append('\n\n')
+        if el.text:
+            out.append(_inline(el.text))
+        for child in el:
+            _emit(child, out)
+        if block:
+            out.append('\n\n')
+    if el.tail:
+        out.append(_inline(el.tail))
+
+
+def _html_to_markdown_lxml(html_content):
+    """Convert HTML to markdown using lxml, keeping only the main content area."""
+    import lxml.html
+    from lxml.etree import ParserError
+
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8', errors='replace')
+    parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+    try:
+        root = lxml.html.document_fromstring(html_content, parser=parser)
+    except ParserError:
+        return ""
+
+    title = _inline(root.findtext('.//title')).strip()
+    for el in list(root.iter('title', 'head', *_REMOVE_TAGS)):
+        el.drop_tree()
+    # 先确定正文区域，删除模板时保护它；去掉模板后页面文字变少，再选一次正文
+    _remove_boilerplate(root, keep=_find_main_content(root))
+    content = _find_main_content(root)
+
+    out = []
+    # 只保留了正文区域时，用页面标题补充上下文（例如“张三-计算机学院”）
+    if title and content.tag != 'body':
+        out.append(f"# {title}\n\n")
+    _emit(content, out)
+    markdown_text = ''.join(out)
+    markdown_text = re.sub(r'[ \t]+\n', '\n', markdown_text)
+    markdown_text = re.sub(r'^[ \t]+(?=[^ \t])(?!- )', '', markdown_text, flags=re.M)
+    markdown_text = re.sub(r'\n{3,}', '\n\n', markdown_text)
+    return markdown_text.strip()
+
+
 def _html_to_markdown_bs4(html_content):
     """Convert HTML to markdown using BeautifulSoup (preferred method)."""
     from bs4 import BeautifulSoup
@@ -83,6 +372,9 @@ def _html_to_markdown_bs4(html_content):
     
     # Process elements
     for element in content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol']):
+        # 列表项内的嵌套列表/段落已包含在外层 li 的文本中，避免重复输出
+        if element.find_parent('li') is not None:
+            continue
         if element.name.startswith('h'):
             # Headers
             level = int(element.name[1])
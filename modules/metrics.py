@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+# 设置该环境变量后，每次调用都会以一行 JSON 追加到对应文件
+METRICS_LOG_ENV = "SAODISENG_METRICS_LOG"
+# 汇总时按阶段累加的计数字段；其余字段（url、tool、model 等）只写入 JSON 日志
+COUNTERS = (
+    "bytes", "urls", "pages", "ocr_pages", "ocr_cache_hits", "cache_hits",
+    "prompt_tokens", "completion_tokens", "tool_calls", "errors", "early_stops",
+)
+# 汇总时按阶段取平均值的延迟字段（秒），例如流式调用的首 token 延迟
+LATENCIES = ("ttft_s",)
+
+
+class Metrics:
+    """按阶段记录耗时和计数的轻量指标收集器（线程安全）。
+
+    每次调用记录为一个事件：``{"ts", "stage", "duration", ...字段}``。配置了
+    ``log_path`` 时事件以 JSON Lines 追加写入；内存中只保留每个阶段的累计值，
+    长时间运行也不会增长。
+
+    使用方式::
+
+        with get_metrics().timer("fetch", url=url) as m:
+            ...
+            m["bytes"] = len(body)
+
+    Parameters
+    ----------
+    log_path:
+        JSON Lines 日志路径，``None`` 表示不写日志。
+    """
+
+    def __init__(self, log_path: Optional[str] = None) -> None:
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._log_file = None
+
+    def record(self, stage: str, duration: float = 0.0, **fields: Any) -> Dict[str, Any]:
+        event = {"ts": time.time(), "stage": stage, "duration": round(duration, 6), **fields}
+        line = json.dumps(event, ensure_ascii=False, default=str) if self.log_path else None
+        with self._lock:
+            stats = self._stats.setdefault(stage, {"calls": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["calls"] += 1
+            stats["total_s"] += duration
+            stats["max_s"] = max(stats["max_s"], duration)
+            for name in COUNTERS:
+                value = fields.get(name)
+                if isinstance(value, (int, float)):
+                    stats[name] = stats.get(name, 0) + value
+            for name in LATENCIES:
+                value = fields.get(name)
+                if isinstance(value, (int, float)):
+                    stats[f"{name}_total"] = stats.get(f"{name}_total", 0.0) + value
+                    stats[f"{name}_n"] = stats.get(f"{name}_n", 0) + 1
+            if line is not None:
+                if self._log_file is None:
+                    directory = os.path.dirname(self.log_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._log_file = open(self.log_path, "a", encoding="utf-8")
+                self._log_file.write(line + "\n")
+                self._log_file.flush()
+        return event
+
+    @contextmanager
+    def timer(self, stage: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """计时一个代码块；块内可以往返回的 dict 中补充字段。抛出异常时记 ``errors=1``。"""
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException:
+            fields["errors"] = fields.get("errors", 0) + 1
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, **fields)
+
+    def summary(self):
+        """每个阶段一行的汇总表：调用次数、总/平均/最大耗时（秒）、各计数字段之和
+        以及延迟字段的平均值（``mean_ttft_s`` 等）。"""
+        import pandas as pd
+
+        with self._lock:
+            rows = [{"stage": stage, **stats} for stage, stats in self._stats.items()]
+        latency_stats = [f"{name}_{suffix}" for name in LATENCIES for suffix in ("total", "n")]
+        df = pd.DataFrame(rows, columns=["stage", "calls", "total_s", "max_s", *COUNTERS, *latency_stats])
+        if df.empty:
+            return df
+        df.insert(3, "mean_s", df["total_s"] / df["calls"])
+        counters = [c for c in COUNTERS if df[c].notna().any()]
+        df[counters] = df[counters].fillna(0).astype(int)
+        latencies = []
+        for name in LATENCIES:
+            if df[f"{name}_n"].notna().any():
+                df[f"mean_{name}"] = df[f"{name}_total"] / df[f"{name}_n"]
+                latencies.append(f"mean_{name}")
+        columns = ["stage", "calls", "total_s", "mean_s", "max_s", *counters, *latencies]
+        return df[columns].sort_values("total_s", ascending=False, ignore_index=True)
+
+    def print_summary(self) -> None:
+        df = self.summary()
+        if df.empty:
+            print("No metrics recorded.")
+        else:
+            print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """返回进程内共享的 ``Metrics``；日志路径取自环境变量 ``SAODISENG_METRICS_LOG``。"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(os.getenv(METRICS_LOG_ENV))
+    return _metrics
+
+
+def timer(stage: str, **fields: Any):
+    return get_metrics().timer(stage, **fields)
@@ -0,0 +1,177 @@
+import os
+import gzip
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from modules.dedup import normalize_title, char_ngrams, jaccard
+
+
+# 本地论文索引的默认位置；文件不存在时 search_papers 直接使用 OpenAlex API
+PAPER_INDEX_PATH = "data/paper_index.sqlite"
+# 本地结果与查询的标题相似度低于该值时视为未命中，回退到 API
+LOCAL_HIT_THRESHOLD = 0.6
+# 构造 FTS 查询时最多使用的 trigram 数量
+MAX_QUERY_TRIGRAMS = 48
+
+
+class PaperIndex:
+    """离线论文索引：SQLite FTS5（trigram 分词）索引归一化标题与作者名。
+
+    可以从 OpenAlex snapshot 或任意 works JSONL（支持 .gz）构建，检索结果
+    与 ``paper_search.parse_work_item`` 的输出格式相同。
+
+    Parameters
+    ----------
+    path:
+        SQLite 数据库路径，不存在时创建。
+    """
+
+    def __init__(self, path: str = PAPER_INDEX_PATH) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS works (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT UNIQUE,
+                norm_title TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_works_norm_title ON works(norm_title);
+            CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+                norm_title, authors, tokenize='trigram'
+            );
+            """
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+    def add_works(self, items: Iterable[Dict[str, Any]], with_abstract: bool = True, batch_size: int = 5000) -> int:
+        """添加 OpenAlex work 原始记录，返回新增的数量。
+
+        默认保存重建后的摘要，使本地结果与 API 结果一致；``with_abstract=False``
+        可以减小索引体积，此时本地命中的 ``abstract`` 为 ``None``。
+        """
+        from modules.paper_search import parse_work_item
+
+        added = 0
+        batch = []
+        for item in items:
+            work = parse_work_item(item)
+            if not work.get("title"):
+                continue
+            if not with_abstract:
+                work["abstract"] = None
+            authors = " ".join(normalize_title(a.get("name")) for a in work["authors"] if a.get("name"))
+            batch.append((item.get("id") or work["title"], normalize_title(work["title"]), authors, json.dumps(work, ensure_ascii=False)))
+            if len(batch) >= batch_size:
+                added += self._insert(batch)
+                batch = []
+        if batch:
+            added += self._insert(batch)
+        return added
+
+    def _insert(self, batch: List[Any]) -> int:
+        added = 0
+        with self._lock:
+            for work_id, norm_title, authors, data in batch:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO works (id, norm_title, data) VALUES (?, ?, ?)",
+                    (work_id, norm_title, data),
+                )
+                if cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT INTO works_fts (rowid, norm_title, authors) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, norm_title, authors),
+                    )
+                    added += 1
+            self._conn.commit()
+        return added
+
+    def build_from_jsonl(self, path: str, with_abstract: bool = True) -> int:
+        """从 JSONL 文件（每行一个 OpenAlex work，可为 .gz）构建索引。"""
+        opener = gzip.open if path.endswith(".gz") else open
+
+        def _iter_items():
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+        return self.add_works(_iter_items(), with_abstract=with_abstract)
+
+    def search(self, query: str, limit: int = 20, author: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按标题检索，结果按与查询的 trigram 相似度从高到低排序。
+
+        Args:
+            query: 论文标题或关键词
+            limit: 返回结果数量
+            author: 可选的作者名，只返回作者列表中包含该名字的论文
+        """
+        norm_query = normalize_title(query)
+        if not norm_query:
+            return []
+        query_grams = char_ngrams(norm_query, 3)
+        norm_author = normalize_title(author) if author else ""
+        # 有作者条件时多取一些候选，在 Python 中按作者过滤
+        candidates = limit * (20 if norm_author else 5)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT w.norm_title, f.authors, w.data FROM works w JOIN works_fts f ON f.rowid = w.rowid "
+                "WHERE w.norm_title = ? LIMIT ?",
+                (norm_query, candidates),
+            ).fetchall()
+            if len(rows) < limit and len(norm_query) >= 3:
+                # 均匀抽取查询中的 trigram，避免长标题生成过长的 MATCH 表达式
+                sequence = [norm_query[i:i + 3] for i in range(len(norm_query) - 2)]
+                step = max(1, len(sequence) // MAX_QUERY_TRIGRAMS)
+                grams = list(dict.fromkeys(sequence[::step]))[:MAX_QUERY_TRIGRAMS]
+                match = "norm_title : (" + " OR ".join(f'"{g}"' for g in grams) + ")"
+                if len(norm_author) >= 3:
+                    # trigram 索引只能匹配不少于 3 个字符的作者名，更短的名字（多数中文名）只在下面过滤
+                    match += f' AND authors : "{norm_author}"'
+                rows += self._conn.execute(
+                    "SELECT w.norm_title, f.authors, w.data FROM works_fts f JOIN works w ON w.rowid = f.rowid "
+                    "WHERE works_fts MATCH ? ORDER BY bm25(works_fts) LIMIT ?",
+                    (match, candidates),
+                ).fetchall()
+        scored = {}
+        for norm_title, authors, data in rows:
+            if norm_author and not any(norm_author in name for name in authors.split()):
+                continue
+            if data not in scored:
+                scored[data] = jaccard(query_grams, char_ngrams(norm_title, 3))
+        ranked = sorted(scored.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [{**json.loads(data), "local_score": score} for data, score in ranked]
+
+    def lookup(self, query: str, limit: int = 20, threshold: float = LOCAL_HIT_THRESHOLD) -> Optional[List[Dict[str, Any]]]:
+        """检索并判断是否命中：最佳结果相似度达到 ``threshold`` 时返回结果，否则返回 ``None``。"""
+        results = self.search(query, limit)
+        if results and results[0]["local_score"] >= threshold:
+            return results
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_paper_index = None
+
+
+def get_paper_index() -> Optional[PaperIndex]:
+    """返回默认位置的本地索引；索引文件不存在时返回 ``None``。"""
+    global _paper_index
+    if _paper_index is None and os.path.exists(PAPER_INDEX_PATH):
+        _paper_index = PaperIndex(PAPER_INDEX_PATH)
+    return _paper_index
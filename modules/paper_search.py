@@ -1,34 +1,195 @@
-
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def fetch_openalex_works(query, per_page=20, page=1, email="youremail@example.com"):
-    """ 查询 OpenAlex works，返回 JSON """
-    url = "https://api.openalex.org/works"
-    params = {
-        "search": query,
-        "per_page": per_page,
-        "page": page,
-        "mailto": email
-    }
-    r = requests.get(url, params=params)
+from modules.paper_index import get_paper_index
+
+OPENALEX_URL = "https://api.openalex.org/works"
+OPENALEX_EMAIL = "youremail@example.com"
+# parse_work_item 及结果核对需要的字段，通过 select= 只请求这些字段
+WORK_FIELDS = ["id", "doi", "display_name", "publication_year", "authorships", "abstract_inverted_index"]
+# OpenAlex 限制每秒最多 10 个请求
+OPENALEX_MAX_RPS = 10
+# OR 过滤条件一次最多 50 个值
+OPENALEX_MAX_OR_VALUES = 50
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class _RateLimiter:
+    """线程安全的简单限速器：保证相邻两次请求间隔不少于 1 / rate 秒。"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_rate_limiter = _RateLimiter(OPENALEX_MAX_RPS)
+
+
+def get_session():
+    """返回共享的 requests.Session（连接池 + 429/5xx 自动重试）。"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.headers.update({"User-Agent": "saodiseng (saodiseng@gmail.com)"})
+    return _session
+
+
+def _openalex_get(params):
+    _rate_limiter.wait()
+    r = get_session().get(OPENALEX_URL, params=params, timeout=30)
     r.raise_for_status()
-    return r.json().get("results", [])
+    return r.json()
+
+
+def _build_params(query=None, filters=None, select=WORK_FIELDS, email=OPENALEX_EMAIL):
+    params = {"mailto": email}
+    if query:
+        params["search"] = query
+    if filters:
+        params["filter"] = filters
+    if select:
+        params["select"] = ",".join(select)
+    return params
+
+
+def fetch_openalex_works(query, per_page=20, page=1, email=OPENALEX_EMAIL, select=WORK_FIELDS, filters=None):
+    """ 查询 OpenAlex works，返回 JSON """
+    params = _build_params(query, filters, select, email)
+    params.update({"per_page": per_page, "page": page})
+    return _openalex_get(params).get("results", [])
+
+
+def iter_openalex_works(query=None, filters=None, per_page=200, max_results=None, email=OPENALEX_EMAIL, select=WORK_FIELDS):
+    """
+    使用 cursor 分页遍历 OpenAlex works（不受 page 分页 10,000 条的限制）。
+
+    Args:
+        query: 搜索关键词
+        filters: OpenAlex filter 字符串，例如 ``"authorships.institutions.id:I123"``
+        per_page: 每页数量，最大 200
+        max_results: 最多返回的结果数，``None`` 表示全部
+    """
+    params = _build_params(query, filters, select, email)
+    params["per_page"] = per_page
+    cursor = "*"
+    count = 0
+    while cursor:
+        params["cursor"] = cursor
+        data = _openalex_get(params)
+        results = data.get("results", [])
+        for item in results:
+            yield item
+            count += 1
+            if max_results is not None and count >= max_results:
+                return
+        if not results:
+            return
+        cursor = data.get("meta", {}).get("next_cursor")
+
+
+def fetch_works_by_doi(dois, email=OPENALEX_EMAIL, select=WORK_FIELDS):
+    """按 DOI 批量查询，每个请求用 OR 过滤条件合并最多 50 个 DOI。"""
+    dois = [d for d in dois if d]
+    works = []
+    for start in range(0, len(dois), OPENALEX_MAX_OR_VALUES):
+        chunk = dois[start:start + OPENALEX_MAX_OR_VALUES]
+        filters = "doi:" + "|".join(chunk)
+        works.extend(iter_openalex_works(filters=filters, per_page=OPENALEX_MAX_OR_VALUES, email=email, select=select))
+    return works
 
 
 def reconstruct_abstract(index_obj):
-    """ 将 OpenAlex abstract_inverted_index 解析为纯文本 """
+    """ 将 OpenAlex abstract_inverted_index 解析为纯文本（线性时间，按位置直接填入预分配的列表） """
     if not index_obj:
         return None
-    words = []
+    length = 1 + max((max(positions) for positions in index_obj.values() if positions), default=-1)
+    words = [None] * length
     for word, positions in index_obj.items():
         for pos in positions:
-            words.append((pos, word))
-    words.sort(key=lambda x: x[0])
-    return " ".join([w[1] for w in words])
+            # 同一位置出现多个词时按出现顺序全部保留（与排序实现的结果一致）
+            words[pos] = word if words[pos] is None else f"{words[pos]} {word}"
+    return " ".join([w for w in words if w is not None])
+
 
+class LazyAbstractWork(dict):
+    """ parse_work_item 的惰性结果：第一次读取摘要时才重建，之后作为普通 key 保存在 dict 中
 
-def parse_work_item(item):
-    """ 从单个 work 项中提取 title, authors, abstract """
+    ``work["abstract"]``、``work.get("abstract")``、``items()``/``keys()``/``values()``
+    （``json.dumps`` 通过 ``items()`` 序列化）都会触发重建，摘要只计算一次。
+    ``dict(work)``、``{**work}`` 等直接复制底层 dict 的操作在重建之前不包含
+    ``"abstract"``，需要普通 dict 时使用 ``materialize()``。
+    """
+
+    def __init__(self, data, index_obj):
+        super().__init__(data)
+        self._index_obj = index_obj
+
+    def _load(self):
+        if not dict.__contains__(self, "abstract"):
+            self["abstract"] = reconstruct_abstract(self._index_obj)
+            self._index_obj = None
+
+    def __missing__(self, key):
+        if key != "abstract":
+            raise KeyError(key)
+        self._load()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key == "abstract" or dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        if key == "abstract":
+            self._load()
+        return dict.get(self, key, default)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def materialize(self):
+        """ 重建摘要并返回普通 dict """
+        self._load()
+        return dict(self)
+
+
+def parse_work_item(item, with_abstract=True):
+    """
+    从单个 work 项中提取 title, authors, abstract
+
+    Args:
+        item: OpenAlex work 记录
+        with_abstract: ``True`` 立即重建摘要；``False`` 跳过（abstract 为 None）；
+            ``"lazy"`` 返回 ``LazyAbstractWork``，第一次读取摘要（包括 JSON
+            序列化）时才重建
+    """
     title = item.get("display_name")
 
     # 处理作者
@@ -46,8 +207,11 @@ def parse_work_item(item):
             "affiliation": aff
         })
 
+    if with_abstract == "lazy":
+        return LazyAbstractWork({"title": title, "authors": authors}, item.get("abstract_inverted_index"))
+
     # 摘要（倒排索引转纯文本）
-    abstract = reconstruct_abstract(item.get("abstract_inverted_index"))
+    abstract = reconstruct_abstract(item.get("abstract_inverted_index")) if with_abstract else None
 
     return {
         "title": title,
@@ -56,14 +220,60 @@ def parse_work_item(item):
     }
 
 
-def search_papers(query, per_page=20, page=1):
-    """ 
-    返回 list of dict，每个 dict 包含 title, authors(list), abstract 
-    
+def _select_fields(with_abstract):
+    if with_abstract:
+        return WORK_FIELDS
+    return [f for f in WORK_FIELDS if f != "abstract_inverted_index"]
+
+
+def search_papers(query, per_page=20, page=1, use_local_index=True, with_abstract=True):
+    """
+    返回 list of dict，每个 dict 包含 title, authors(list), abstract
+
+    如果存在本地论文索引（``paper_index.PAPER_INDEX_PATH``），第一页结果优先从
+    本地查询，只有本地未命中时才调用 OpenAlex API。
+
     Args:
         query: 搜索关键词
         per_page: 每页结果数量，默认20
         page: 页码，默认1
+        use_local_index: 是否优先查询本地索引
+        with_abstract: 是否重建摘要，见 ``parse_work_item``；为 ``False`` 时
+            也不会向 API 请求摘要字段
     """
-    items = fetch_openalex_works(query, per_page, page)
-    return [parse_work_item(it) for it in items]
+    if use_local_index and page == 1:
+        index = get_paper_index()
+        if index is not None:
+            local_results = index.lookup(query, limit=per_page)
+            if local_results is not None:
+                if not with_abstract:
+                    local_results = [{**work, "abstract": None} for work in local_results]
+                return local_results
+    items = fetch_openalex_works(query, per_page, page, select=_select_fields(with_abstract))
+    return [parse_work_item(it, with_abstract=with_abstract) for it in items]
+
+
+def search_papers_bulk(queries, per_page=5, max_workers=8, with_abstract=True):
+    """
+    并发搜索多个标题，共享连接池并遵守 OpenAlex 的速率限制。
+
+    Args:
+        queries: 搜索关键词列表
+        per_page: 每个查询返回的结果数量
+        max_workers: 并发线程数
+        with_abstract: 是否重建摘要，见 ``parse_work_item``
+
+    Returns:
+        list: 与 ``queries`` 顺序一致的结果列表；单个查询失败时对应位置为空列表。
+    """
+    def _search(query):
+        try:
+            return search_papers(query, per_page=per_page, page=1, with_abstract=with_abstract)
+        except Exception as e:
+            print(f"Error searching OpenAlex for {query}: {e}")
+            return []
+
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_search, queries))
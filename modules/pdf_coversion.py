@@ -1,21 +1,125 @@
-import io
+import os
+import hashlib
+import tempfile
 import fitz  # PyMuPDF
-from PIL import Image
-import easyocr
 import numpy as np
-import aiohttp
 import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# 全局OCR读取器（避免重复初始化）
+from .cache import SQLiteCache, hash_key
+from .fetcher import Fetcher, FetchResult
+from .metrics import timer
+
+# OCR 配置
+OCR_LANGS = ['ch_sim', 'en']
+# 服务器没有GPU，默认使用CPU模式；有GPU时设为True（此时不使用进程池）
+OCR_GPU = False
+# CPU模式下的OCR进程数，每个进程各自加载一次 EasyOCR 模型。
+# 默认为1，即在当前进程中识别；进程池使用 spawn 启动，子进程会重新导入入口脚本，
+# 只有入口脚本带有 ``if __name__ == "__main__":`` 保护时才能通过环境变量
+# ``SAODISENG_OCR_WORKERS`` 开启。
+OCR_WORKERS_ENV = "SAODISENG_OCR_WORKERS"
+OCR_WORKERS = max(1, int(os.getenv(OCR_WORKERS_ENV) or 1))
+# 每个任务批量识别的页数（尺寸相同的页面通过 readtext_batched 一起识别）
+OCR_BATCH_SIZE = 4
+# 页面渲染的缩放因子，调低以提高速度
+OCR_ZOOM = 1.5
+# 限制处理页数（避免处理太大的文件）
+MAX_PDF_PAGES = 20
+# 流式下载时每次读取的块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 逐页OCR结果缓存，键为 PDF 内容的 SHA-256 + 页码 + OCR 设置
+OCR_CACHE_PATH = "data/cache/ocr.sqlite"
+
+# 全局OCR读取器（避免重复初始化；在OCR子进程中每个进程一个）
 _ocr_reader = None
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+_ocr_cache = None
+
+
+def get_ocr_cache():
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = SQLiteCache(OCR_CACHE_PATH)
+    return _ocr_cache
 
-def get_ocr_reader():
+
+def _ocr_cache_key(pdf_digest, page_num):
+    return hash_key(pdf_digest, page_num, OCR_LANGS, OCR_ZOOM)
+
+def get_ocr_reader(gpu=None):
     global _ocr_reader
     if _ocr_reader is None:
-        # 初始化EasyOCR读取器，支持中文和英文
-        _ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=True)
+        # 初始化EasyOCR读取器，支持中文和英文；easyocr 会加载 torch，只在需要 OCR 时导入
+        import easyocr
+        _ocr_reader = easyocr.Reader(OCR_LANGS, gpu=OCR_GPU if gpu is None else gpu)
     return _ocr_reader
 
+
+def _init_ocr_worker(langs, torch_threads):
+    """OCR子进程初始化：限制 torch 线程数并加载一次 Reader。"""
+    global _ocr_reader
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    import easyocr
+    _ocr_reader = easyocr.Reader(langs, gpu=False)
+
+
+def get_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // OCR_WORKERS)
+            # 使用 spawn，避免在多线程进程中 fork 带来的死锁
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+                initargs=(OCR_LANGS, torch_threads),
+            )
+    return _ocr_pool
+
+
+def _render_page(doc, page_num, zoom=OCR_ZOOM):
+    """将PDF页面渲染为 numpy 图像（RGB），直接使用像素缓冲，避免 PNG 编解码。"""
+    pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+
+def _recognize_images(reader, images):
+    """识别一组图像，尺寸相同的图像使用 readtext_batched 批量识别。"""
+    results = [None] * len(images)
+    groups = {}
+    for idx, image in enumerate(images):
+        groups.setdefault(image.shape, []).append(idx)
+    for indices in groups.values():
+        if len(indices) > 1:
+            batch = reader.readtext_batched([images[i] for i in indices], detail=0)
+            for i, res in zip(indices, batch):
+                results[i] = res
+        else:
+            results[indices[0]] = reader.readtext(images[indices[0]], detail=0)
+    return ['\n'.join(str(text) for text in res) if res else '' for res in results]
+
+
+def _ocr_pages(pdf_source, page_nums, zoom=OCR_ZOOM):
+    """渲染并识别指定页面，返回 {页码: 文本}。可在OCR子进程中运行。"""
+    doc = _open_pdf(pdf_source)
+    try:
+        images = [_render_page(doc, page_num, zoom) for page_num in page_nums]
+    finally:
+        doc.close()
+    texts = _recognize_images(get_ocr_reader(), images)
+    return dict(zip(page_nums, texts))
+
+
 def process_pdf_url(url, size_limit_mb=10):
     """
     下载PDF文件并使用OCR转换为文本（同步接口）
@@ -31,108 +135,216 @@ def process_pdf_url(url, size_limit_mb=10):
     return asyncio.run(async_process_pdf_url(url, size_limit_mb))
 
 
-async def async_process_pdf_url(url, size_limit_mb=10):
+async def async_process_pdf_url(url, size_limit_mb=10, fetcher=None):
     """
     异步下载PDF文件并使用OCR转换为文本
     
     Args:
         url (str): PDF文件的URL
         size_limit_mb (int): 文件大小限制（MB）
+        fetcher (Fetcher): 可选的共享抓取器，为 ``None`` 时临时创建一个
         
     Returns:
         str: 提取的文本内容
     """
+    if fetcher is None:
+        async with Fetcher() as fetcher:
+            return await async_process_pdf_url(url, size_limit_mb, fetcher)
     try:
-        headers = {"User-Agent": "saodiseng (saodiseng@gmail.com)"}
-        
-        async with aiohttp.ClientSession() as session:
-            # 先发HEAD请求检查文件大小
-            print(f"正在检查PDF文件: {url}")
-            async with session.head(url, headers=headers, allow_redirects=True) as head_response:
-                if head_response.status != 200:
-                    print(f"无法访问文件，状态码: {head_response.status}")
-                    return ""
-                
-                # 检查文件大小
-                content_length = head_response.headers.get('content-length')
-                if content_length:
-                    size_mb = int(content_length) / (1024 * 1024)
-                    print(f"文件大小: {size_mb:.2f}MB")
-                    if size_mb > size_limit_mb:
-                        print(f"文件太大 ({size_mb:.2f}MB)，超过限制 ({size_limit_mb}MB)")
-                        return ""
-                else:
-                    print("无法获取文件大小信息")
-            
-            # 下载PDF文件
-            print(f"正在下载PDF: {url}")
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    print(f"下载失败，状态码: {response.status}")
-                    return ""
-                
-                # 读取PDF内容到内存
-                pdf_content = await response.read()
-                print(f"PDF下载完成，大小: {len(pdf_content) / 1024 / 1024:.2f}MB")
-        
-        # PDF处理部分仍然是同步的，但在线程池中运行
-        return await asyncio.to_thread(_process_pdf_content, pdf_content, url)
+        response = await async_download_pdf(fetcher, url, size_limit_mb)
+        if response is None or response.status != 200:
+            return ""
+        try:
+            return await async_pdf_to_text(response.path, url, pdf_digest=response.sha256)
+        finally:
+            os.remove(response.path)
         
     except Exception as e:
         print(f"处理PDF时出错 {url}: {e}")
         return ""
 
 
-def _process_pdf_content(pdf_content, url):
+async def async_download_pdf(fetcher, url, size_limit_mb=10, headers=None):
+    """
+    以单个 GET 请求流式下载PDF文件到临时文件。
+
+    先根据 Content-Length 检查大小；服务器没有返回 Content-Length 时，
+    边下载边计数，一旦超过 ``size_limit_mb`` 立即中止。下载过程中同时
+    计算 SHA-256，内存占用与文件大小无关。
+
+    Args:
+        fetcher (Fetcher): 共享抓取器
+        url (str): PDF文件的URL
+        size_limit_mb (int): 文件大小限制（MB）
+        headers (dict): 额外的请求头（例如条件请求的 If-None-Match）
+
+    Returns:
+        FetchResult | None: 下载结果，``path`` 为临时文件路径（由调用方负责删除），
+        ``sha256`` 为内容摘要；状态码为 304 时表示内容未变化，不会创建临时文件。
+        无法访问或文件超过大小限制时返回 ``None``。
+    """
+    size_limit = size_limit_mb * 1024 * 1024
+    print(f"正在下载PDF: {url}")
+    async with fetcher.stream(url, headers=headers) as response:
+        result_headers = {k.lower(): v for k, v in response.headers.items()}
+        if response.status == 304:
+            return FetchResult(url=str(response.url), status=304, headers=result_headers)
+        if response.status != 200:
+            print(f"下载失败，状态码: {response.status}")
+            return None
+        
+        # 检查文件大小
+        content_length = result_headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > size_limit:
+            print(f"文件太大 ({int(content_length) / 1024 / 1024:.2f}MB)，超过限制 ({size_limit_mb}MB)")
+            return None
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > size_limit:
+                        print(f"文件太大，超过限制 ({size_limit_mb}MB)，已中止下载")
+                        os.remove(path)
+                        return None
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+    
+    print(f"PDF下载完成，大小: {size / 1024 / 1024:.2f}MB")
+    return FetchResult(
+        url=str(response.url),
+        status=200,
+        headers=result_headers,
+        path=path,
+        sha256=digest.hexdigest(),
+    )
+
+
+async def async_pdf_to_text(pdf_source, url, pdf_digest=None):
+    """
+    将PDF内容转换为文本。PDF处理部分是同步的，在线程池中运行。
+
+    Args:
+        pdf_source (bytes | str): PDF内容或PDF文件路径
+        url (str): PDF文件的URL
+        pdf_digest (str): 可选的内容 SHA-256，已知时避免重复计算
+    """
+    return await asyncio.to_thread(_process_pdf_content, pdf_source, url, pdf_digest=pdf_digest)
+
+
+def _open_pdf(pdf_source):
+    """打开PDF：``bytes`` 从内存打开，``str`` 视为文件路径。"""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source, filetype="pdf")
+
+
+def _pdf_digest(pdf_source):
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return hashlib.sha256(pdf_source).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf_source, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _process_pdf_content(pdf_source, url, max_pages=MAX_PDF_PAGES, workers=None, use_cache=True, pdf_digest=None):
     """
     处理PDF内容（用于在线程池中运行）
+
+    有文本层的页面直接提取文本；其余页面按 ``OCR_BATCH_SIZE`` 分批，
+    CPU 模式下交给OCR进程池并行渲染和识别。每批识别完成后立即写入
+    OCR缓存，同一份PDF（无论来自哪个URL）已识别的页面不会再次OCR，
+    中断后也能从未完成的页面继续。
+
+    Args:
+        pdf_source (bytes | str): PDF内容或PDF文件路径（传路径时OCR子进程直接读文件，
+            无需在进程间复制整个PDF）
+        url (str): PDF文件的URL
+        max_pages (int): 最多处理的页数
+        workers (int): OCR进程数，默认 ``OCR_WORKERS``；为1或使用GPU时在当前进程中识别
+        use_cache (bool): 是否使用OCR缓存
+        pdf_digest (str): 可选的内容 SHA-256
     """
+    with timer('pdf', url=url) as m:
+        return _process_pdf_pages(pdf_source, url, max_pages, workers, use_cache, pdf_digest, m)
+
+
+def _process_pdf_pages(pdf_source, url, max_pages, workers, use_cache, pdf_digest, m):
     try:
         # 使用PyMuPDF打开PDF
-        doc = fitz.open(stream=pdf_content, filetype="pdf")
-        text_content = ""
-        
-        # 限制处理页数（避免处理太大的文件）
-        max_pages = 20
+        doc = _open_pdf(pdf_source)
         total_pages = min(len(doc), max_pages)
+        m['pages'] = total_pages
         
         print(f"开始OCR处理，共 {total_pages} 页")
         
+        page_texts = {}
+        ocr_page_nums = []
         for page_num in range(total_pages):
-            page = doc[page_num]
-            
             # 首先尝试提取文本（如果PDF包含文本）
-            text = page.get_text()
+            text = doc[page_num].get_text()
             if isinstance(text, str) and text.strip():
+                page_texts[page_num] = text
+            else:
+                ocr_page_nums.append(page_num)
+        doc.close()
+        
+        # 如果没有文本，则使用OCR（优先读取缓存）
+        ocr_texts = {}
+        if ocr_page_nums and use_cache:
+            pdf_digest = pdf_digest or _pdf_digest(pdf_source)
+            cache = get_ocr_cache()
+            for page_num in ocr_page_nums:
+                cached = cache.get(_ocr_cache_key(pdf_digest, page_num))
+                if cached is not None:
+                    ocr_texts[page_num] = cached
+            ocr_page_nums = [n for n in ocr_page_nums if n not in ocr_texts]
+            if ocr_texts:
+                print(f"OCR缓存命中 {len(ocr_texts)} 页")
+                m['ocr_cache_hits'] = len(ocr_texts)
+
+        def _collect(batch_texts):
+            ocr_texts.update(batch_texts)
+            if use_cache:
+                for page_num, text in batch_texts.items():
+                    cache.set(_ocr_cache_key(pdf_digest, page_num), text)
+
+        if ocr_page_nums:
+            print(f"正在OCR {len(ocr_page_nums)} 页...")
+            m['ocr_pages'] = len(ocr_page_nums)
+            batches = [ocr_page_nums[i:i + OCR_BATCH_SIZE] for i in range(0, len(ocr_page_nums), OCR_BATCH_SIZE)]
+            workers = OCR_WORKERS if workers is None else workers
+            if OCR_GPU or workers <= 1:
+                for batch in batches:
+                    _collect(_ocr_pages(pdf_source, batch))
+            else:
+                pool = get_ocr_pool()
+                futures = [pool.submit(_ocr_pages, pdf_source, batch) for batch in batches]
+                for future in as_completed(futures):
+                    _collect(future.result())
+        
+        text_content = ""
+        for page_num in range(total_pages):
+            if page_num in page_texts:
                 text_content += f"\n--- 第 {page_num + 1} 页 ---\n"
-                text_content += text
-                continue
-            
-            # 如果没有文本，则使用OCR
-            print(f"正在OCR第 {page_num + 1} 页...")
-            
-            # 将PDF页面转换为图像（较低分辨率以提高速度）
-            mat = fitz.Matrix(1.5, 1.5)  # 缩放因子，调低以提高速度
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            
-            # 转换为PIL图像然后转为numpy数组（EasyOCR需要）
-            image = Image.open(io.BytesIO(img_data))
-            image_np = np.array(image)
-            
-            # 使用EasyOCR进行文字识别
-            reader = get_ocr_reader()
-            results = reader.readtext(image_np, detail=0)
-            ocr_text = '\n'.join(str(text) for text in results) if results else ''
-            
-            if ocr_text.strip():
+                text_content += page_texts[page_num]
+            elif ocr_texts.get(page_num, "").strip():
                 text_content += f"\n--- 第 {page_num + 1} 页 (OCR) ---\n"
-                text_content += ocr_text
+                text_content += ocr_texts[page_num]
         
-        doc.close()
         print(f"PDF处理完成，提取文本长度: {len(text_content)} 字符")
         return text_content.strip()
         
     except Exception as e:
         print(f"处理PDF内容时出错: {e}")
-        return ""
\ No newline at end of file
+        m['errors'] = 1
+        return ""
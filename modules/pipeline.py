@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, List, Optional
+
+from modules.saodiseng import retrieve_professors, retrieve_professor_papers
+
+
+STAGES = ('school', 'department', 'professor')
+DEFAULT_WORKERS = {'school': 1, 'department': 2, 'professor': 4}
+
+
+class TaskCheckpoint:
+    """某个任务的阶段性结果，dict-like 接口，持久化在工作队列数据库中。
+
+    传给 ``retrieve_professor_papers`` 的 ``checkpoint`` 参数，使教授任务
+    中断后可以跳过已经完成的抽取/去重/确认阶段。
+    """
+
+    def __init__(self, pipeline: "CrawlPipeline", task_id: int) -> None:
+        self._pipeline = pipeline
+        self._task_id = task_id
+
+    def __contains__(self, step: str) -> bool:
+        return self._pipeline._load_checkpoint(self._task_id, step) is not None
+
+    def __getitem__(self, step: str) -> Any:
+        data = self._pipeline._load_checkpoint(self._task_id, step)
+        if data is None:
+            raise KeyError(step)
+        return data
+
+    def __setitem__(self, step: str, value: Any) -> None:
+        self._pipeline._save_checkpoint(self._task_id, step, value)
+
+
+class CrawlPipeline:
+    """学校 → 学院 → 教授 三级爬取流程，基于 SQLite 持久化工作队列。
+
+    - school 任务：读取 ``output/schools/{school}.json``（由 scripts/s1_2_parse_departments.py
+      生成）中的学院列表，为每个学院创建 department 任务。
+    - department 任务：调用 ``retrieve_professors`` 获取教授名单，为每位教授创建 professor 任务。
+    - professor 任务：调用 ``retrieve_professor_papers``，各阶段结果写入检查点。
+
+    每个任务的状态（pending/running/done/failed）记录在数据库中。进程崩溃后重新
+    ``run`` 时，未完成的 running 任务会重新排队，已完成的任务和阶段不会重复执行。
+
+    Parameters
+    ----------
+    agent:
+        ``ToolAgent`` 实例，在所有工作线程间共享。
+    db_path:
+        工作队列数据库路径。
+    workers:
+        每个阶段的并发数，例如 ``{'department': 2, 'professor': 8}``；未指定的阶段使用默认值。
+    max_attempts:
+        单个任务的最大尝试次数，超过后标记为 failed。
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        db_path: str = 'data/pipeline.sqlite',
+        workers: Optional[Dict[str, int]] = None,
+        max_attempts: int = 2,
+        departments_dir: str = 'output/schools',
+    ) -> None:
+        self.agent = agent
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.max_attempts = max_attempts
+        self.departments_dir = departments_dir
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                school TEXT NOT NULL,
+                department TEXT NOT NULL DEFAULT '',
+                professor TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL,
+                UNIQUE (stage, school, department, professor)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_stage_status ON tasks(stage, status);
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                task_id INTEGER NOT NULL,
+                step TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (task_id, step)
+            );
+            """
+        )
+        self._conn.commit()
+
+    ##############################################
+    ## Queue operations
+    ##############################################
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> List[Any]:
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+            self._conn.commit()
+        return rows
+
+    def enqueue(self, stage: str, school: str, department: str = '', professor: str = '') -> None:
+        """添加任务；相同的任务已经存在时忽略。"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}'.")
+        self._execute(
+            "INSERT OR IGNORE INTO tasks (stage, school, department, professor, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (stage, school, department, professor, time.time()),
+        )
+
+    def add_schools(self, school_names: Iterable[str]) -> None:
+        for school_name in school_names:
+            self.enqueue('school', school_name)
+
+    def _claim(self, stage: str, limit: int) -> List[Any]:
+        if limit <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, school, department, professor FROM tasks "
+                "WHERE stage = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                (stage, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(time.time(), row[0]) for row in rows],
+            )
+            self._conn.commit()
+        return rows
+
+    def _finish(self, task_id: int, error: Optional[str] = None) -> None:
+        if error is None:
+            self._execute(
+                "UPDATE tasks SET status = 'done', error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), task_id),
+            )
+            return
+        # 未达到最大尝试次数时重新排队
+        self._execute(
+            "UPDATE tasks SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "error = ?, updated_at = ? WHERE id = ?",
+            (self.max_attempts, error, time.time(), task_id),
+        )
+
+    def _load_checkpoint(self, task_id: int, step: str) -> Any:
+        rows = self._execute("SELECT data FROM checkpoints WHERE task_id = ? AND step = ?", (task_id, step))
+        return json.loads(rows[0][0]) if rows else None
+
+    def _save_checkpoint(self, task_id: int, step: str, data: Any) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO checkpoints (task_id, step, data) VALUES (?, ?, ?)",
+            (task_id, step, json.dumps(data, ensure_ascii=False, default=str)),
+        )
+
+    def recover(self) -> None:
+        """将上次中断时仍处于 running 状态的任务重新排队。"""
+        self._execute("UPDATE tasks SET status = 'pending' WHERE status = 'running'")
+
+    def retry_failed(self, stage: Optional[str] = None) -> None:
+        """将失败的任务重新排队（重置尝试次数）。"""
+        if stage is None:
+            self._execute("UPDATE tasks SET status = 'pending', attempts = 0 WHERE status = 'failed'")
+        else:
+            self._execute(
+                "UPDATE tasks SET status = 'pending', attempts = 0 WHERE status = 'failed' AND stage = ?",
+                (stage,),
+            )
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        """按阶段统计各状态的任务数量。"""
+        summary: Dict[str, Dict[str, int]] = {stage: {} for stage in STAGES}
+        for stage, status, count in self._execute(
+            "SELECT stage, status, COUNT(*) FROM tasks GROUP BY stage, status"
+        ):
+            summary.setdefault(stage, {})[status] = count
+        return summary
+
+    ##############################################
+    ## Stage handlers
+    ##############################################
+    def _run_school(self, task_id: int, school: str, department: str, professor: str) -> None:
+        filepath = os.path.join(self.departments_dir, f"{school.replace('/', '_')}.json")
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Department list not found: {filepath}")
+        with open(filepath, 'r', encoding='utf-8') as f:
+            departments = json.load(f)
+        for department_name in departments:
+            self.enqueue('department', school, department_name)
+
+    def _run_department(self, task_id: int, school: str, department: str, professor: str) -> None:
+        professor_list = retrieve_professors(self.agent, school, department)
+        for professor_name in professor_list.get('name', []):
+            self.enqueue('professor', school, department, professor_name)
+
+    def _run_professor(self, task_id: int, school: str, department: str, professor: str) -> None:
+        retrieve_professor_papers(self.agent, school, department, professor, checkpoint=TaskCheckpoint(self, task_id))
+
+    def _run_task(self, stage: str, row: Any) -> None:
+        task_id, school, department, professor = row
+        handler = getattr(self, f'_run_{stage}')
+        try:
+            handler(task_id, school, department, professor)
+        except Exception as e:
+            print(f"Task failed [{stage}] {school} {department} {professor}: {e}")
+            self._finish(task_id, error=repr(e))
+        else:
+            self._finish(task_id)
+
+    ##############################################
+    ## Scheduler
+    ##############################################
+    def run(self, poll_interval: float = 1.0) -> Dict[str, Dict[str, int]]:
+        """运行直到队列中没有待处理任务，返回各阶段的状态统计。"""
+        self.recover()
+        executors = {stage: ThreadPoolExecutor(max_workers=max(1, self.workers[stage])) for stage in STAGES}
+        in_flight: Dict[str, set] = {stage: set() for stage in STAGES}
+        try:
+            while True:
+                for stage in STAGES:
+                    free = max(1, self.workers[stage]) - len(in_flight[stage])
+                    for row in self._claim(stage, free):
+                        in_flight[stage].add(executors[stage].submit(self._run_task, stage, row))
+                running = set().union(*in_flight.values())
+                if not running:
+                    break
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for stage in STAGES:
+                    in_flight[stage] -= done
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+        return self.status()
@@ -0,0 +1,103 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from modules.chunking import count_tokens
+
+
+# 提示词目录，相对于代码位置解析，不依赖当前工作目录
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class PromptTemplate:
+    """预编译的提示词模板。
+
+    加载时把模板按 ``{name}`` 占位符切分成片段，渲染时单次拼接：替换进去的
+    内容不会被再次扫描（网页中出现的 ``{content}`` 等文本保持原样）。
+
+    Parameters
+    ----------
+    name:
+        模板名（文件名去掉 ``.txt``）。
+    text:
+        模板内容。
+    """
+
+    def __init__(self, name: str, text: str) -> None:
+        self.name = name
+        self.text = text
+        # 偶数位置为普通文本，奇数位置为占位符名
+        self._parts = _PLACEHOLDER.split(text)
+        self.placeholders = frozenset(self._parts[1::2])
+        self._base_tokens: Dict[Optional[str], int] = {}
+
+    def render(self, **values) -> str:
+        """填入所有占位符；缺少任何一个占位符的值时抛出 ``KeyError``。"""
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing values for {sorted(missing)}")
+        parts = self._parts.copy()
+        for i in range(1, len(parts), 2):
+            parts[i] = str(values[parts[i]])
+        return "".join(parts)
+
+    def base_tokens(self, model: Optional[str] = None) -> int:
+        """去掉占位符后模板本身的 token 数，用于预留上下文预算。"""
+        if model not in self._base_tokens:
+            self._base_tokens[model] = count_tokens("".join(self._parts[0::2]), model)
+        return self._base_tokens[model]
+
+
+class PromptRegistry:
+    """从 ``directory`` 一次性加载所有 ``*.txt`` 模板。
+
+    Parameters
+    ----------
+    directory:
+        模板目录，默认是仓库中的 prompts/。
+    """
+
+    def __init__(self, directory: str = PROMPT_DIR) -> None:
+        self.directory = directory
+        self._templates: Dict[str, PromptTemplate] = {}
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                    name = filename[:-len(".txt")]
+                    self._templates[name] = PromptTemplate(name, f.read())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+    def get(self, name: str) -> PromptTemplate:
+        if name not in self._templates:
+            raise KeyError(f"Unknown prompt '{name}', available: {self.names}")
+        return self._templates[name]
+
+    def render(self, name: str, /, **values) -> str:
+        return self.get(name).render(**values)
+
+    def render_with_tokens(self, name: str, /, model: Optional[str] = None, **values) -> Tuple[str, int]:
+        """渲染模板并返回 ``(prompt, token 数)``。"""
+        prompt = self.get(name).render(**values)
+        return prompt, count_tokens(prompt, model)
+
+
+_prompts = None
+
+
+def get_prompts() -> PromptRegistry:
+    global _prompts
+    if _prompts is None:
+        _prompts = PromptRegistry()
+    return _prompts
+
+
+def render_prompt(name: str, /, **values) -> str:
+    """使用默认模板目录渲染提示词。"""
+    return get_prompts().render(name, **values)
@@ -0,0 +1,115 @@
+import re
+from typing import List, Optional, Tuple
+
+
+# 论文特征：DOI、年份、卷期页码、期刊/会议/收录关键词
+PAPER_PATTERNS = [
+    re.compile(r'\b10\.\d{4,9}/\S+'),
+    re.compile(r'(?<!\d)(?:19[89]\d|20[0-4]\d)(?!\d)'),
+    re.compile(r'\b(?:Vol|No|pp)\.\s*\d+|\d+\s*[(（]\d+[)）]\s*[:：]\s*\d+', re.I),
+    re.compile(r'\b(?:SCI|SSCI|EI|CSSCI|IEEE|ACM|Elsevier|Springer|Journal|Transactions|Proceedings|'
+               r'Conference|Letters|Review|Materials|Nature|Science)\b', re.I),
+    re.compile(r'学报|期刊|杂志|论文|发表|会议|核心|收录|第一作者|通讯作者|影响因子|专利|著作'),
+]
+# 名字出现在网页开头（标题/页头）时视为教授本人的主页，保留全文
+HEAD_CHARS = 500
+# 名字前后保留的字符数
+WINDOW_BEFORE = 500
+WINDOW_AFTER = 1500
+# 通过筛选需要命中的论文特征种类数
+MIN_PAPER_SIGNALS = 2
+
+
+def name_pattern(name: str) -> Optional[re.Pattern]:
+    """
+    匹配教授姓名的正则：中文名允许字间有空白（例如“郭　伟”）；安装了
+    pypinyin 时同时匹配拼音写法（Guo Wei / Wei Guo / W. Guo）。
+    """
+    name = re.sub(r'\s+', '', name or '')
+    if not name:
+        return None
+    alternatives = [r'\s*'.join(re.escape(ch) for ch in name)]
+    try:
+        from pypinyin import lazy_pinyin
+        syllables = lazy_pinyin(name)
+        if len(syllables) >= 2 and syllables != [name]:
+            surname, given = syllables[0], ''.join(syllables[1:])
+            sep = r'[\s,.-]*'
+            alternatives += [
+                rf'\b{surname}{sep}{given}\b',
+                rf'\b{given}{sep}{surname}\b',
+                rf'\b{given[0]}\.?{sep}{surname}\b',
+            ]
+    except ImportError:
+        pass
+    return re.compile('|'.join(alternatives), re.I)
+
+
+def find_name_spans(text: str, name: str) -> List[Tuple[int, int]]:
+    pattern = name_pattern(name)
+    if pattern is None or not text:
+        return []
+    return [m.span() for m in pattern.finditer(text)]
+
+
+def paper_signal_count(text: str) -> int:
+    """命中的论文特征种类数（0 ~ len(PAPER_PATTERNS)）。"""
+    return sum(1 for pattern in PAPER_PATTERNS if pattern.search(text))
+
+
+def _merge_windows(spans, length, before, after):
+    windows: List[List[int]] = []
+    for start, end in spans:
+        lo, hi = max(0, start - before), min(length, end + after)
+        if windows and lo <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], hi)
+        else:
+            windows.append([lo, hi])
+    return windows
+
+
+def extract_relevant_text(
+    text: str,
+    professor_name: str,
+    before: int = WINDOW_BEFORE,
+    after: int = WINDOW_AFTER,
+    min_signals: int = MIN_PAPER_SIGNALS,
+    head_chars: int = HEAD_CHARS,
+) -> str:
+    """
+    在调用 LLM 之前对网页做本地筛选。
+
+    网页中没有出现教授姓名，或保留的内容中论文特征不足 ``min_signals`` 种时
+    返回空字符串（跳过该网页）。姓名出现在网页开头 ``head_chars`` 个字符内时
+    视为教授主页，保留全文；否则只保留每次出现位置前 ``before``、后 ``after``
+    个字符的窗口（扩展到整行，重叠窗口合并），窗口之间用 ``...`` 分隔。
+
+    Args:
+        text: 网页 markdown
+        professor_name: 教授姓名
+
+    Returns:
+        str: 保留的文本，不相关时为空字符串。
+    """
+    if not text:
+        return ''
+    spans = find_name_spans(text, professor_name)
+    if not spans:
+        return ''
+    if spans[0][0] < head_chars:
+        relevant = text
+    else:
+        pieces = []
+        for lo, hi in _merge_windows(spans, len(text), before, after):
+            # 扩展到行边界，避免把条目切成两半
+            lo = text.rfind('\n', 0, lo) + 1
+            newline = text.find('\n', hi)
+            hi = len(text) if newline == -1 else newline
+            if pieces and lo <= pieces[-1][1]:
+                pieces[-1][1] = max(pieces[-1][1], hi)
+            else:
+                pieces.append([lo, hi])
+        relevant = '\n...\n'.join(text[lo:hi].strip() for lo, hi in pieces)
+    if paper_signal_count(relevant) < min_signals:
+        return ''
+    return relevant
@@ -1,27 +1,47 @@
-import os
-import json
+import pandas as pd
 from modules.saodiseng_core import get_professor_papers, get_professor_list, deduplicate_papers, confirm_professor_papers
+from modules.verifier import verify_papers
+from modules.storage import write_partition
 
 
 
 
+def _run_step(checkpoint, step, fn):
+    """执行一个阶段；``checkpoint`` 中已有该阶段结果时直接复用。"""
+    if checkpoint is not None and step in checkpoint:
+        return pd.DataFrame(checkpoint[step])
+    df = fn()
+    if checkpoint is not None:
+        checkpoint[step] = df.to_dict(orient='records')
+    return df
 
 
+def retrieve_professors(agent, school_name, department_name):
+    """获取学院的教授名单，保存到结果库的 professors 表（见 ``modules.storage``）。"""
+    professor_list = get_professor_list(agent, school_name, department_name)
+    write_partition('professors', professor_list.assign(department=department_name), school_name, key=(department_name,))
+    return professor_list
 
 
-def retrieve_professor_papers(agent, school_name, department_name, professor_name):
-    if not os.path.exists('data/professors'):
-        os.makedirs('data/professors')
-    professor_papers = get_professor_papers(agent, school_name, department_name, professor_name)
-    
-    dedup_papers = deduplicate_papers(agent, professor_papers)
-    
-    confirm_df = confirm_professor_papers(agent, school_name, department_name, professor_name, dedup_papers)
+def retrieve_professor_papers(agent, school_name, department_name, professor_name, checkpoint=None):
+    """
+    抽取、去重、确认并核对教授的论文，结果保存到结果库的 papers 表（见 ``modules.storage``）。
 
-    data = confirm_df.to_dict(orient='records')
-    filepath = f'data/professors/{school_name}_{department_name}_{professor_name}.json'
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, separators=(',', ': '))
-    
-    return confirm_df
+    Args:
+        checkpoint: 可选的 dict-like 对象（阶段名 -> 记录列表）。已完成的阶段
+            （papers/dedup/confirm/verify）会从中读取，新完成的阶段会写入，用于中断后恢复。
+    """
+    professor_papers = _run_step(checkpoint, 'papers', lambda: get_professor_papers(agent, school_name, department_name, professor_name))
+
+    dedup_papers = _run_step(checkpoint, 'dedup', lambda: deduplicate_papers(agent, professor_papers))
+
+    confirm_df = _run_step(checkpoint, 'confirm', lambda: confirm_professor_papers(agent, school_name, department_name, professor_name, dedup_papers))
+
+    verify_df = _run_step(checkpoint, 'verify', lambda: verify_papers(confirm_df, professor_name))
+
+    write_partition(
+        'papers', verify_df.assign(department=department_name, professor=professor_name),
+        school_name, key=(department_name, professor_name),
+    )
+
+    return verify_df
@@ -7,25 +7,66 @@ import pandas as pd
 from modules.utils import json_list_to_list, combine_list_items
 from modules.web_search import search_web_serper
 from modules.html_conversion import get_web_contents
-
-
-
-def get_professor_list(agent, school_name, department_name, verbose=True):
+from modules.dedup import cluster_papers, batch_groups
+from modules.chunking import split_markdown, merge_json_results, DEFAULT_CHUNK_TOKENS
+from modules.relevance import extract_relevant_text
+from modules.prompts import get_prompts
+
+
+def _chunk_contents(agent, contents, chunk_tokens):
+    """
+    把每个网页按 token 预算切分为分块。
+
+    Returns:
+        (chunks, owners)：分块列表，以及每个分块所属网页在 ``contents`` 中的下标。
+    """
+    chunks, owners = [], []
+    for i, content in enumerate(contents):
+        for chunk in split_markdown(content, max_tokens=chunk_tokens, model=agent.model_name):
+            chunks.append(chunk)
+            owners.append(i)
+    return chunks, owners
+
+
+def _render_chunk_prompts(agent, template_name, chunks, verbose=True, **values):
+    """用同一模板为每个分块渲染提示词（分块填入 ``{content}``），并报告 token 数。"""
+    registry = get_prompts()
+    model = agent.model_name
+    prompts, tokens = [], []
+    for chunk in chunks:
+        prompt, num_tokens = registry.render_with_tokens(template_name, model=model, content=chunk, **values)
+        prompts.append(prompt)
+        tokens.append(num_tokens)
+    if verbose and prompts:
+        print(f"{template_name}: {len(prompts)} prompts, {sum(tokens)} tokens (max {max(tokens)})")
+    return prompts
+
+
+def _merge_chunk_responses(responses, owners, num_contents, key=None):
+    """把分块的 LLM 输出按所属网页合并，重叠区域重复抽取的条目只保留一次。"""
+    parsed = [[] for _ in range(num_contents)]
+    for owner, response in zip(owners, responses):
+        try:
+            parsed[owner].append(parse_json(response) or [])
+        except ValueError as e:
+            print(f"Failed to parse chunk response: {e}")
+    return [merge_json_results(results, key=key) for results in parsed]
+
+
+
+def get_professor_list(agent, school_name, department_name, verbose=True, chunk_tokens=DEFAULT_CHUNK_TOKENS):
     serper_result = search_web_serper(f"{school_name} {department_name} 师资 教授")
     links = [item['link'] for item in serper_result]
 
     # request web contents
     department_contents = get_web_contents(links)
 
+    chunks, owners = _chunk_contents(agent, department_contents, chunk_tokens)
+    prompt_list = _render_chunk_prompts(agent, 'extract_professor', chunks, verbose, school=f"学校：{school_name} 学院：{department_name}")
 
-    with open('prompts/extract_professor.txt', 'r', encoding='utf-8') as f:
-        professor_template = f.read()
-
-    prompt_list = [professor_template.replace("{school}", f"学校：{school_name} 学院：{department_name}").replace("{content}", department_contents[i]) for i in range(len(department_contents))]
+    responses, histories = agent.batch_chat(prompt_list, verbose=verbose, use_tools=False, stop_on_json=True)
 
-    responses, histories = agent.batch_chat(prompt_list, verbose=verbose, use_tools=False)
-
-    professor_list = [parse_json(response) for response in responses]
+    professor_list = _merge_chunk_responses(responses, owners, len(department_contents))
     professor_dict = {}
     for i, professors in enumerate(professor_list):
         for professor in professors:
@@ -44,22 +85,33 @@ def get_professor_list(agent, school_name, department_name, verbose=True):
 ##############################################
 ## Get professor papers
 ##############################################
-def get_professor_papers(agent, school_name, department_name, professor_name, result_num=20, verbose=True, content_size = 40000):
+def get_professor_papers(agent, school_name, department_name, professor_name, result_num=20, verbose=True, chunk_tokens=DEFAULT_CHUNK_TOKENS, prefilter=True):
+    """
+    搜索教授相关网页并抽取论文。长网页按 ``chunk_tokens`` 切分为带重叠的
+    分块分别抽取，再按网页合并去重，不再截断网页内容。
+
+    ``prefilter`` 为 True 时先在本地筛选网页（见 ``relevance.extract_relevant_text``）：
+    没有提到教授或没有论文特征的网页不交给 LLM，其余网页只保留姓名附近的内容。
+    """
     serper_result = search_web_serper(f"{school_name} {department_name} {professor_name} 论文", result_num=result_num)
 
     links = [item['link'] for item in serper_result]
 
     web_contents = get_web_contents(links)
-    web_contents = [content[:content_size] for content in web_contents]
-
-    with open('prompts/extract_paper.txt', 'r', encoding='utf-8') as f:
-        paper_template = f.read()
-
-    paper_prompt_list = [paper_template.replace("{content}", web_contents[i]).replace("{person}", f"学校：{school_name} 学院：{department_name} 教授：{professor_name}") for i in range(len(web_contents))]
-
-    responses, histories = agent.batch_chat(paper_prompt_list, verbose=verbose, use_tools=False)
-
-    paper_list = [parse_json(response) for response in responses]
+    if prefilter:
+        web_contents = [extract_relevant_text(content, professor_name) for content in web_contents]
+        if verbose:
+            print(f"Relevance filter kept {sum(1 for c in web_contents if c)}/{len(web_contents)} pages")
+    chunks, owners = _chunk_contents(agent, web_contents, chunk_tokens)
+    paper_prompt_list = _render_chunk_prompts(agent, 'extract_paper', chunks, verbose, person=f"学校：{school_name} 学院：{department_name} 教授：{professor_name}")
+
+    responses, histories = agent.batch_chat(paper_prompt_list, verbose=verbose, use_tools=False, stop_on_json=True)
+
+    # 同一网页的分块结果合并；重叠区域的同一条目只保留一次
+    paper_list = _merge_chunk_responses(
+        responses, owners, len(web_contents),
+        key=lambda item: (item.get('type'), item.get('value')) if isinstance(item, dict) else item,
+    )
     # add source_index to each achievement
     for idx, achievement_sublist in enumerate(paper_list):
         for achievement in achievement_sublist:
@@ -78,21 +130,38 @@ def get_professor_papers(agent, school_name, department_name, professor_name, re
     return paper_list_df
 
 
-def deduplicate_papers(agent, paper_list_df, verbose=True):
-    with open('prompts/dedup_paper.txt', 'r', encoding='utf-8') as f:
-        dedup_paper_template = f.read()
-    
+def deduplicate_papers(agent, paper_list_df, verbose=True, batch_size=20):
+    """
+    论文去重：先在本地按归一化标题和字符 n-gram 相似度聚类，
+    只有相似度不确定的簇才分批交给 LLM 判断。
+    """
+    dedup_paper_template = get_prompts().get('dedup_paper')
+
     paper_list = paper_list_df.to_dict(orient='records')
     paper_list = [{**item, 'index': idx} for idx, item in enumerate(paper_list)]
     
     paper_list_copy = [
         {'type': item['type'], 'value': item['value'], 'paper_body': item['paper_body'], 'index': item['index']} for item in paper_list
         ]
-    paper_prompt = dedup_paper_template.replace("{content}", json.dumps(paper_list_copy, ensure_ascii=False))
-
-    dedup_response, history = agent.chat(paper_prompt, verbose=verbose, use_tools=False)
-
-    dedup_papers = parse_json(dedup_response)
+    kept_indices, ambiguous_groups = cluster_papers(paper_list_copy)
+
+    batches = batch_groups(ambiguous_groups, batch_size=batch_size)
+    if batches:
+        paper_prompts = [dedup_paper_template.render(content=json.dumps(batch, ensure_ascii=False)) for batch in batches]
+        dedup_responses, histories = agent.batch_chat(paper_prompts, verbose=verbose, use_tools=False)
+        for batch, dedup_response in zip(batches, dedup_responses):
+            batch_indices = {item['index'] for item in batch}
+            try:
+                response_list = parse_json(dedup_response) or []
+            except ValueError as e:
+                # 对话失败时 batch_chat 返回空字符串
+                print(f"Failed to parse dedup response: {e}")
+                response_list = []
+            response_indices = {item.get('index') for item in response_list if isinstance(item, dict)} & batch_indices
+            # LLM 没有返回有效结果时保守处理，保留整个批次
+            kept_indices.extend(response_indices or batch_indices)
+
+    dedup_papers = [paper_list_copy[i] for i in sorted(set(kept_indices))]
     dedup_papers = combine_list_items(dedup_papers, paper_list)
     dedup_papers_df = pd.DataFrame(dedup_papers)
     dedup_papers_df.drop(columns=['index'], inplace=True, errors='ignore')
@@ -105,16 +174,15 @@ def deduplicate_papers(agent, paper_list_df, verbose=True):
 ## confirm the achievements
 ##############################################
 def confirm_professor_papers(agent, school_name, department_name, professor_name, dedup_papers_df, verbose=True):
-    with open('prompts/confirm_professor_papers.txt', 'r', encoding='utf-8') as f:
-        confirm_professor_papers_template = f.read()
-
-    
     dedup_papers = dedup_papers_df.to_dict(orient='records')
     dedup_papers = [{**item, 'index': idx} for idx, item in enumerate(dedup_papers)]
     
     # copy dedup_achievements and keep only type and value keys
     dedup_papers_copy = [{'type': item['type'], 'value': item['value'], 'index': item['index']} for item in dedup_papers]
-    confirm_paper_prompt = confirm_professor_papers_template.replace("{professor_name}", professor_name).replace("{department}", department_name).replace("{school}", school_name).replace("{papers}", str(dedup_papers_copy))
+    confirm_paper_prompt = get_prompts().render(
+        'confirm_professor_papers',
+        professor_name=professor_name, department=department_name, school=school_name, papers=str(dedup_papers_copy),
+    )
 
     confirm_response, history = agent.chat(confirm_paper_prompt, verbose=verbose)
 
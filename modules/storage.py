@@ -0,0 +1,135 @@
+import os
+import re
+import glob
+import json
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from modules.cache import hash_key
+
+
+# 结果库目录：{STORE_DIR}/{table}/school={school}-{hash}/part-*.parquet
+STORE_DIR = "data/store"
+# professors：教授名单；papers：抽取、去重、确认后的论文及核对结果（verify_* 列）
+TABLES = ("professors", "papers")
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|=]')
+
+
+def _partition_name(school: str) -> str:
+    # 文件名中的非法字符替换为 "_"，再加上原始名字的短哈希，避免 "A/B" 与 "A_B" 落到同一目录
+    return f"school={_UNSAFE_CHARS.sub('_', str(school))}-{hash_key('school', school)[:8]}"
+
+
+def _table_files(table: str, school: Optional[str] = None, root: str = STORE_DIR) -> List[str]:
+    partition = _partition_name(school) if school is not None else "school=*"
+    return sorted(glob.glob(os.path.join(root, table, partition, "*.parquet")))
+
+
+def _to_arrow(df: pd.DataFrame):
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # object 列中混有不同类型（例如 LLM 输出的字符串和数字）时统一转为字符串
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].map(
+                lambda v: v if v is None or isinstance(v, str)
+                else json.dumps(v, ensure_ascii=False, default=str)
+            )
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_partition(table: str, df: pd.DataFrame, school: str, key: Iterable[str], root: str = STORE_DIR) -> str:
+    """
+    把 ``df`` 写为 ``table`` 表中 ``school`` 分区下的一个 Parquet part 文件。
+
+    part 文件名由 ``key``（例如学院名、教授名）决定：同一个 key 重新写入时原子地
+    替换旧文件，不会产生重复行。写入先落到同目录的临时文件，再用 ``os.replace``
+    改名，读取方不会看到写了一半的文件。
+
+    Args:
+        table: 表名，见 ``TABLES``
+        df: 要写入的数据，会自动加上 ``school`` 列
+        school: 学校名（分区）
+        key: 该 part 文件在分区内的唯一键
+
+    Returns:
+        str: part 文件路径
+    """
+    import pyarrow.parquet as pq
+
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}'.")
+    directory = os.path.join(root, table, _partition_name(school))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{hash_key(table, school, *key)[:16]}.parquet")
+
+    df = df.drop(columns=["school"], errors="ignore")
+    df.insert(0, "school", school)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        pq.write_table(_to_arrow(df), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def load_table(table: str, school: Optional[str] = None, root: str = STORE_DIR) -> pd.DataFrame:
+    """读取整张表（或某个学校的分区）为 DataFrame；各 part 文件的列按名字合并。"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    files = _table_files(table, school, root)
+    if not files:
+        return pd.DataFrame()
+    try:
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files], promote_options="permissive")
+        return ds.dataset(files, schema=schema, format="parquet").to_table().to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # 同名列类型无法合并时逐个读取
+        return pd.concat([pq.read_table(f).to_pandas() for f in files], ignore_index=True)
+
+
+def query(sql: str, root: str = STORE_DIR) -> pd.DataFrame:
+    """
+    在结果库上执行 SQL，表名见 ``TABLES``，例如::
+
+        query("SELECT school, AVG(verify_status = 'not_found') AS unverified "
+              "FROM papers GROUP BY school")
+
+    安装了 duckdb 时直接扫描 Parquet 文件；否则把各表读入内存中的 SQLite 再查询。
+    目录名只用于分区，``school`` 列取自文件内容（duckdb 不按 hive 目录推断列）。
+    """
+    try:
+        import duckdb
+    except ImportError:
+        duckdb = None
+
+    if duckdb is not None:
+        con = duckdb.connect()
+        try:
+            for table in TABLES:
+                if _table_files(table, root=root):
+                    pattern = os.path.join(root, table, "school=*", "*.parquet").replace("'", "''")
+                    con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{pattern}', union_by_name=true, hive_partitioning=false)")
+            return con.execute(sql).df()
+        finally:
+            con.close()
+
+    con = sqlite3.connect(":memory:")
+    try:
+        for table in TABLES:
+            df = load_table(table, root=root)
+            if not df.empty:
+                df.to_sql(table, con, index=False)
+        return pd.read_sql_query(sql, con)
+    finally:
+        con.close()
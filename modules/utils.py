@@ -2,6 +2,10 @@ from llm_output_parser import parse_json
 import json
 
 from modules.paper_search import search_papers
+from modules.FunctionTools import cached_tool
+
+# 论文检索结果变化很慢，工具结果缓存 30 天
+SEARCH_PAPERS_TOOL_TTL = 30 * 24 * 3600
 
 def json_list_to_list(json_list_str: str) -> list:
     list_of_list = [parse_json(response) for response in json_list_str]
@@ -9,6 +13,7 @@ def json_list_to_list(json_list_str: str) -> list:
     dedup_list = list(set(list_item)) 
     return dedup_list
 
+@cached_tool(ttl=SEARCH_PAPERS_TOOL_TTL)
 def search_papers_tool(query: str) -> list:
     """搜索学术论文， 返回标题，作者信息，摘要。
 
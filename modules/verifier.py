@@ -0,0 +1,144 @@
+import difflib
+
+from modules.dedup import normalize_title
+from modules.paper_search import search_papers_bulk
+
+
+# 标题相似度不低于该值且作者匹配时判定为 found
+FOUND_THRESHOLD = 0.9
+# 标题相似度低于该值时判定为 not_found，介于两者之间为 ambiguous
+AMBIGUOUS_THRESHOLD = 0.7
+# 候选排序时各核对结果的优先级
+_STATUS_RANK = {"found": 2, "ambiguous": 1, "not_found": 0}
+
+
+def _ratio(a, b):
+    """归一化编辑相似度（0~1）：安装了 rapidfuzz 时使用其 C 实现，否则回退到 difflib。"""
+    try:
+        from rapidfuzz import fuzz
+        return fuzz.ratio(a, b) / 100
+    except ImportError:
+        return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def _sorted_tokens(text):
+    return " ".join(sorted(filter(None, (normalize_title(t) for t in str(text).split()))))
+
+
+def title_similarity(a, b):
+    """
+    标题相似度（0~1）：归一化标题的编辑相似度与 token 排序后的编辑相似度取较大值。
+
+    token 排序只消除词序差异，不像 token-set 那样把子集视为完全匹配，
+    因此短标题或泛泛的标题（例如 "Deep Learning"）不会与长标题得到高分。
+    两个后端使用相同的规则。
+    """
+    norm_a, norm_b = normalize_title(a), normalize_title(b)
+    if not norm_a or not norm_b:
+        return 0.0
+    return max(_ratio(norm_a, norm_b), _ratio(_sorted_tokens(a), _sorted_tokens(b)))
+
+
+def name_variants(name):
+    """
+    作者名的归一化形式集合。中文名在安装了 pypinyin 时额外生成
+    拼音形式（姓在前和名在前两种，例如 郭伟 -> guowei / weiguo），以及
+    名字缩写形式（W. Guo / Guo W. -> wguo / guow；郭小明 -> xmguo / guoxm）。
+    """
+    variants = {normalize_title(name)}
+    try:
+        from pypinyin import lazy_pinyin
+        syllables = lazy_pinyin(name)
+        if len(syllables) >= 2 and syllables != [name]:
+            surname, given = syllables[0], syllables[1:]
+            variants.add(surname + "".join(given))
+            variants.add("".join(given) + surname)
+            initials = {given[0][0], "".join(s[0] for s in given)}
+            for initial in initials:
+                variants.add(initial + surname)
+                variants.add(surname + initial)
+    except ImportError:
+        pass
+    variants.discard("")
+    return variants
+
+
+def author_matches(professor_name, authors):
+    """判断 ``parse_work_item`` 输出的作者列表中是否包含该教授。"""
+    variants = name_variants(professor_name)
+    for author in authors or []:
+        if normalize_title(author.get("name")) in variants:
+            return True
+    return False
+
+
+def score_candidates(title, professor_name, candidates,
+                     found_threshold=FOUND_THRESHOLD, ambiguous_threshold=AMBIGUOUS_THRESHOLD):
+    """
+    在候选论文中选出最佳匹配：先按候选会得到的核对结果（found > ambiguous >
+    not_found）排序，再按标题相似度和作者匹配排序。这样标题稍差但作者匹配的
+    候选（例如 0.92）优先于标题更接近但作者不匹配的候选（例如 0.95）。
+
+    Returns:
+        (score, author_match, matched_title)
+    """
+    best, best_key = (0.0, False, None), None
+    for candidate in candidates:
+        score = title_similarity(title, candidate.get("title"))
+        matched = author_matches(professor_name, candidate.get("authors"))
+        status = classify(score, matched, found_threshold, ambiguous_threshold)
+        key = (_STATUS_RANK[status], score, matched)
+        if best_key is None or key > best_key:
+            best, best_key = (score, matched, candidate.get("title")), key
+    return best
+
+
+def classify(score, author_match, found_threshold=FOUND_THRESHOLD, ambiguous_threshold=AMBIGUOUS_THRESHOLD):
+    if score >= found_threshold and author_match:
+        return "found"
+    if score >= ambiguous_threshold:
+        return "ambiguous"
+    return "not_found"
+
+
+def verify_papers(confirm_df, professor_name, per_query=5, max_workers=8,
+                  found_threshold=FOUND_THRESHOLD, ambiguous_threshold=AMBIGUOUS_THRESHOLD):
+    """
+    核对确认后的论文是否真实存在。
+
+    对 ``type`` 为“论文”的条目批量检索（本地索引优先，其次 OpenAlex），按标题
+    相似度和作者名匹配打分，输出 found / not_found / ambiguous。只有 ambiguous
+    的条目需要再交给 LLM（例如通过 ``search_papers_tool``）判断；“关键词”
+    条目标记为 skipped。
+
+    Args:
+        confirm_df: ``confirm_professor_papers`` 的输出
+        professor_name: 教授姓名
+        per_query: 每个标题检索的候选数量
+        max_workers: 并发检索的线程数
+
+    Returns:
+        DataFrame: 在输入基础上增加 verify_status、verify_score、
+        verify_author_match、matched_title 四列。
+    """
+    df = confirm_df.copy()
+    df['verify_status'] = 'skipped'
+    df['verify_score'] = None
+    df['verify_author_match'] = None
+    df['matched_title'] = None
+    if df.empty or 'type' not in df.columns:
+        return df
+
+    paper_rows = df.index[df['type'] == '论文'].tolist()
+    titles = [str(df.at[i, 'value']) for i in paper_rows]
+    # 核对只需要标题和作者，不请求也不重建摘要
+    results = search_papers_bulk(titles, per_page=per_query, max_workers=max_workers, with_abstract=False)
+    for row, title, candidates in zip(paper_rows, titles, results):
+        score, matched, matched_title = score_candidates(
+            title, professor_name, candidates, found_threshold, ambiguous_threshold
+        )
+        df.at[row, 'verify_status'] = classify(score, matched, found_threshold, ambiguous_threshold)
+        df.at[row, 'verify_score'] = round(score, 4)
+        df.at[row, 'verify_author_match'] = matched
+        df.at[row, 'matched_title'] = matched_title
+    return df
@@ -1,45 +1,143 @@
-
-import requests
 import json
 import os
+import math
+import asyncio
+import threading
+import aiohttp
 from llm_output_parser import parse_json
 
+from modules.cache import SQLiteCache, hash_key
+from modules.metrics import timer
+
+
+SERPER_URL = "https://google.serper.dev/search"
+# Serper 每页固定返回 10 条结果
+SERPER_PAGE_SIZE = 10
+# 搜索结果缓存（懒加载，避免 import 时创建文件）
+SERPER_CACHE_PATH = "data/cache/serper.sqlite"
+SERPER_CACHE_TTL = 7 * 24 * 3600
+_serper_cache = None
+# 同步接口共用一个后台事件循环和其中的长连接 ClientSession，
+# 多次调用（包括来自不同线程的调用）之间复用 keep-alive 连接
+_serper_loop = None
+_serper_loop_lock = threading.Lock()
+_serper_session = None
 
 
+def get_serper_cache():
+    global _serper_cache
+    if _serper_cache is None:
+        _serper_cache = SQLiteCache(SERPER_CACHE_PATH, ttl=SERPER_CACHE_TTL)
+    return _serper_cache
 
-def _search_web_serper(keyword: str, page = 1) -> str:
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({
+
+def _serper_payload(keyword: str, page: int) -> dict:
+    return {
       "q": keyword,
       "gl": "cn",
       "location": "China",
       "hl": "zh-cn",
       "page": page
-    })
-    headers = {
-      'X-API-KEY': os.getenv("SERPER_KEY"),
-      'Content-Type': 'application/json'
     }
 
-    serper_response = requests.request("POST", url, headers=headers, data=payload)
-    return parse_json(serper_response.text)
 
-def search_web_serper(key: str, result_num = 10) -> list:
+async def _async_search_web_serper(session, keyword: str, page = 1, use_cache = True) -> dict:
+    payload = _serper_payload(keyword, page)
+    key = hash_key(payload)
+    with timer('serper', query=keyword, page=str(page)) as m:
+        if use_cache:
+            cached = get_serper_cache().get(key)
+            if cached is not None:
+                m['cache_hits'] = 1
+                return cached
+
+        headers = {
+          'X-API-KEY': os.getenv("SERPER_KEY"),
+          'Content-Type': 'application/json'
+        }
+        async with session.post(SERPER_URL, headers=headers, data=json.dumps(payload)) as serper_response:
+            status = serper_response.status
+            text = await serper_response.text()
+        m['bytes'] = len(text.encode('utf-8'))
+        if status != 200:
+            print(f"Serper request failed for {keyword!r} page {page}: status {status}")
+            m['errors'] = 1
+            return {}
+        try:
+            response = parse_json(text) or {}
+        except ValueError as e:
+            print(f"Failed to parse Serper response for {keyword!r} page {page}: {e}")
+            m['errors'] = 1
+            return {}
+
+        # 只缓存成功的结果，避免把配额错误等写入缓存
+        if use_cache and 'organic' in response:
+            get_serper_cache().set(key, response)
+        return response
+
+
+async def async_search_web_serper(session, key: str, result_num = 10, use_cache = True) -> list:
     """
-    使用 SerperAPI 在网络上搜索。
+    使用 SerperAPI 异步搜索，所需的多页结果并发请求。
 
     Args:
+        session: 复用的 ``aiohttp.ClientSession``（keep-alive 连接池）
         key: 搜索关键词
         result_num: 需要返回的结果数量，默认为10
+        use_cache: 是否使用磁盘缓存（按 query + page 缓存，带 TTL）
     """
     results = []
     page = 1
     while len(results) < result_num:
-        response = _search_web_serper(key, page)
-        if 'organic' in response:
+        n_pages = math.ceil((result_num - len(results)) / SERPER_PAGE_SIZE)
+        pages = range(page, page + n_pages)
+        responses = await asyncio.gather(
+            *[_async_search_web_serper(session, key, p, use_cache) for p in pages]
+        )
+        exhausted = False
+        for response in responses:
+            # 与逐页请求的语义保持一致：某页没有结果时不再使用后续页
+            if not response.get('organic'):
+                exhausted = True
+                break
             results.extend(response['organic'])
-        else:
+        if exhausted:
             break
-        page += 1
+        page += n_pages
+
+    return results
+
 
-    return results
\ No newline at end of file
+def _get_serper_loop():
+    global _serper_loop
+    with _serper_loop_lock:
+        if _serper_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="serper-loop", daemon=True).start()
+            _serper_loop = loop
+    return _serper_loop
+
+
+async def _search_web_serper_shared(key: str, result_num = 10, use_cache = True) -> list:
+    # 只在后台事件循环中运行，检查和创建之间没有 await，不需要加锁
+    global _serper_session
+    if _serper_session is None or _serper_session.closed:
+        _serper_session = aiohttp.ClientSession()
+    return await async_search_web_serper(_serper_session, key, result_num, use_cache)
+
+
+def search_web_serper(key: str, result_num = 10, use_cache = True) -> list:
+    """
+    使用 SerperAPI 在网络上搜索。请求在共享的后台事件循环中执行，
+    所有调用复用同一个 ``aiohttp.ClientSession``；已经在事件循环中的
+    调用方应直接使用 ``async_search_web_serper`` 并传入自己的 session。
+
+    Args:
+        key: 搜索关键词
+        result_num: 需要返回的结果数量，默认为10
+        use_cache: 是否使用磁盘缓存
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        _search_web_serper_shared(key, result_num, use_cache), _get_serper_loop()
+    )
+    return future.result()
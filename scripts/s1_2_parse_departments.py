@@ -3,8 +3,10 @@ from tqdm import tqdm
 from llm_output_parser import parse_json
 import json
 import os
+from modules.chunking import split_markdown, merge_json_results
+from modules.prompts import render_prompt
 
-context_char = 20000
+chunk_tokens = 8000
 with open('llm.py') as f:
     exec(f.read())
 
@@ -14,14 +16,10 @@ with open('scripts/agent_func.py') as f:
 
 df = pd.read_feather('output/school_wiki.feather')
 
-# prompts/department_extract.txt
-with open('prompts/department_extract.txt', 'r', encoding='utf-8') as f:
-    department_extract_tmp = f.read()
-
 
 if False:
     row0 = df.iloc[0]
-    prompt = department_extract_tmp.replace("{wiki_content}", row0['wiki_text'])
+    prompt = render_prompt('department_extract', wiki_content=row0['wiki_text'])
     response, history = query_agent(prompt, verbose=True)
 
 
@@ -34,17 +32,16 @@ for idx, row in tqdm(df.iterrows(), total=len(df)):
     wiki_text = row['wiki_text']
     if len(wiki_text.strip()) == 0:
         continue
-    # split wiki_text into chunks of `context_char` characters
-    wiki_chunks = [wiki_text[i:i+context_char] for i in range(0, len(wiki_text), context_char)]
+    # split wiki_text into overlapping chunks of at most `chunk_tokens` tokens at section/paragraph boundaries
+    wiki_chunks = split_markdown(wiki_text, max_tokens=chunk_tokens, model=model_name)
     
-    response_list = []
+    chunk_results = []
     for chunk in wiki_chunks:
-        prompt = department_extract_tmp.replace("{wiki_content}", chunk)
+        prompt = render_prompt('department_extract', wiki_content=chunk)
         response, history = query_agent(prompt, verbose=False)
-        chunk_response_list = parse_json(response)
-        response_list.extend(chunk_response_list)
+        chunk_results.append(parse_json(response))
 
-    response_list = list(set(response_list))
+    response_list = merge_json_results(chunk_results)
 
     if not response_list:
         print(f"Failed to parse JSON for {row['school_name']}")
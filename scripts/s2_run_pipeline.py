@@ -0,0 +1,30 @@
+import dotenv
+
+from modules.ToolAgent import ToolAgent
+from modules.FunctionTools import FunctionTools
+from modules.utils import search_papers_tool
+from modules.cache import SQLiteCache
+from modules.data import get_schools
+from modules.pipeline import CrawlPipeline
+from modules.metrics import get_metrics
+
+
+# OCR 进程池使用 spawn 启动，子进程会重新导入本脚本，入口代码必须放在 __main__ 保护下
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    with open('llm.py') as f:
+        exec(f.read())
+
+    tools = FunctionTools([search_papers_tool])
+    llm_cache = SQLiteCache('data/cache/llm.sqlite', max_bytes=2 * 1024**3)
+    agent = ToolAgent(client=client, model_name=model_name, tools=tools, temperature=0, cache=llm_cache, max_concurrency=8)
+
+    # 工作队列保存在 data/pipeline.sqlite，重复运行本脚本会从上次中断处继续
+    pipeline = CrawlPipeline(agent, workers={'school': 1, 'department': 2, 'professor': 4})
+    pipeline.add_schools(get_schools())
+
+    summary = pipeline.run()
+    print(summary)
+
+    # 各阶段耗时/流量/token 汇总；设置 SAODISENG_METRICS_LOG 可得到逐次调用的 JSON 日志
+    get_metrics().print_summary()
@@ -0,0 +1,18 @@
+import sys
+import glob
+from tqdm import tqdm
+
+from modules.paper_index import PaperIndex, PAPER_INDEX_PATH
+
+# 用法: python scripts/s3_build_paper_index.py "openalex-snapshot/data/works/*/*.gz"
+# 构建完成后 search_papers / search_papers_tool 会优先查询本地索引
+# 默认保存摘要；加上 --no-abstract 可以减小索引体积（本地结果的 abstract 为 None）
+args = [a for a in sys.argv[1:] if a != '--no-abstract']
+with_abstract = '--no-abstract' not in sys.argv
+pattern = args[0] if args else 'output/openalex_works/*.jsonl'
+
+index = PaperIndex(PAPER_INDEX_PATH)
+for path in tqdm(sorted(glob.glob(pattern))):
+    index.build_from_jsonl(path, with_abstract=with_abstract)
+
+print(f"Indexed {len(index)} works into {PAPER_INDEX_PATH}")
@@ -1,6 +1,11 @@
+import asyncio
+import os
+import tempfile
+import time
 import unittest
 
-from modules.FunctionTools import FunctionTools
+from modules.FunctionTools import FunctionTools, cached_tool
+from modules.cache import SQLiteCache
 
 
 def search_web(key: str) -> str:
@@ -66,5 +71,61 @@ class TestFunctionTools(unittest.TestCase):
         self.assertIn("Function: browse_web", s)
 
 
+CALLS = []
+
+
+@cached_tool(ttl=60)
+def lookup(query: str, limit: int = 5) -> str:
+    """检索（有缓存）。"""
+    CALLS.append((query, limit))
+    return f"{query}:{limit}"
+
+
+def uncached(query: str) -> str:
+    CALLS.append(query)
+    return query
+
+
+class TestFunctionToolsCache(unittest.TestCase):
+    def setUp(self) -> None:
+        CALLS.clear()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "tools.sqlite")
+        self.cache = SQLiteCache(self.path)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_unknown_function(self) -> None:
+        with self.assertRaises(ValueError):
+            FunctionTools([lookup], cache=self.cache).call("missing", {})
+
+    def test_decorated_tool_is_cached_on_canonical_args(self) -> None:
+        tools = FunctionTools([lookup, uncached], cache=self.cache)
+        self.assertEqual(tools.call("lookup", {"query": "q", "limit": 3}), "q:3")
+        self.assertEqual(tools.call("lookup", {"limit": 3, "query": "q"}), "q:3")
+        tools.call("lookup", {"query": "q", "limit": 4})
+        tools.call("uncached", {"query": "q"})
+        tools.call("uncached", {"query": "q"})
+        self.assertEqual(CALLS, [("q", 3), ("q", 4), "q", "q"])
+
+    def test_cache_shared_across_instances_and_persisted(self) -> None:
+        FunctionTools([lookup], cache=self.cache).call("lookup", {"query": "q"})
+        self.cache.close()
+        self.cache = SQLiteCache(self.path)
+        FunctionTools([lookup], cache=self.cache).call("lookup", {"query": "q"})
+        asyncio.run(FunctionTools([lookup], cache=self.cache).acall("lookup", {"query": "q"}))
+        self.assertEqual(CALLS, [("q", 5)])
+
+    def test_registration_option_and_ttl(self) -> None:
+        tools = FunctionTools([uncached], cache_ttls={"uncached": 0.05}, cache=self.cache)
+        tools.call("uncached", {"query": "q"})
+        tools.call("uncached", {"query": "q"})
+        time.sleep(0.1)
+        tools.call("uncached", {"query": "q"})
+        self.assertEqual(CALLS, ["q", "q"])
+
+
 if __name__ == "__main__":
     unittest.main()
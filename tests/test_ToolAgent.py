@@ -0,0 +1,347 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from modules.ToolAgent import AsyncToolAgent, ToolAgent
+from modules.cache import SQLiteCache
+
+
+def _make_response(content, finish_reason="stop", tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(finish_reason=finish_reason, message=message)])
+
+
+class FakeClient:
+    """模拟 OpenAI 客户端：回显最后一条用户消息，遇到 "boom" 抛出异常。"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, tools=None, tool_choice=None, temperature=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            content = messages[-1]["content"]
+            if content == "boom":
+                raise RuntimeError("server error")
+            return _make_response(f"echo:{content}")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestToolAgentBatchChat(unittest.TestCase):
+    def test_results_keep_input_order(self) -> None:
+        agent = ToolAgent(FakeClient(), "fake-model", max_concurrency=4)
+        messages = [str(i) for i in range(10)]
+        replies, histories = agent.batch_chat(messages, use_tools=False)
+        self.assertEqual(replies, [f"echo:{m}" for m in messages])
+        self.assertEqual(len(histories), len(messages))
+        self.assertEqual(histories[3][-1]["content"], "echo:3")
+
+    def test_runs_concurrently_within_limit(self) -> None:
+        client = FakeClient(delay=0.05)
+        agent = ToolAgent(client, "fake-model", max_concurrency=3)
+        agent.batch_chat([str(i) for i in range(9)], use_tools=False)
+        self.assertGreater(client.max_active, 1)
+        self.assertLessEqual(client.max_active, 3)
+
+    def test_error_is_isolated(self) -> None:
+        agent = ToolAgent(FakeClient(), "fake-model", max_concurrency=2)
+        replies, histories = agent.batch_chat(["a", "boom", "c"], use_tools=False)
+        self.assertEqual(replies, ["echo:a", "", "echo:c"])
+        self.assertEqual(histories[1][-1]["content"], "boom")
+
+
+class TestToolAgentCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(os.path.join(self._tmp.name, "llm.sqlite"))
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _counting_client(self):
+        client = FakeClient()
+        calls = []
+        create = client.chat.completions.create
+
+        def counting_create(**kwargs):
+            calls.append(kwargs)
+            return create(**kwargs)
+
+        client.chat.completions.create = counting_create
+        return client, calls
+
+    def test_repeated_prompt_hits_cache(self) -> None:
+        client, calls = self._counting_client()
+        agent = ToolAgent(client, "fake-model", temperature=0, cache=self.cache)
+        first, _ = agent.chat("hello", use_tools=False)
+        second, _ = agent.chat("hello", use_tools=False)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+    def test_bypass_and_temperature_in_key(self) -> None:
+        client, calls = self._counting_client()
+        agent = ToolAgent(client, "fake-model", temperature=0, cache=self.cache)
+        agent.chat("hello", use_tools=False)
+        agent.chat("hello", use_tools=False, use_cache=False)
+        ToolAgent(client, "fake-model", temperature=0.7, cache=self.cache).chat("hello", use_tools=False)
+        self.assertEqual(len(calls), 3)
+
+
+def add(a: int, b: int) -> str:
+    """两数相加。"""
+    return str(a + b)
+
+
+def _tool_call(call_id, name, arguments):
+    return SimpleNamespace(id=call_id, type="function", function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeAsyncToolClient:
+    """先请求一次 ``add`` 工具调用，拿到工具结果后给出带 think 标签的回答。"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, tools=None, tool_choice=None, temperature=None):
+        await asyncio.sleep(0)
+        if messages[-1]["role"] == "tool":
+            return _make_response(f"<think>...</think>sum={messages[-1]['content']}")
+        if messages[-1]["content"] == "boom":
+            raise RuntimeError("server error")
+        calls = [_tool_call("call_1", "add", '{"a": 1, "b": 2}')]
+        return _make_response("", finish_reason="tool_calls", tool_calls=calls)
+
+
+class TestAsyncToolAgent(unittest.TestCase):
+    def test_chat_runs_tool_loop(self) -> None:
+        agent = AsyncToolAgent(FakeAsyncToolClient(), "fake-model", tools=[add])
+        reply, history = asyncio.run(agent.chat("1+2?"))
+        self.assertEqual(reply, "sum=3")
+        self.assertEqual(history[-2]["role"], "tool")
+        self.assertEqual(history[-2]["tool_call_id"], "call_1")
+
+    def test_batch_chat_order_and_isolation(self) -> None:
+        agent = AsyncToolAgent(FakeAsyncToolClient(), "fake-model", tools=[add], max_concurrency=2)
+        replies, _ = asyncio.run(agent.batch_chat(["x", "boom", "y"]))
+        self.assertEqual(replies, ["sum=3", "", "sum=3"])
+
+
+def slow_lookup(title: str) -> str:
+    """模拟一次阻塞的检索请求。"""
+    time.sleep(0.1)
+    return f"found:{title}"
+
+
+class FakeMultiToolClient:
+    """第一轮同时请求多个 ``slow_lookup``（其中一个重复），之后汇总工具结果。"""
+
+    def __init__(self, titles):
+        self.titles = titles
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _response(self, messages):
+        if messages[-1]["role"] == "tool":
+            results = [m["content"] for m in messages if m["role"] == "tool"]
+            return _make_response("|".join(results))
+        calls = [_tool_call(f"call_{i}", "slow_lookup", f'{{"title": "{t}"}}') for i, t in enumerate(self.titles)]
+        return _make_response("", finish_reason="tool_calls", tool_calls=calls)
+
+    def _create(self, model, messages, tools=None, tool_choice=None, temperature=None):
+        return self._response(messages)
+
+
+class FakeAsyncMultiToolClient(FakeMultiToolClient):
+    async def _create(self, model, messages, tools=None, tool_choice=None, temperature=None):
+        return self._response(messages)
+
+
+class TestParallelToolCalls(unittest.TestCase):
+    titles = ["t0", "t1", "t2", "t1", "t4"]
+    expected = "found:t0|found:t1|found:t2|Error: Detected repeated function call. Function calls aborted to prevent infinite loop.|found:t4"
+
+    def _check_history(self, history) -> None:
+        tool_messages = [m for m in history if m["role"] == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_messages], [f"call_{i}" for i in range(5)])
+
+    def test_tool_calls_run_concurrently_in_order(self) -> None:
+        agent = ToolAgent(FakeMultiToolClient(self.titles), "fake-model", tools=[slow_lookup])
+        start = time.perf_counter()
+        reply, history = agent.chat("check titles")
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(reply, self.expected)
+        self._check_history(history)
+
+    def test_sequential_when_single_worker(self) -> None:
+        agent = ToolAgent(FakeMultiToolClient(self.titles), "fake-model", tools=[slow_lookup], max_tool_workers=1)
+        start = time.perf_counter()
+        reply, _ = agent.chat("check titles")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.4)
+        self.assertEqual(reply, self.expected)
+
+    def test_async_agent_gathers_tool_calls(self) -> None:
+        agent = AsyncToolAgent(FakeAsyncMultiToolClient(self.titles), "fake-model", tools=[slow_lookup])
+        start = time.perf_counter()
+        reply, history = asyncio.run(agent.chat("check titles"))
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(reply, self.expected)
+        self._check_history(history)
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    choices = [] if usage is not None else [SimpleNamespace(delta=delta, finish_reason=finish_reason)]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _tool_delta(index, call_id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=call_id, type="function" if call_id else None,
+                           function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeStream:
+    """可迭代的 chunk 流，记录被读取的 chunk 数以及是否被关闭。"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamingClient:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _chunks(self, messages):
+        if messages[-1]["role"] == "tool":
+            return [_chunk("<think>算一下</think>"), _chunk(f"sum={messages[-1]['content']}", finish_reason="stop")]
+        if self.pieces is None:
+            return [
+                _chunk(tool_calls=[_tool_delta(0, "call_1", "add", '{"a": 1,')]),
+                _chunk(tool_calls=[_tool_delta(0, arguments=' "b": 2}')], finish_reason="tool_calls"),
+            ]
+        usage = SimpleNamespace(prompt_tokens=5, completion_tokens=len(self.pieces))
+        return [_chunk(p) for p in self.pieces] + [_chunk(finish_reason="stop"), _chunk(usage=usage)]
+
+    def _create(self, model, messages, tools=None, tool_choice=None, temperature=None, stream=False, stream_options=None):
+        assert stream
+        self.streams.append(FakeStream(self._chunks(messages)))
+        return self.streams[-1]
+
+
+class TestStreaming(unittest.TestCase):
+    pieces = ["<thi", "nk>先看[1]和", "{x}</th", "ink>\n\n", '[{"a": "]"', ", \"b\": [1]}", "]", "\n还有更多说明", "[2]"]
+
+    def test_think_is_dropped_and_json_stops_stream(self) -> None:
+        client = FakeStreamingClient(self.pieces)
+        agent = ToolAgent(client, "fake-model", stop_on_json=True)
+        reply, _ = agent.chat("extract", use_tools=False)
+        self.assertEqual(reply, '[{"a": "]", "b": [1]}]')
+        stream = client.streams[0]
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.consumed, 7)
+
+    def test_stream_without_stop_matches_full_reply(self) -> None:
+        client = FakeStreamingClient(self.pieces)
+        agent = ToolAgent(client, "fake-model", stream=True)
+        reply, _ = agent.chat("extract", use_tools=False)
+        self.assertEqual(reply, '[{"a": "]", "b": [1]}]\n还有更多说明[2]')
+        self.assertEqual(client.streams[0].consumed, len(client.streams[0].chunks))
+
+    def test_open_tag_in_prompt_template(self) -> None:
+        client = FakeStreamingClient(["先思考一下", "</think>", "[3]", "多余"])
+        reply, _ = ToolAgent(client, "fake-model").chat("extract", use_tools=False, stop_on_json=True)
+        self.assertEqual(reply, "[3]")
+
+    def test_citation_marker_in_prose_is_skipped(self) -> None:
+        client = FakeStreamingClient(["根据网页[1]，", "[2, 3]", "结果如下：\n", '[{"name": "A"}]', "\n说明"])
+        reply, _ = ToolAgent(client, "fake-model").chat("extract", use_tools=False, stop_on_json=True)
+        self.assertEqual(reply, '根据网页[1]，[2, 3]结果如下：\n[{"name": "A"}]')
+        self.assertTrue(client.streams[0].closed)
+
+    def test_leading_json_is_accepted_as_is(self) -> None:
+        for pieces, expected in [(["[1, 2]", "多余"], "[1, 2]"), (["```json\n[]", "\n```"], "```json\n[]")]:
+            with self.subTest(pieces=pieces):
+                reply, _ = ToolAgent(FakeStreamingClient(pieces), "fake-model").chat(
+                    "extract", use_tools=False, stop_on_json=True
+                )
+                self.assertEqual(reply, expected)
+
+    def test_ttft_and_cache(self) -> None:
+        from modules.metrics import get_metrics
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = SQLiteCache(os.path.join(tmp, "llm.sqlite"))
+            client = FakeStreamingClient(['[1', ']', ' 之后的说明'])
+            agent = ToolAgent(client, "stream-ttft-model", temperature=0, cache=cache, stream=True, stop_on_json=True)
+            events = []
+            metrics = get_metrics()
+            record = metrics.record
+            metrics.record = lambda stage, duration=0.0, **fields: events.append(fields) or record(stage, duration, **fields)
+            try:
+                first, _ = agent.chat("x", use_tools=False)
+                second, _ = agent.chat("x", use_tools=False)
+                # 截断的回复不能返回给需要完整回复的调用
+                full, _ = agent.chat("x", use_tools=False, stop_on_json=False)
+                full_again, _ = agent.chat("x", use_tools=False, stop_on_json=False)
+            finally:
+                del metrics.record
+                cache.close()
+        self.assertEqual((first, second), ("[1]", "[1]"))
+        self.assertEqual((full, full_again), ("[1] 之后的说明", "[1] 之后的说明"))
+        self.assertEqual(len(client.streams), 2)
+        self.assertIn("ttft_s", events[0])
+        self.assertEqual(events[0]["early_stops"], 1)
+        self.assertEqual(events[1]["cache_hits"], 1)
+
+    def test_tool_call_deltas_are_assembled(self) -> None:
+        agent = ToolAgent(FakeStreamingClient(None), "fake-model", tools=[add], stream=True)
+        reply, history = agent.chat("1+2?")
+        self.assertEqual(reply, "sum=3")
+        self.assertEqual(history[2]["tool_calls"][0]["function"]["arguments"], '{"a": 1, "b": 2}')
+
+    def test_async_stream(self) -> None:
+        class AsyncStream(FakeStream):
+            async def __aiter__(self):
+                for chunk in FakeStream.__iter__(self):
+                    yield chunk
+
+            async def close(self):
+                self.closed = True
+
+        class AsyncClient(FakeStreamingClient):
+            async def _create(self, model, messages, **kwargs):
+                self.streams.append(AsyncStream(self._chunks(messages)))
+                return self.streams[-1]
+
+        client = AsyncClient(self.pieces)
+        reply, _ = asyncio.run(AsyncToolAgent(client, "fake-model").chat("extract", use_tools=False, stop_on_json=True))
+        self.assertEqual(reply, '[{"a": "]", "b": [1]}]')
+        self.assertTrue(client.streams[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
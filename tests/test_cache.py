@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+import unittest
+
+from modules.cache import SQLiteCache, hash_key
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "sub", "cache.sqlite")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_roundtrip_and_persistence(self) -> None:
+        cache = SQLiteCache(self.path)
+        cache.set("k", {"a": [1, 2], "b": b"bytes"})
+        cache.close()
+        cache = SQLiteCache(self.path)
+        self.assertEqual(cache.get("k"), {"a": [1, 2], "b": b"bytes"})
+        self.assertIsNone(cache.get("missing"))
+
+    def test_ttl_expiry(self) -> None:
+        cache = SQLiteCache(self.path)
+        cache.set("k", 1, ttl=0.01)
+        time.sleep(0.02)
+        self.assertNotIn("k", cache)
+
+    def test_lru_eviction_by_entries(self) -> None:
+        cache = SQLiteCache(self.path, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" 成为最久未访问的条目
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_eviction_by_bytes(self) -> None:
+        cache = SQLiteCache(self.path, max_bytes=3000)
+        for i in range(5):
+            cache.set(str(i), b"x" * 1000)
+        self.assertLessEqual(len(cache), 2)
+        self.assertIn("4", cache)
+
+    def test_reads_do_not_write_until_flushed(self) -> None:
+        cache = SQLiteCache(self.path)
+        cache.set("k", 1)
+        changes = cache._conn.total_changes
+        for _ in range(10):
+            cache.get("k")
+        self.assertEqual(cache._conn.total_changes, changes)
+        cache.close()
+
+    def test_access_times_survive_close(self) -> None:
+        cache = SQLiteCache(self.path, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.close()
+        cache = SQLiteCache(self.path, max_entries=2)
+        cache.set("c", 3)
+        self.assertEqual((("a" in cache), ("b" in cache)), (True, False))
+        cache.close()
+
+    def test_running_totals_match_database(self) -> None:
+        cache = SQLiteCache(self.path, max_bytes=5000)
+        for i in range(8):
+            cache.set(str(i % 5), b"x" * (500 + 100 * i))
+        cache.delete("4")
+        cache.delete("missing")
+        cache.set("short", 1, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual((len(cache), cache._total_bytes), tuple(cache._stats()))
+        self.assertLessEqual(cache._total_bytes, 5000)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_expired_entries_are_evicted_first(self) -> None:
+        cache = SQLiteCache(self.path, max_entries=2)
+        cache.set("old", 1)
+        cache.set("expiring", 2, ttl=0.01)
+        time.sleep(0.02)
+        cache.set("new", 3)
+        self.assertIn("old", cache)
+        self.assertIn("new", cache)
+        cache.close()
+
+    def test_hash_key_is_order_insensitive_for_dicts(self) -> None:
+        self.assertEqual(hash_key({"a": 1, "b": 2}), hash_key({"b": 2, "a": 1}))
+        self.assertNotEqual(hash_key("m", 0), hash_key("m", 0.7))
+
+
+if __name__ == "__main__":
+    unittest.main()
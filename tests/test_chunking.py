@@ -0,0 +1,68 @@
+import unittest
+
+from modules.chunking import count_tokens, merge_json_results, split_markdown
+
+
+def _paper_page(sections=6, items=30):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## 第{i}部分")
+        parts.extend(f"{i}-{j}. Paper title number {j}, 计算机学报, 2020." for j in range(items))
+    return "\n\n".join(parts)
+
+
+class TestCountTokens(unittest.TestCase):
+    def test_counts(self) -> None:
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("张三教授" * 10), count_tokens("张三教授"))
+        self.assertGreater(count_tokens("deep learning " * 50), 50)
+
+
+class TestSplitMarkdown(unittest.TestCase):
+    def test_short_text_is_single_chunk(self) -> None:
+        self.assertEqual(split_markdown("# t\n\nbody", max_tokens=100), ["# t\n\nbody"])
+        self.assertEqual(split_markdown("  \n "), [])
+
+    def test_chunks_respect_budget_and_keep_paragraphs_whole(self) -> None:
+        text = _paper_page()
+        paragraphs = text.split("\n\n")
+        chunks = split_markdown(text, max_tokens=300, overlap_tokens=40)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk), 300)
+            for paragraph in chunk.split("\n\n"):
+                self.assertIn(paragraph, paragraphs)
+        # 每个段落都至少出现在一个分块中
+        covered = {p for chunk in chunks for p in chunk.split("\n\n")}
+        self.assertEqual(covered, set(paragraphs))
+
+    def test_overlap(self) -> None:
+        chunks = split_markdown(_paper_page(sections=1, items=80), max_tokens=300, overlap_tokens=40)
+        first, second = chunks[0].split("\n\n"), chunks[1].split("\n\n")
+        # 下一块以上一块末尾的段落开头
+        self.assertIn(first[-1], second)
+        self.assertEqual(second[0], first[len(first) - second.index(first[-1]) - 1])
+        no_overlap = split_markdown(_paper_page(sections=1, items=80), max_tokens=300, overlap_tokens=0)
+        self.assertNotIn(no_overlap[0].split("\n\n")[-1], no_overlap[1].split("\n\n"))
+
+    def test_oversized_paragraph_is_split(self) -> None:
+        chunks = split_markdown("论" * 1000, max_tokens=300)
+        self.assertEqual("".join(chunks), "论" * 1000)
+        self.assertTrue(all(count_tokens(c) <= 300 for c in chunks))
+
+
+class TestMergeJsonResults(unittest.TestCase):
+    def test_merge_and_dedup(self) -> None:
+        merged = merge_json_results([[{"a": 1}, "x"], None, [{"a": 1}, "y"], "x"])
+        self.assertEqual(merged, [{"a": 1}, "x", "y"])
+
+    def test_custom_key(self) -> None:
+        merged = merge_json_results(
+            [[{"type": "论文", "value": "A", "link": 1}], [{"type": "论文", "value": "A", "link": 2}]],
+            key=lambda item: (item["type"], item["value"]),
+        )
+        self.assertEqual(merged, [{"type": "论文", "value": "A", "link": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
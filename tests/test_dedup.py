@@ -0,0 +1,48 @@
+import unittest
+
+from modules.dedup import batch_groups, cluster_papers, normalize_title
+
+
+def _item(index, value, type_="论文", paper_body="no"):
+    return {"type": type_, "value": value, "paper_body": paper_body, "index": index}
+
+
+class TestClusterPapers(unittest.TestCase):
+    def test_normalize_title(self) -> None:
+        self.assertEqual(normalize_title("Deep  Learning: A Survey."), "deeplearningasurvey")
+        self.assertEqual(normalize_title("锂电池，固态电解质（综述）"), "锂电池固态电解质综述")
+
+    def test_exact_duplicates_merged_locally(self) -> None:
+        items = [
+            _item(0, "Deep Learning: A Survey"),
+            _item(1, "deep learning - a survey", paper_body="yes"),
+            _item(2, "锂电池固态电解质研究"),
+        ]
+        kept, ambiguous = cluster_papers(items)
+        self.assertEqual(kept, [1, 2])
+        self.assertEqual(ambiguous, [])
+
+    def test_types_are_isolated(self) -> None:
+        items = [_item(0, "Nature Materials"), _item(1, "Nature Materials", type_="关键词")]
+        kept, ambiguous = cluster_papers(items)
+        self.assertEqual(kept, [0, 1])
+
+    def test_partial_similarity_is_ambiguous(self) -> None:
+        items = [
+            _item(0, "Microstructure and mechanical properties of welded titanium alloy joints"),
+            _item(1, "Microstructure and mechanical properties of brazed titanium alloy joints"),
+            _item(2, "Graph neural networks for traffic forecasting"),
+        ]
+        kept, ambiguous = cluster_papers(items)
+        self.assertEqual(kept, [2])
+        self.assertEqual([[item["index"] for item in group] for group in ambiguous], [[0, 1]])
+
+    def test_batch_groups_respects_size(self) -> None:
+        groups = [[_item(i, str(i)) for i in range(3)], [_item(i, str(i)) for i in range(3, 8)]]
+        batches = batch_groups(groups, batch_size=4)
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from aiohttp import web
+
+from modules import fetcher as fetcher_module
+from modules.fetcher import MAX_RETRY_AFTER, Fetcher, FetchResult, _HostSlots, decode_body
+
+
+PAGE = "<html><body><p>计算机科学与技术学院 教授 𠀀</p></body></html>"
+
+
+class TestDecodeBody(unittest.TestCase):
+    def test_header_charset(self) -> None:
+        text, encoding = decode_body(PAGE.encode("gb18030"), "GBK")
+        self.assertEqual(text, PAGE)
+        self.assertEqual(encoding, "gb18030")
+
+    def test_meta_charset(self) -> None:
+        page = '<html><head><meta http-equiv="Content-Type" content="text/html; charset=gb2312"></head>' + PAGE
+        text, encoding = decode_body(page.encode("gb18030"))
+        self.assertEqual(text, page)
+        self.assertEqual(encoding, "gb18030")
+
+    def test_wrong_header_falls_back_to_meta(self) -> None:
+        page = '<meta charset="gbk">' + PAGE
+        text, encoding = decode_body(page.encode("gb18030"), "utf-8")
+        self.assertEqual(text, page)
+        self.assertEqual(encoding, "gb18030")
+
+    def test_latin1_header_does_not_win(self) -> None:
+        text, encoding = decode_body(PAGE.encode("utf-8"), "ISO-8859-1")
+        self.assertEqual(text, PAGE)
+        self.assertEqual(encoding, "utf-8")
+
+    def test_bom_and_default(self) -> None:
+        self.assertEqual(decode_body(b"\xef\xbb\xbfabc", "gbk"), ("abc", "utf-8-sig"))
+        self.assertEqual(decode_body(b"plain"), ("plain", "utf-8"))
+
+    def test_fetch_result_records_encoding(self) -> None:
+        result = FetchResult(url="u", status=200, body=('<meta charset="gbk">' + PAGE).encode("gb18030"))
+        self.assertIn("计算机", result.text())
+        self.assertEqual(result.charset, "gb18030")
+
+
+class TestFetcherBodyLimit(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        async def handler(request):
+            return web.Response(body=b"x" * 300_000, content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+
+    async def test_body_is_truncated(self) -> None:
+        async with Fetcher(max_body_bytes=100_000) as fetcher:
+            result = await fetcher.get(self.url)
+        self.assertTrue(result.truncated)
+        self.assertEqual(len(result.body), 100_000)
+
+    async def test_body_under_limit(self) -> None:
+        async with Fetcher() as fetcher:
+            result = await fetcher.get(self.url)
+        self.assertFalse(result.truncated)
+        self.assertEqual(len(result.body), 300_000)
+
+
+class ServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """在本地启动 aiohttp 测试服务器，子类实现 ``handler``。"""
+
+    async def asyncSetUp(self) -> None:
+        app = web.Application()
+        app.router.add_get("/", self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+
+
+class TestFetcherRetry(ServerTestCase):
+    async def asyncSetUp(self) -> None:
+        self.statuses = []
+        self.requests = 0
+        await super().asyncSetUp()
+
+    async def handler(self, request):
+        self.requests += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        return web.Response(status=status, text="ok", headers={"Retry-After": "0"} if status == 429 else {})
+
+    async def test_retries_until_success(self) -> None:
+        self.statuses = [503, 429]
+        async with Fetcher(backoff=0.01) as fetcher:
+            result = await fetcher.get(self.url)
+        self.assertEqual((result.status, self.requests), (200, 3))
+
+    async def test_returns_last_status_after_max_retries(self) -> None:
+        self.statuses = [500] * 5
+        async with Fetcher(backoff=0.01, max_retries=2) as fetcher:
+            result = await fetcher.get(self.url)
+        self.assertEqual((result.status, self.requests), (500, 3))
+
+    async def test_stream_retries_before_reading(self) -> None:
+        self.statuses = [502]
+        async with Fetcher(backoff=0.01) as fetcher:
+            async with fetcher.stream(self.url) as response:
+                self.assertEqual(await response.read(), b"ok")
+        self.assertEqual(self.requests, 2)
+
+    def test_retry_delay(self) -> None:
+        fetcher = Fetcher(backoff=0.5)
+        self.assertEqual(fetcher._retry_delay(0, "3"), 3.0)
+        self.assertEqual(fetcher._retry_delay(0, "86400"), MAX_RETRY_AFTER)
+        for attempt in range(3):
+            delay = fetcher._retry_delay(attempt, "Wed, 21 Oct 2015 07:28:00 GMT")
+            self.assertGreaterEqual(delay, 0.5 * 2 ** attempt)
+            self.assertLessEqual(delay, 0.5 * 2 ** attempt + 0.5)
+
+
+class TestHostConcurrency(ServerTestCase):
+    async def asyncSetUp(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        await super().asyncSetUp()
+
+    async def handler(self, request):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return web.Response(text="ok")
+
+    async def test_per_fetcher_limit(self) -> None:
+        async with Fetcher(per_host=2) as fetcher:
+            results = await asyncio.gather(*[fetcher.get(self.url) for _ in range(6)])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(self.peak, 2)
+
+    async def test_process_wide_limit_across_threads(self) -> None:
+        async def batch():
+            async with Fetcher(per_host=4) as fetcher:
+                return await asyncio.gather(*[fetcher.get(self.url) for _ in range(4)])
+
+        def run_batches():
+            # 与 get_web_contents 相同：每个线程各自 asyncio.run，并创建自己的 Fetcher
+            threads = [threading.Thread(target=lambda: asyncio.run(batch())) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        with mock.patch.object(fetcher_module, "_host_slots", _HostSlots(3, poll_interval=0.01)) as slots:
+            await asyncio.to_thread(run_batches)
+        self.assertEqual(self.peak, 3)
+        self.assertEqual(slots._active, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from modules import html_conversion
+from modules.cache import SQLiteCache
+from modules.fetcher import FetchResult
+from modules.html_conversion import async_fetch_url, html_to_markdown
+
+
+STAFF = ["张三", "李四", "王五", "赵六", "钱七", "孙八"]
+
+NAV = """
+<div class="nav"><ul>
+  <li><a href="/">首页</a></li><li><a href="/xygk">学院概况</a></li>
+  <li><a href="/szdw">师资队伍</a></li><li><a href="/kxyj">科学研究</a></li>
+</ul></div>
+"""
+FOOTER = '<div class="footer">版权所有 © 某某大学计算机学院 地址：某某路1号</div>'
+
+
+def _staff_page(wrapper_class):
+    links = "".join(f'<li><a href="/info/{i}.htm">{name}</a></li>' for i, name in enumerate(STAFF))
+    return f"""<html><head><title>师资队伍-计算机学院</title></head><body>
+    {NAV}
+    <div class="{wrapper_class}"><h3>教授</h3><ul>{links}</ul></div>
+    {FOOTER}
+    </body></html>"""
+
+
+class TestStaffPages(unittest.TestCase):
+    def test_staff_list_survives_generic_class_names(self) -> None:
+        for wrapper_class in ["column-list", "side-links", "teacher column", "top-list", "szdw links"]:
+            with self.subTest(wrapper_class=wrapper_class):
+                markdown = html_to_markdown(_staff_page(wrapper_class))
+                for name in STAFF:
+                    self.assertIn(f"- {name}", markdown)
+                self.assertNotIn("学院概况", markdown)
+                self.assertNotIn("版权所有", markdown)
+
+    def test_navigation_regions_are_removed(self) -> None:
+        html = f"""<html><body>
+        <div class="sidebar"><ul><li><a href="/a">通知公告</a></li><li><a href="/b">学院新闻</a></li></ul></div>
+        {NAV}
+        <div class="teacher-list"><p><a href="/info/1.htm">张三</a> 教授</p></div>
+        </body></html>"""
+        markdown = html_to_markdown(html)
+        self.assertIn("张三", markdown)
+        for text in ["通知公告", "首页", "师资队伍"]:
+            self.assertNotIn(text, markdown)
+
+
+class TestMainContent(unittest.TestCase):
+    body = "张三，男，教授，博士生导师。主要研究方向为机器学习与数据挖掘。" * 10
+
+    def test_main_content_is_never_removed(self) -> None:
+        html = f"""<html><head><title>张三-计算机学院</title></head><body>
+        {NAV}
+        <div class="page-footer-layout"><div class="v_news_content"><p>{self.body}</p></div></div>
+        {FOOTER}
+        </body></html>"""
+        markdown = html_to_markdown(html)
+        self.assertTrue(markdown.startswith("# 张三-计算机学院"))
+        self.assertIn("主要研究方向为机器学习", markdown)
+        self.assertNotIn("学院概况", markdown)
+
+    def test_main_content_inside_aside(self) -> None:
+        html = f"""<html><body><nav><a href="/">首页</a></nav>
+        <aside><div class="article-content"><p>{self.body}</p></div></aside></body></html>"""
+        markdown = html_to_markdown(html)
+        self.assertIn("主要研究方向为机器学习", markdown)
+        self.assertNotIn("首页", markdown)
+
+
+class TestMarkdownOutput(unittest.TestCase):
+    def test_headings_lists_and_tables(self) -> None:
+        html = """<html><body><div>
+        <h2>代表性论文</h2>
+        <ol><li>论文一<ul><li>SCI 收录</li></ul></li><li>论文二</li></ol>
+        <table><tr><th>姓名</th><th>职称</th></tr><tr><td>张三</td><td>教授</td></tr></table>
+        <p>第一行<br>第二行</p>
+        </div></body></html>"""
+        markdown = html_to_markdown(html)
+        self.assertIn("## 代表性论文", markdown)
+        self.assertIn("- 论文一\n  - SCI 收录\n- 论文二", markdown)
+        self.assertIn("姓名 | 职称\n张三 | 教授", markdown)
+        self.assertIn("第一行\n第二行", markdown)
+
+
+class FakeFetcher:
+    """第一次返回页面内容，之后对带 If-None-Match 的请求返回 304。"""
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    async def get(self, url, headers=None):
+        self.requests.append(headers)
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return FetchResult(url, 304, headers={"etag": '"v1"'})
+        return FetchResult(url, 200, headers={"etag": '"v1"'}, body=self.body)
+
+
+class TestPageCache(unittest.TestCase):
+    url = "https://example.edu.cn/szdw.htm"
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(os.path.join(self._tmp.name, "pages.sqlite"))
+        patcher = mock.patch.object(html_conversion, "_page_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _fetch(self, fetcher):
+        return asyncio.run(async_fetch_url(fetcher, self.url))
+
+    def test_revalidated_page_reuses_markdown(self) -> None:
+        fetcher = FakeFetcher(_staff_page("column-list").encode("utf-8"))
+        first = self._fetch(fetcher)
+        with mock.patch.object(html_conversion, "html_to_markdown") as convert:
+            second = self._fetch(fetcher)
+        convert.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(fetcher.requests[1], {"If-None-Match": '"v1"'})
+
+    def test_converter_version_invalidates_cached_markdown(self) -> None:
+        fetcher = FakeFetcher(_staff_page("column-list").encode("utf-8"))
+        # 模拟旧版本转换器写入的错误结果
+        with mock.patch.object(html_conversion, "CONVERTER_VERSION", html_conversion.CONVERTER_VERSION - 1), \
+                mock.patch.object(html_conversion, "html_to_markdown", return_value=""):
+            self.assertEqual(self._fetch(fetcher), "")
+        markdown = self._fetch(fetcher)
+        self.assertIn("- 张三", markdown)
+        # 新版本没有缓存条目，不发送条件请求
+        self.assertIsNone(fetcher.requests[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
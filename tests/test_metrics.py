@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+
+from modules.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_timer_and_summary(self) -> None:
+        metrics = Metrics()
+        with metrics.timer("fetch", url="a") as m:
+            m["bytes"] = 100
+        with metrics.timer("fetch", url="b") as m:
+            m["bytes"] = 50
+            m["cache_hits"] = 1
+        metrics.record("llm", 0.5, prompt_tokens=10, completion_tokens=3, model="m")
+
+        df = metrics.summary().set_index("stage")
+        self.assertEqual(df.loc["fetch", "calls"], 2)
+        self.assertEqual(df.loc["fetch", "bytes"], 150)
+        self.assertEqual(df.loc["fetch", "cache_hits"], 1)
+        self.assertEqual(df.loc["llm", "prompt_tokens"], 10)
+        self.assertAlmostEqual(df.loc["llm", "total_s"], 0.5)
+        self.assertNotIn("model", df.columns)
+        # 按总耗时排序
+        self.assertEqual(df.index[0], "llm")
+
+    def test_errors_are_counted_and_reraised(self) -> None:
+        metrics = Metrics()
+        with self.assertRaises(RuntimeError):
+            with metrics.timer("tool", tool="t", tool_calls=1):
+                raise RuntimeError("boom")
+        row = metrics.summary().iloc[0]
+        self.assertEqual((row["calls"], row["errors"], row["tool_calls"]), (1, 1, 1))
+
+    def test_json_log(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logs", "metrics.jsonl")
+            metrics = Metrics(path)
+            metrics.record("serper", 0.1, query="郭伟", cache_hits=1)
+            metrics.record("pdf", 2.0, pages=3, ocr_pages=2)
+            metrics.close()
+            with open(path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual([e["stage"] for e in events], ["serper", "pdf"])
+        self.assertEqual(events[0]["query"], "郭伟")
+        self.assertEqual(events[1]["ocr_pages"], 2)
+
+    def test_latency_fields_are_averaged(self) -> None:
+        metrics = Metrics()
+        metrics.record("llm", 1.0, ttft_s=0.2, early_stops=1)
+        metrics.record("llm", 1.0, ttft_s=0.4)
+        metrics.record("llm", 1.0, cache_hits=1)
+        row = metrics.summary().iloc[0]
+        self.assertAlmostEqual(row["mean_ttft_s"], 0.3)
+        self.assertEqual(row["early_stops"], 1)
+
+    def test_reset(self) -> None:
+        metrics = Metrics()
+        metrics.record("x", 1.0)
+        metrics.reset()
+        self.assertTrue(metrics.summary().empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
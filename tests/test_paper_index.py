@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from modules.paper_index import PaperIndex
+
+
+def _work(work_id, title, authors, abstract=None):
+    item = {
+        "id": work_id,
+        "display_name": title,
+        "authorships": [{"raw_author_name": name, "institutions": []} for name in authors],
+    }
+    if abstract:
+        item["abstract_inverted_index"] = {word: [i] for i, word in enumerate(abstract.split())}
+    return item
+
+
+WORKS = [
+    _work("W1", "锂电池固态电解质研究", ["郭伟", "李四"], abstract="solid state electrolyte"),
+    _work("W2", "锂电池固态电解质研究", ["张三丰"]),
+    _work("W3", "Deep Learning for Lithium Battery State Estimation", ["Wei Guo", "San Zhang"]),
+    _work("W4", "A Survey of Graph Neural Networks", ["Jie Zhou"]),
+]
+
+
+class TestPaperIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.index = PaperIndex(os.path.join(self._tmp.name, "index.sqlite"))
+        self.index.add_works(WORKS)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self._tmp.cleanup()
+
+    def test_exact_title_and_abstract(self) -> None:
+        results = self.index.search("锂电池，固态电解质研究")
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["local_score"], 1.0)
+        abstracts = {r["authors"][0]["name"]: r["abstract"] for r in results}
+        self.assertEqual(abstracts["郭伟"], "solid state electrolyte")
+        self.assertIsNone(abstracts["张三丰"])
+
+    def test_trigram_search_ranks_by_similarity(self) -> None:
+        results = self.index.search("deep learning lithium battery state")
+        self.assertEqual(results[0]["title"], "Deep Learning for Lithium Battery State Estimation")
+        self.assertGreater(results[0]["local_score"], 0.5)
+        self.assertIsNotNone(self.index.lookup("Deep Learning for Lithium Battery State Estimation"))
+        self.assertIsNone(self.index.lookup("protein folding with transformers"))
+
+    def test_two_character_author_filter(self) -> None:
+        results = self.index.search("锂电池固态电解质研究", author="郭伟")
+        self.assertEqual([r["authors"][0]["name"] for r in results], ["郭伟"])
+        self.assertEqual(self.index.search("锂电池固态电解质研究", author="王五"), [])
+
+    def test_long_author_filter(self) -> None:
+        results = self.index.search("lithium battery state estimation", author="Wei Guo")
+        self.assertEqual([r["title"] for r in results], ["Deep Learning for Lithium Battery State Estimation"])
+        self.assertEqual(self.index.search("lithium battery state estimation", author="Jie Zhou"), [])
+
+    def test_build_from_jsonl_skips_duplicates(self) -> None:
+        path = os.path.join(self._tmp.name, "works.jsonl.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for item in WORKS[:2] + [_work("W5", "Attention Is All You Need", ["Ashish Vaswani"])]:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.assertEqual(self.index.build_from_jsonl(path), 1)
+        self.assertEqual(len(self.index), 5)
+
+    def test_without_abstract(self) -> None:
+        index = PaperIndex(os.path.join(self._tmp.name, "small.sqlite"))
+        try:
+            index.add_works(WORKS[:1], with_abstract=False)
+            self.assertIsNone(index.search("锂电池固态电解质研究")[0]["abstract"])
+        finally:
+            index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+import json
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+
+from modules import paper_search
+from modules.paper_search import (
+    LazyAbstractWork, _RateLimiter, fetch_works_by_doi, iter_openalex_works, parse_work_item,
+    reconstruct_abstract, search_papers_bulk,
+)
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """按请求顺序返回预设的 JSON，记录每次请求的参数（副本）。"""
+
+    def __init__(self, pages=None, handler=None):
+        self.pages = list(pages or [])
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.requests.append(dict(params))
+            if self.handler is not None:
+                return FakeResponse(self.handler(params))
+            return FakeResponse(self.pages.pop(0))
+
+
+def _page(ids, next_cursor):
+    return {"results": [{"id": i} for i in ids], "meta": {"next_cursor": next_cursor}}
+
+
+class OpenAlexTestCase(unittest.TestCase):
+    def _patch(self, session):
+        patches = [
+            mock.patch.object(paper_search, "get_session", return_value=session),
+            mock.patch.object(paper_search, "_rate_limiter", _RateLimiter(10_000)),
+            mock.patch.object(paper_search, "get_paper_index", return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+
+class TestCursorPaging(OpenAlexTestCase):
+    def test_follows_cursor_until_none(self) -> None:
+        session = FakeSession([_page([1, 2], "c1"), _page([3], "c2"), _page([4], None)])
+        self._patch(session)
+        items = list(iter_openalex_works(query="battery", per_page=2))
+        self.assertEqual([it["id"] for it in items], [1, 2, 3, 4])
+        self.assertEqual([r["cursor"] for r in session.requests], ["*", "c1", "c2"])
+        self.assertEqual(session.requests[0]["search"], "battery")
+        self.assertEqual(session.requests[0]["per_page"], 2)
+
+    def test_stops_on_empty_page(self) -> None:
+        session = FakeSession([_page([1], "c1"), _page([], "c2")])
+        self._patch(session)
+        self.assertEqual(len(list(iter_openalex_works(filters="x:y"))), 1)
+        self.assertEqual(len(session.requests), 2)
+
+    def test_max_results_stops_early(self) -> None:
+        session = FakeSession([_page([1, 2, 3], "c1"), _page([4, 5, 6], "c2")])
+        self._patch(session)
+        self.assertEqual([it["id"] for it in iter_openalex_works(max_results=4)], [1, 2, 3, 4])
+        self.assertEqual(len(session.requests), 2)
+
+
+class TestDoiBatches(OpenAlexTestCase):
+    def test_splits_dois_into_or_filters(self) -> None:
+        def handler(params):
+            dois = params["filter"][len("doi:"):].split("|")
+            return {"results": [{"id": d} for d in dois], "meta": {"next_cursor": None}}
+
+        session = FakeSession(handler=handler)
+        self._patch(session)
+        dois = [f"10.1000/{i}" for i in range(120)] + ["", None]
+        works = fetch_works_by_doi(dois)
+        self.assertEqual([w["id"] for w in works], dois[:120])
+        sizes = [len(r["filter"].split("|")) for r in session.requests]
+        self.assertEqual(sizes, [50, 50, 20])
+        self.assertTrue(all(r["per_page"] == 50 for r in session.requests))
+
+    def test_no_dois_no_requests(self) -> None:
+        session = FakeSession()
+        self._patch(session)
+        self.assertEqual(fetch_works_by_doi([None, ""]), [])
+        self.assertEqual(session.requests, [])
+
+
+class TestSearchPapersBulk(OpenAlexTestCase):
+    def test_keeps_order_and_isolates_errors(self) -> None:
+        def handler(params):
+            if params["search"] == "boom":
+                raise RuntimeError("server error")
+            return {"results": [{"display_name": params["search"], "authorships": []}]}
+
+        self._patch(FakeSession(handler=handler))
+        results = search_papers_bulk(["a", "boom", "c"], per_page=1, max_workers=3, with_abstract=False)
+        self.assertEqual([[w["title"] for w in r] for r in results], [["a"], [], ["c"]])
+        self.assertEqual(search_papers_bulk([]), [])
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_spacing_between_calls(self) -> None:
+        limiter = _RateLimiter(50)
+        stamps = []
+        for _ in range(5):
+            limiter.wait()
+            stamps.append(time.monotonic())
+        self.assertGreaterEqual(stamps[-1] - stamps[0], 4 * 0.02 * 0.9)
+
+    def test_spacing_across_threads(self) -> None:
+        limiter = _RateLimiter(50)
+        stamps = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter.wait()
+            with lock:
+                stamps.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stamps.sort()
+        self.assertGreaterEqual(stamps[-1] - stamps[0], 5 * 0.02 * 0.9)
+
+    def test_idle_time_is_not_banked(self) -> None:
+        limiter = _RateLimiter(20)
+        limiter.wait()
+        time.sleep(0.15)
+        start = time.monotonic()
+        limiter.wait()
+        limiter.wait()
+        # 空闲之后只有第一次调用立即返回，第二次仍然等待一个间隔
+        self.assertGreaterEqual(time.monotonic() - start, 0.05 * 0.9)
+
+
+def _reconstruct_abstract_sorted(index_obj):
+    """原来基于排序的实现，作为线性时间实现的参照。"""
+    if not index_obj:
+        return None
+    words = []
+    for word, positions in index_obj.items():
+        for pos in positions:
+            words.append((pos, word))
+    words.sort(key=lambda x: x[0])
+    return " ".join([w[1] for w in words])
+
+
+def _random_index(rng, length, gaps=False, duplicates=False):
+    index = {}
+    for pos in range(length):
+        if gaps and rng.random() < 0.2:
+            continue
+        for _ in range(2 if duplicates and rng.random() < 0.1 else 1):
+            index.setdefault(f"w{rng.randrange(length // 3 + 1)}", []).append(pos)
+    return index
+
+
+class TestReconstructAbstract(unittest.TestCase):
+    def test_matches_sorting_implementation(self) -> None:
+        rng = random.Random(0)
+        cases = [None, {}, {"only": []}, {"a": [0], "b": [2]}, {"x": [3, 0], "y": [1, 2]}]
+        for length in (1, 5, 50, 500):
+            for gaps in (False, True):
+                for duplicates in (False, True):
+                    cases.append(_random_index(rng, length, gaps, duplicates))
+        for index in cases:
+            with self.subTest(index=str(index)[:60]):
+                self.assertEqual(reconstruct_abstract(index), _reconstruct_abstract_sorted(index))
+
+
+class TestLazyAbstractWork(unittest.TestCase):
+    item = {"display_name": "T", "authorships": [], "abstract_inverted_index": {"hello": [0], "world": [1]}}
+
+    def test_json_serialisation_includes_abstract_once(self) -> None:
+        work = parse_work_item(self.item, with_abstract="lazy")
+        self.assertIsInstance(work, LazyAbstractWork)
+        with mock.patch.object(paper_search, "reconstruct_abstract", wraps=reconstruct_abstract) as rebuild:
+            self.assertEqual(json.loads(json.dumps(work))["abstract"], "hello world")
+            self.assertEqual(work["abstract"], "hello world")
+            self.assertEqual(json.loads(json.dumps(work, indent=2))["abstract"], "hello world")
+        self.assertEqual(rebuild.call_count, 1)
+
+    def test_access_paths(self) -> None:
+        work = parse_work_item(self.item, with_abstract="lazy")
+        self.assertIn("abstract", work)
+        # 直接复制底层 dict 的操作在读取摘要之前不包含 abstract（见类说明）
+        self.assertNotIn("abstract", dict(work))
+        self.assertEqual(work.get("abstract"), "hello world")
+        self.assertEqual(dict(work)["abstract"], "hello world")
+        self.assertEqual(parse_work_item(self.item, with_abstract="lazy").materialize(), parse_work_item(self.item))
+        with self.assertRaises(KeyError):
+            work["missing"]
+
+
+if __name__ == "__main__":
+    unittest.main()
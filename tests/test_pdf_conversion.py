@@ -0,0 +1,217 @@
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fitz
+from aiohttp import web
+
+from modules import pdf_coversion
+from modules.cache import SQLiteCache
+from modules.fetcher import Fetcher
+from modules.pdf_coversion import _process_pdf_content, async_download_pdf
+
+
+def _blank_pdf(pages):
+    """生成没有文本层的PDF，所有页面都需要OCR。"""
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=200, height=200)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class FakeOcr:
+    """替代 ``_ocr_pages``，记录每个批次的页码。"""
+
+    def __init__(self):
+        self.batches = []
+        # 第几个批次（从 0 开始）抛出异常，用于模拟中途中断
+        self.fail_on = None
+        self._lock = threading.Lock()
+
+    def __call__(self, pdf_source, page_nums, zoom=pdf_coversion.OCR_ZOOM):
+        with self._lock:
+            self.batches.append(list(page_nums))
+            if len(self.batches) - 1 == self.fail_on:
+                raise RuntimeError("OCR interrupted")
+        return {n: f"page {n}" for n in page_nums}
+
+
+class OcrTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ocr = FakeOcr()
+        patcher = mock.patch.object(pdf_coversion, "_ocr_pages", self.ocr)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestOcrBatching(OcrTestCase):
+    def test_pages_are_batched_in_process(self) -> None:
+        with mock.patch.object(pdf_coversion, "get_ocr_pool") as get_pool:
+            text = _process_pdf_content(_blank_pdf(9), "x.pdf", workers=1, use_cache=False)
+        get_pool.assert_not_called()
+        self.assertEqual(self.ocr.batches, [[0, 1, 2, 3], [4, 5, 6, 7], [8]])
+        self.assertIn("--- 第 9 页 (OCR) ---\npage 8", text)
+
+    def test_pool_path_keeps_page_order(self) -> None:
+        pool = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(pool.shutdown)
+        with mock.patch.object(pdf_coversion, "get_ocr_pool", return_value=pool):
+            text = _process_pdf_content(_blank_pdf(6), "x.pdf", workers=3, use_cache=False)
+        self.assertEqual(sorted(self.ocr.batches), [[0, 1, 2, 3], [4, 5]])
+        positions = [text.index(f"page {n}") for n in range(6)]
+        self.assertEqual(positions, sorted(positions))
+
+
+class TestOcrCache(OcrTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(os.path.join(self._tmp.name, "ocr.sqlite"))
+        patcher = mock.patch.object(pdf_coversion, "_ocr_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _process(self, pdf, url="a.pdf"):
+        return _process_pdf_content(pdf, url, workers=1)
+
+    def test_same_pdf_from_another_url_is_not_ocred_again(self) -> None:
+        pdf = _blank_pdf(5)
+        first = self._process(pdf, "a.pdf")
+        self.assertEqual(self.ocr.batches, [[0, 1, 2, 3], [4]])
+        self.ocr.batches.clear()
+        self.assertEqual(self._process(pdf, "b.pdf"), first)
+        self.assertEqual(self.ocr.batches, [])
+
+    def test_file_path_and_bytes_share_cache(self) -> None:
+        pdf = _blank_pdf(2)
+        path = os.path.join(self._tmp.name, "a.pdf")
+        with open(path, "wb") as f:
+            f.write(pdf)
+        first = self._process(path)
+        self.ocr.batches.clear()
+        self.assertEqual(self._process(pdf), first)
+        self.assertEqual(self.ocr.batches, [])
+
+    def test_zoom_is_part_of_cache_key(self) -> None:
+        pdf = _blank_pdf(1)
+        self._process(pdf)
+        with mock.patch.object(pdf_coversion, "OCR_ZOOM", 2.0):
+            self._process(pdf)
+        self.assertEqual(self.ocr.batches, [[0], [0]])
+
+    def test_resume_after_interrupted_run(self) -> None:
+        pdf = _blank_pdf(10)
+        self.ocr.fail_on = 1
+        self.assertEqual(self._process(pdf), "")
+        self.assertEqual(self.ocr.batches, [[0, 1, 2, 3], [4, 5, 6, 7]])
+
+        # 第一批已写入缓存，重新运行只识别剩余页面
+        self.ocr.fail_on = None
+        self.ocr.batches.clear()
+        text = self._process(pdf)
+        self.assertEqual(self.ocr.batches, [[4, 5, 6, 7], [8, 9]])
+        for n in range(10):
+            self.assertIn(f"--- 第 {n + 1} 页 (OCR) ---\npage {n}", text)
+
+
+class TestDownloadSizeLimit(unittest.IsolatedAsyncioTestCase):
+    chunk = b"%" * 64 * 1024
+
+    async def asyncSetUp(self) -> None:
+        async def chunked(request):
+            # 分块传输，没有 Content-Length，共 2MB
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            try:
+                for _ in range(32):
+                    await response.write(self.chunk)
+                await response.write_eof()
+            except (ConnectionResetError, RuntimeError):
+                pass
+            return response
+
+        async def sized(request):
+            return web.Response(body=self.chunk * 32, content_type="application/pdf")
+
+        app = web.Application()
+        app.router.add_get("/chunked.pdf", chunked)
+        app.router.add_get("/sized.pdf", sized)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+
+        self.paths = []
+        mkstemp = tempfile.mkstemp
+
+        def tracking_mkstemp(*args, **kwargs):
+            fd, path = mkstemp(*args, **kwargs)
+            self.paths.append(path)
+            return fd, path
+
+        patcher = mock.patch.object(pdf_coversion.tempfile, "mkstemp", tracking_mkstemp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def test_aborts_without_content_length(self) -> None:
+        async with Fetcher() as fetcher:
+            result = await async_download_pdf(fetcher, f"{self.base}/chunked.pdf", size_limit_mb=1)
+        self.assertIsNone(result)
+        self.assertEqual(len(self.paths), 1)
+        self.assertFalse(os.path.exists(self.paths[0]))
+
+    async def test_rejects_large_content_length_before_download(self) -> None:
+        async with Fetcher() as fetcher:
+            result = await async_download_pdf(fetcher, f"{self.base}/sized.pdf", size_limit_mb=1)
+        self.assertIsNone(result)
+        self.assertEqual(self.paths, [])
+
+    async def test_download_under_limit(self) -> None:
+        async with Fetcher() as fetcher:
+            result = await async_download_pdf(fetcher, f"{self.base}/chunked.pdf", size_limit_mb=3)
+        self.assertEqual(result.status, 200)
+        self.assertEqual(os.path.getsize(result.path), 2 * 1024 * 1024)
+        self.assertEqual(result.sha256, hashlib.sha256(self.chunk * 32).hexdigest())
+
+
+class TestOcrPool(unittest.TestCase):
+    def test_pool_created_once_across_threads(self) -> None:
+        barrier = threading.Barrier(8)
+        pools = []
+
+        def worker():
+            barrier.wait()
+            pools.append(pdf_coversion.get_ocr_pool())
+
+        with mock.patch.object(pdf_coversion, "_ocr_pool", None), \
+                mock.patch.object(pdf_coversion, "ProcessPoolExecutor") as executor:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        executor.assert_called_once()
+        self.assertTrue(all(p is pools[0] for p in pools))
+
+
+if __name__ == "__main__":
+    unittest.main()
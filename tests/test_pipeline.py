@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from modules import pipeline
+from modules.pipeline import CrawlPipeline
+
+
+class StubStages:
+    """替代 retrieve_professors / retrieve_professor_papers 的桩函数，记录每次执行的阶段。"""
+
+    def __init__(self, professors, fail_times=None, fail_step="dedup"):
+        self.professors = professors
+        # 教授名 -> 还需要失败的次数
+        self.fail_times = dict(fail_times or {})
+        self.fail_step = fail_step
+        self.calls = []
+        self.department_calls = []
+        self._lock = threading.Lock()
+
+    def retrieve_professors(self, agent, school, department):
+        self.department_calls.append(department)
+        return {"name": self.professors.get(department, [])}
+
+    def retrieve_professor_papers(self, agent, school, department, professor, checkpoint=None):
+        for step in ("papers", "dedup"):
+            if step in checkpoint:
+                continue
+            with self._lock:
+                self.calls.append((professor, step))
+                if step == self.fail_step and self.fail_times.get(professor, 0) > 0:
+                    self.fail_times[professor] -= 1
+                    raise RuntimeError(f"{professor} {step} failed")
+            checkpoint[step] = [{"professor": professor, "step": step}]
+
+
+class TestCrawlPipeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "pipeline.sqlite")
+        self.departments_dir = os.path.join(self._tmp.name, "schools")
+        os.makedirs(self.departments_dir)
+        with open(os.path.join(self.departments_dir, "某某大学.json"), "w", encoding="utf-8") as f:
+            json.dump(["计算机学院", "化学学院"], f, ensure_ascii=False)
+        self._pipelines = []
+
+    def tearDown(self) -> None:
+        for p in self._pipelines:
+            p._conn.close()
+        self._tmp.cleanup()
+
+    def _pipeline(self, **kwargs):
+        p = CrawlPipeline(None, db_path=self.db_path, departments_dir=self.departments_dir,
+                          workers={"department": 2, "professor": 3}, **kwargs)
+        self._pipelines.append(p)
+        return p
+
+    def _run(self, p, stubs):
+        with mock.patch.object(pipeline, "retrieve_professors", stubs.retrieve_professors), \
+                mock.patch.object(pipeline, "retrieve_professor_papers", stubs.retrieve_professor_papers):
+            return p.run(poll_interval=0.01)
+
+    def _task(self, p, professor):
+        return p._execute("SELECT status, attempts, error FROM tasks WHERE professor = ?", (professor,))[0]
+
+    def test_runs_all_stages(self) -> None:
+        stubs = StubStages({"计算机学院": ["张三", "李四"], "化学学院": ["王五"]})
+        p = self._pipeline()
+        p.add_schools(["某某大学", "某某大学"])
+        status = self._run(p, stubs)
+        self.assertEqual(status, {"school": {"done": 1}, "department": {"done": 2}, "professor": {"done": 3}})
+        self.assertEqual(len(stubs.calls), 6)
+        self.assertEqual(p._load_checkpoint(p._execute("SELECT id FROM tasks WHERE professor = '王五'")[0][0], "dedup"),
+                         [{"professor": "王五", "step": "dedup"}])
+
+    def test_failed_task_is_retried_then_marked_failed(self) -> None:
+        stubs = StubStages({"计算机学院": ["张三", "李四"]}, fail_times={"张三": 5, "李四": 1})
+        p = self._pipeline(max_attempts=3)
+        p.add_schools(["某某大学"])
+        status = self._run(p, stubs)
+        self.assertEqual(status["professor"], {"done": 1, "failed": 1})
+        self.assertEqual(self._task(p, "张三")[:2], ("failed", 3))
+        self.assertIn("张三 dedup failed", self._task(p, "张三")[2])
+        self.assertEqual(self._task(p, "李四"), ("done", 2, None))
+        self.assertEqual(stubs.calls.count(("张三", "dedup")), 3)
+
+    def test_missing_department_list_fails_school(self) -> None:
+        p = self._pipeline(max_attempts=1)
+        p.add_schools(["不存在的大学"])
+        status = self._run(p, StubStages({}))
+        self.assertEqual(status["school"], {"failed": 1})
+
+    def test_recover_requeues_running_tasks_after_crash(self) -> None:
+        p = self._pipeline()
+        p.enqueue("professor", "某某大学", "计算机学院", "张三")
+        p.enqueue("professor", "某某大学", "计算机学院", "李四")
+        # 模拟进程在任务执行中崩溃：任务已被领取，但没有写入结果
+        claimed = p._claim("professor", 1)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(p.status()["professor"], {"pending": 1, "running": 1})
+        p._conn.close()
+        self._pipelines.remove(p)
+
+        restarted = self._pipeline()
+        restarted.recover()
+        self.assertEqual(restarted.status()["professor"], {"pending": 2})
+        stubs = StubStages({})
+        status = self._run(restarted, stubs)
+        self.assertEqual(status["professor"], {"done": 2})
+        self.assertEqual(sorted(stubs.calls), [("张三", "dedup"), ("张三", "papers"), ("李四", "dedup"), ("李四", "papers")])
+
+    def test_rerun_skips_checkpointed_steps(self) -> None:
+        stubs = StubStages({"计算机学院": ["张三"]}, fail_times={"张三": 1})
+        p = self._pipeline(max_attempts=1)
+        p.add_schools(["某某大学"])
+        self.assertEqual(self._run(p, stubs)["professor"], {"failed": 1})
+        self.assertEqual(stubs.calls, [("张三", "papers"), ("张三", "dedup")])
+
+        p.retry_failed("professor")
+        stubs.calls.clear()
+        stubs.department_calls.clear()
+        status = self._run(p, stubs)
+        self.assertEqual(status["professor"], {"done": 1})
+        # papers 阶段已有检查点，不会重新执行；已完成的学校和学院任务也不会重复执行
+        self.assertEqual(stubs.calls, [("张三", "dedup")])
+        self.assertEqual(stubs.department_calls, [])
+        self.assertEqual(status["department"], {"done": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from modules.prompts import PromptRegistry, PromptTemplate, get_prompts
+
+
+class TestPromptTemplate(unittest.TestCase):
+    def test_single_pass_render(self) -> None:
+        template = PromptTemplate("t", "对象：{person}\n内容：{content}\n{\"type\": \"论文\"}")
+        self.assertEqual(template.placeholders, {"person", "content"})
+        # 替换进去的内容中的占位符不会被再次替换
+        rendered = template.render(person="郭伟", content="网页里有 {person}")
+        self.assertEqual(rendered, "对象：郭伟\n内容：网页里有 {person}\n{\"type\": \"论文\"}")
+
+    def test_missing_value_raises(self) -> None:
+        with self.assertRaises(KeyError):
+            PromptTemplate("t", "{a} {b}").render(a=1)
+
+    def test_base_tokens(self) -> None:
+        template = PromptTemplate("t", "固定文本{content}")
+        self.assertEqual(template.base_tokens(), PromptTemplate("u", "固定文本").base_tokens())
+
+
+class TestPromptRegistry(unittest.TestCase):
+    def test_loads_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "hello.txt"), "w", encoding="utf-8") as f:
+                f.write("你好 {name}")
+            registry = PromptRegistry(tmp)
+            self.assertEqual(registry.names, ["hello"])
+            self.assertEqual(registry.render("hello", name="世界"), "你好 世界")
+            prompt, tokens = registry.render_with_tokens("hello", name="世界")
+            self.assertEqual(prompt, "你好 世界")
+            self.assertGreater(tokens, 0)
+            with self.assertRaises(KeyError):
+                registry.get("missing")
+
+    def test_repo_prompts(self) -> None:
+        registry = get_prompts()
+        for name in ["extract_professor", "extract_paper", "dedup_paper", "confirm_professor_papers", "system_default"]:
+            self.assertIn(name, registry)
+        self.assertEqual(registry.get("extract_paper").placeholders, {"person", "content"})
+        for name in registry.names:
+            template = registry.get(name)
+            rendered = template.render(**{key: "X" for key in template.placeholders})
+            self.assertNotRegex(rendered, r"\{(%s)\}" % "|".join(template.placeholders or ["_"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
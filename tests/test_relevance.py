@@ -0,0 +1,38 @@
+import unittest
+
+from modules.relevance import extract_relevant_text, find_name_spans, paper_signal_count
+
+
+PAPER_LINE = "Guo W, et al. Microstructure of welded joints. Journal of Materials Processing, 2020, 35(4): 123-130. doi:10.1016/j.jmatprotec.2020.01.001"
+
+
+class TestRelevance(unittest.TestCase):
+    def test_name_spans_allow_padding(self) -> None:
+        self.assertEqual(len(find_name_spans("郭伟 教授 ... 郭　伟", "郭伟")), 2)
+        self.assertEqual(find_name_spans("郭伟", ""), [])
+
+    def test_paper_signals(self) -> None:
+        self.assertGreaterEqual(paper_signal_count(PAPER_LINE), 4)
+        self.assertEqual(paper_signal_count("学院简介：欢迎报考"), 0)
+
+    def test_page_without_name_is_skipped(self) -> None:
+        self.assertEqual(extract_relevant_text("李四 教授\n\n" + PAPER_LINE, "郭伟"), "")
+
+    def test_page_without_paper_signals_is_skipped(self) -> None:
+        self.assertEqual(extract_relevant_text("郭伟 老师获得优秀教师称号。", "郭伟"), "")
+
+    def test_homepage_is_kept_whole(self) -> None:
+        page = "# 郭伟\n\n个人简介\n\n" + "\n".join(["其他内容"] * 500) + "\n\n代表性论文：\n" + PAPER_LINE
+        self.assertEqual(extract_relevant_text(page, "郭伟"), page)
+
+    def test_windows_around_mentions(self) -> None:
+        filler = "\n".join(f"第{i}条新闻" for i in range(400))
+        page = filler + "\n郭伟 发表论文：\n" + PAPER_LINE + "\n" + filler
+        relevant = extract_relevant_text(page, "郭伟", before=50, after=300)
+        self.assertIn(PAPER_LINE, relevant)
+        self.assertIn("郭伟 发表论文", relevant)
+        self.assertLess(len(relevant), len(page) // 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+from modules import saodiseng_core
+from modules.ToolAgent import ToolAgent
+
+
+class TestChunkPrompts(unittest.TestCase):
+    def setUp(self) -> None:
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+        self.agent = ToolAgent(client, "gpt-4o")
+
+    def test_agent_model_reaches_tokenizer(self) -> None:
+        contents = ["第一段\n\n第二段", "", "另一个网页"]
+        with mock.patch.object(saodiseng_core, "split_markdown", wraps=saodiseng_core.split_markdown) as split:
+            chunks, owners = saodiseng_core._chunk_contents(self.agent, contents, 1000)
+        self.assertEqual(chunks, ["第一段\n\n第二段", "另一个网页"])
+        self.assertEqual(owners, [0, 2])
+        self.assertEqual({call.kwargs["model"] for call in split.call_args_list}, {"gpt-4o"})
+
+    def test_render_chunk_prompts_counts_with_agent_model(self) -> None:
+        registry = saodiseng_core.get_prompts()
+        with mock.patch.object(registry, "render_with_tokens", wraps=registry.render_with_tokens) as render:
+            prompts = saodiseng_core._render_chunk_prompts(
+                self.agent, "extract_professor", ["网页一", "网页二"], verbose=False, school="学校：某某大学"
+            )
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("网页二", prompts[1])
+        self.assertEqual({call.kwargs["model"] for call in render.call_args_list}, {"gpt-4o"})
+
+
+class FakeDedupAgent:
+    """按顺序返回预设回复的 ``batch_chat``。"""
+
+    def __init__(self, replies):
+        self.replies = replies
+
+    def batch_chat(self, prompts, verbose=True, use_tools=True):
+        return self.replies[:len(prompts)], [None] * len(prompts)
+
+
+class TestDeduplicatePapers(unittest.TestCase):
+    papers = pd.DataFrame([
+        {"type": "论文", "value": f"锂电池固态电解质研究{i}", "paper_body": "", "source": i} for i in range(4)
+    ])
+
+    def _dedup(self, reply):
+        # 第 0 篇直接保留，其余三篇是一个待定簇，交给 LLM 判断
+        clusters = ([0], [[{"index": i} for i in (1, 2, 3)]])
+        with mock.patch.object(saodiseng_core, "cluster_papers", return_value=clusters):
+            return saodiseng_core.deduplicate_papers(FakeDedupAgent([reply]), self.papers, verbose=False)
+
+    def test_valid_reply_keeps_selected_indices(self) -> None:
+        out = self._dedup('[{"index": 2}, {"index": 9}]')
+        self.assertEqual(out["source"].tolist(), [0, 2])
+
+    def test_unparsable_reply_keeps_whole_batch(self) -> None:
+        for reply in ["", "抱歉，我无法完成这个任务。"]:
+            with self.subTest(reply=reply):
+                out = self._dedup(reply)
+                self.assertEqual(out["source"].tolist(), [0, 1, 2, 3])
+                self.assertNotIn("index", out.columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
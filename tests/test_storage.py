@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from modules.storage import load_table, query, write_partition
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "store")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _papers(self, statuses):
+        return pd.DataFrame({
+            "type": ["论文"] * len(statuses),
+            "value": [f"paper {i}" for i in range(len(statuses))],
+            "verify_status": statuses,
+            "verify_score": [0.95 if s == "found" else None for s in statuses],
+        })
+
+    def test_write_and_load(self) -> None:
+        write_partition("papers", self._papers(["found", "not_found"]).assign(professor="郭伟"), "江苏科技大学", key=("材料", "郭伟"), root=self.root)
+        write_partition("papers", self._papers(["found"]).assign(professor="夏春智", extra=1), "江苏科技大学", key=("材料", "夏春智"), root=self.root)
+        write_partition("papers", self._papers(["ambiguous"]).assign(professor="张三"), "A/B 大学", key=("计算机", "张三"), root=self.root)
+
+        df = load_table("papers", root=self.root)
+        self.assertEqual(len(df), 4)
+        self.assertIn("extra", df.columns)
+        self.assertEqual(set(df["school"]), {"江苏科技大学", "A/B 大学"})
+        self.assertEqual(len(load_table("papers", school="A/B 大学", root=self.root)), 1)
+        self.assertTrue(load_table("professors", root=self.root).empty)
+        self.assertFalse(any(name.endswith(".tmp") for _, _, files in os.walk(self.root) for name in files))
+
+    def test_rewrite_same_key_replaces(self) -> None:
+        write_partition("papers", self._papers(["found", "found"]), "S", key=("D", "P"), root=self.root)
+        write_partition("papers", self._papers(["not_found"]), "S", key=("D", "P"), root=self.root)
+        df = load_table("papers", root=self.root)
+        self.assertEqual(df["verify_status"].tolist(), ["not_found"])
+
+    def test_mixed_object_column(self) -> None:
+        df = pd.DataFrame({"value": ["a", 1, {"k": "v"}]})
+        write_partition("papers", df, "S", key=("D", "P"), root=self.root)
+        self.assertEqual(load_table("papers", root=self.root)["value"].tolist(), ["a", "1", '{"k": "v"}'])
+
+    def test_sanitised_names_do_not_collide(self) -> None:
+        write_partition("papers", self._papers(["found"]), "A/B", key=("D", "P"), root=self.root)
+        write_partition("papers", self._papers(["not_found"]), "A_B", key=("D", "P"), root=self.root)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "papers"))), 2)
+        self.assertEqual(load_table("papers", school="A/B", root=self.root)["verify_status"].tolist(), ["found"])
+        self.assertEqual(load_table("papers", school="A_B", root=self.root)["verify_status"].tolist(), ["not_found"])
+
+    def _check_query(self) -> None:
+        write_partition("papers", self._papers(["found", "not_found", "not_found", "found"]), "A/B", key=("D", "P1"), root=self.root)
+        write_partition("papers", self._papers(["found"]), "S2", key=("D", "P2"), root=self.root)
+        result = query(
+            "SELECT school, AVG(CASE WHEN verify_status = 'not_found' THEN 1.0 ELSE 0.0 END) AS unverified "
+            "FROM papers GROUP BY school ORDER BY school",
+            root=self.root,
+        )
+        self.assertEqual(result["school"].tolist(), ["A/B", "S2"])
+        self.assertEqual(result["unverified"].tolist(), [0.5, 0.0])
+
+    def test_query_sqlite_fallback(self) -> None:
+        # sys.modules 中为 None 的模块导入时抛出 ImportError
+        with mock.patch.dict(sys.modules, {"duckdb": None}):
+            self._check_query()
+
+    @unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+    def test_query_duckdb(self) -> None:
+        self._check_query()
+
+
+if __name__ == "__main__":
+    unittest.main()
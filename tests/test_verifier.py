@@ -0,0 +1,103 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+from modules.verifier import author_matches, classify, name_variants, score_candidates, title_similarity, verify_papers
+
+
+TITLE = "Deep Learning for Lithium Battery State of Health Estimation"
+CLOSE_TITLE = "Deep learning for lithium-ion battery state of health estimation"
+
+
+def _candidate(title, *authors):
+    return {"title": title, "authors": [{"name": name, "affiliation": None} for name in authors]}
+
+
+class TestScoring(unittest.TestCase):
+    def test_title_similarity(self) -> None:
+        self.assertEqual(title_similarity("锂电池，固态电解质研究", "锂电池固态电解质研究"), 1.0)
+        self.assertEqual(title_similarity(TITLE, TITLE.upper()), 1.0)
+        self.assertGreater(title_similarity(TITLE, CLOSE_TITLE), 0.9)
+        self.assertLess(title_similarity(TITLE, "A Survey of Graph Neural Networks"), 0.5)
+        self.assertEqual(title_similarity("", TITLE), 0.0)
+
+    def test_title_subset_is_not_a_match(self) -> None:
+        self.assertLess(title_similarity("Deep Learning", TITLE), 0.7)
+        self.assertLess(title_similarity("Introduction", "Introduction to Lithium Battery Materials"), 0.7)
+        reordered = "Lithium Battery State of Health Estimation for Deep Learning"
+        self.assertGreater(title_similarity(TITLE, reordered), 0.9)
+
+    def test_difflib_fallback_matches_rules(self) -> None:
+        # 没有安装 rapidfuzz 时也应满足相同的规则
+        with mock.patch.dict("sys.modules", {"rapidfuzz": None}):
+            self.assertGreater(title_similarity(TITLE, CLOSE_TITLE), 0.9)
+            self.assertLess(title_similarity("Deep Learning", TITLE), 0.7)
+
+    def test_name_variants_include_initials(self) -> None:
+        fake = SimpleNamespace(lazy_pinyin=lambda name: {"郭伟": ["guo", "wei"], "郭小明": ["guo", "xiao", "ming"]}[name])
+        with mock.patch.dict("sys.modules", {"pypinyin": fake}):
+            self.assertLessEqual({"guowei", "weiguo", "wguo", "guow"}, name_variants("郭伟"))
+            self.assertLessEqual({"xiaomingguo", "xguo", "xmguo", "guoxm"}, name_variants("郭小明"))
+            self.assertTrue(author_matches("郭伟", [{"name": "W. Guo"}]))
+            self.assertTrue(author_matches("郭伟", [{"name": "Guo, W."}]))
+            self.assertFalse(author_matches("郭伟", [{"name": "J. Guo"}]))
+
+    def test_author_matches(self) -> None:
+        self.assertTrue(author_matches("郭伟", [{"name": "张三"}, {"name": "郭 伟"}]))
+        self.assertFalse(author_matches("郭伟", [{"name": "郭伟伟"}]))
+        self.assertFalse(author_matches("郭伟", None))
+
+    def test_classify(self) -> None:
+        self.assertEqual(classify(0.95, True), "found")
+        self.assertEqual(classify(0.95, False), "ambiguous")
+        self.assertEqual(classify(0.75, True), "ambiguous")
+        self.assertEqual(classify(0.5, True), "not_found")
+
+    def test_author_match_beats_slightly_higher_title_score(self) -> None:
+        candidates = [_candidate(TITLE, "张三"), _candidate(CLOSE_TITLE, "郭伟")]
+        score, matched, matched_title = score_candidates(TITLE, "郭伟", candidates)
+        self.assertTrue(matched)
+        self.assertEqual(matched_title, CLOSE_TITLE)
+        self.assertEqual(classify(score, matched), "found")
+
+    def test_best_score_within_same_status(self) -> None:
+        candidates = [_candidate(CLOSE_TITLE, "张三"), _candidate(TITLE, "李四")]
+        score, matched, matched_title = score_candidates(TITLE, "郭伟", candidates)
+        self.assertEqual((score, matched, matched_title), (1.0, False, TITLE))
+        self.assertEqual(score_candidates(TITLE, "郭伟", []), (0.0, False, None))
+
+
+class TestVerifyPapers(unittest.TestCase):
+    def test_statuses(self) -> None:
+        df = pd.DataFrame([
+            {"type": "论文", "value": TITLE},
+            {"type": "论文", "value": "锂电池固态电解质研究"},
+            {"type": "论文", "value": "Unknown Paper"},
+            {"type": "关键词", "value": "电池"},
+        ])
+        results = [
+            [_candidate(TITLE, "郭伟")],
+            [_candidate("锂电池固态电解质研究", "张三丰")],
+            [_candidate("A Survey of Graph Neural Networks", "郭伟")],
+        ]
+        with mock.patch("modules.verifier.search_papers_bulk", return_value=results) as bulk:
+            out = verify_papers(df, "郭伟", per_query=3)
+        bulk.assert_called_once_with(
+            [TITLE, "锂电池固态电解质研究", "Unknown Paper"], per_page=3, max_workers=8, with_abstract=False
+        )
+        self.assertEqual(out["verify_status"].tolist(), ["found", "ambiguous", "not_found", "skipped"])
+        self.assertEqual(out.loc[0, "matched_title"], TITLE)
+        self.assertEqual(out.loc[1, "verify_author_match"], False)
+        self.assertEqual(out.loc[0, "verify_score"], 1.0)
+
+    def test_empty_input(self) -> None:
+        with mock.patch("modules.verifier.search_papers_bulk") as bulk:
+            out = verify_papers(pd.DataFrame(), "郭伟")
+        bulk.assert_not_called()
+        self.assertIn("verify_status", out.columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
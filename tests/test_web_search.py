@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from modules import web_search
+from modules.cache import SQLiteCache
+from modules.web_search import async_search_web_serper, search_web_serper
+
+
+class FakeResponse:
+    def __init__(self, status, text):
+        self.status = status
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def text(self):
+        return self._text
+
+
+class FakeSession:
+    """替代 ``aiohttp.ClientSession``：按页码返回预设结果，记录请求的页码。"""
+
+    closed = False
+
+    def __init__(self, pages, status=200):
+        # 页码 -> 该页的条目数
+        self.pages = pages
+        self.status = status
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def post(self, url, headers=None, data=None):
+        page = json.loads(data)["page"]
+        with self._lock:
+            self.requests.append(page)
+        if self.status != 200:
+            return FakeResponse(self.status, '{"message": "Not enough credits"}')
+        organic = [{"title": f"p{page}-{i}"} for i in range(self.pages.get(page, 0))]
+        return FakeResponse(200, json.dumps({"organic": organic}))
+
+
+class SerperTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(os.path.join(self._tmp.name, "serper.sqlite"), ttl=web_search.SERPER_CACHE_TTL)
+        patcher = mock.patch.object(web_search, "get_serper_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _search(self, session, result_num=10, use_cache=True):
+        return asyncio.run(async_search_web_serper(session, "某某大学 教授", result_num, use_cache))
+
+
+class TestPagination(SerperTestCase):
+    def test_requests_enough_pages(self) -> None:
+        session = FakeSession({1: 10, 2: 10, 3: 10})
+        results = self._search(session, result_num=25, use_cache=False)
+        self.assertEqual(sorted(session.requests), [1, 2, 3])
+        self.assertEqual([r["title"] for r in results[:11]], [f"p1-{i}" for i in range(10)] + ["p2-0"])
+        self.assertEqual(len(results), 30)
+
+    def test_stops_at_first_empty_page(self) -> None:
+        session = FakeSession({1: 10, 3: 10})
+        results = self._search(session, result_num=30, use_cache=False)
+        self.assertEqual([r["title"] for r in results], [f"p1-{i}" for i in range(10)])
+
+    def test_short_page_requests_more(self) -> None:
+        session = FakeSession({1: 10, 2: 4, 3: 10})
+        results = self._search(session, result_num=20, use_cache=False)
+        self.assertEqual(session.requests, [1, 2, 3])
+        self.assertEqual(len(results), 24)
+
+
+class TestSerperCache(SerperTestCase):
+    def test_second_search_is_served_from_cache(self) -> None:
+        session = FakeSession({1: 10, 2: 10})
+        first = self._search(session, result_num=20)
+        second = self._search(session, result_num=20)
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(session.requests), [1, 2])
+
+    def test_expired_entries_are_refetched(self) -> None:
+        session = FakeSession({1: 10})
+        with mock.patch.object(self.cache, "ttl", 0.01):
+            self._search(session)
+            time.sleep(0.02)
+            self._search(session)
+        self.assertEqual(session.requests, [1, 1])
+
+    def test_error_status_is_not_cached(self) -> None:
+        failing = FakeSession({1: 10}, status=403)
+        self.assertEqual(self._search(failing), [])
+        session = FakeSession({1: 10})
+        self.assertEqual(len(self._search(session)), 10)
+        self.assertEqual(session.requests, [1])
+
+
+class TestSharedSession(SerperTestCase):
+    def test_sync_calls_reuse_one_session(self) -> None:
+        session = FakeSession({1: 10})
+        results = []
+
+        def worker():
+            results.append(search_web_serper("某某大学 教授", use_cache=False))
+
+        with mock.patch.object(web_search, "_serper_session", session):
+            threads = [threading.Thread(target=worker) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(session.requests, [1, 1, 1])
+        self.assertTrue(all(len(r) == 10 for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()